@@ -0,0 +1,134 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import hashlib
+import os
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--fixture-db",
+        default=os.environ.get("BENCHMARK_DB", "./duck_meta.db"),
+        help="Metadata DuckDB the routes are benchmarked against",
+    )
+    parser.addoption(
+        "--route-rounds",
+        type=int,
+        default=50,
+        help="Measured requests per route benchmark",
+    )
+    parser.addoption(
+        "--synthetic-scale",
+        help="Benchmark against a synthetic DB at this scale (small, current, "
+        "large) instead of --fixture-db; see api.tools.generate_metadata_db",
+    )
+    parser.addoption(
+        "--synthetic-seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic DB",
+    )
+
+
+def file_checksum(path: str) -> str:
+    checksum = hashlib.sha256()
+    with open(path, "rb") as db_file:
+        for block in iter(lambda: db_file.read(1 << 20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def synthetic_fixture(config, scale_name: str) -> dict:
+    """Generate the synthetic DB once, in the pytest cache directory."""
+    from api.tools import generate_metadata_db
+
+    try:
+        scale = generate_metadata_db.parse_scale(scale_name)
+    except ValueError as exc:
+        pytest.exit(str(exc), returncode=2)
+    seed = config.getoption("synthetic_seed")
+    fixture_id = generate_metadata_db.fixture_id(scale, seed)
+    name = hashlib.sha256(fixture_id.encode()).hexdigest()[:16]
+    path = str(config.cache.mkdir("synthetic_db") / f"{scale_name}-{name}.db")
+    if not os.path.isfile(path):
+        generate_metadata_db.generate(path, scale, seed).dispose()
+    return {
+        "path": path,
+        "id": fixture_id,
+        "sample_ids": generate_metadata_db.sample_ids(seed),
+    }
+
+
+def pytest_configure(config):
+    scale_name = config.getoption("synthetic_scale")
+    if scale_name:
+        config.fixture_db = synthetic_fixture(config, scale_name)
+    else:
+        path = config.getoption("fixture_db")
+        if not os.path.isfile(path):
+            pytest.exit(f"Fixture DB not found: {path}", returncode=2)
+        config.fixture_db = {"path": path, "id": f"sha256:{file_checksum(path)}"}
+
+    # api.config reads these on import, i.e. when the benchmarks are collected
+    os.environ["DB_URL"] = f"duckdb:///{config.fixture_db['path']}"
+    # Bundled responses would answer the cold requests
+    os.environ["RESPONSE_BUNDLE_PATH"] = ""
+    # Benchmarks hit the same routes far beyond the client rate limits
+    os.environ["ENABLE_RATE_LIMIT"] = "false"
+    # The host of the test client, for /popular_species
+    os.environ["TRUSTED_HOSTS"] = "testserver"
+
+
+def pytest_benchmark_update_json(config, benchmarks, output_json):
+    # Lets compare_benchmarks refuse to compare runs on different data
+    output_json["fixture_db"] = {key: config.fixture_db[key] for key in ("path", "id")}
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """Enable redis_cache on an in-memory dict standing in for Redis."""
+    import api.resources.redis as redis_resource
+
+    cache = {}
+
+    async def get_cached_value(key):
+        return cache.get(key)
+
+    async def get_cached_values(*keys):
+        return [cache.get(key) for key in keys]
+
+    class Pipeline:
+        def __init__(self, transaction=True):
+            self.commands = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        def setex(self, key, ttl, value):
+            self.commands.append((key, value))
+
+        async def execute(self):
+            cache.update(self.commands)
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(redis_resource.redis_client, "get", get_cached_value)
+    monkeypatch.setattr(redis_resource.redis_client, "mget", get_cached_values)
+    monkeypatch.setattr(redis_resource.redis_client, "pipeline", Pipeline)
+    return cache
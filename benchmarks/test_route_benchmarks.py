@@ -0,0 +1,86 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.resources.routes import router
+
+# The records of the test DB the requests are about; synthetic DBs give theirs
+SAMPLE_IDS = {
+    "genome_uuid": "a7335667-93e7-11ec-a39d-005056b38ce3",
+    "vep_genome_uuid": "2b5fb047-5992-4dfb-b2fa-1fb4e18d1abb",
+    "assembly_accession": "GCA_000001405.29",
+    "region_name": "1",
+    "location": "8:26291508-26372680",
+    "dataset_type": "genebuild",
+}
+
+# One request per route of api.resources.routes, by route name
+ROUTE_URLS = {
+    "statistics": "/genome/{genome_uuid}/stats",
+    "karyotype": "/genome/{genome_uuid}/karyotype",
+    "top_regions": "/genome/{genome_uuid}/top-regions",
+    "popular_species": "/popular_species",
+    "validate_location": (
+        "/validate_location?genome_id={genome_uuid}&location={location}"
+    ),
+    "example_objects": "/genome/{genome_uuid}/example_objects",
+    "genome_details": "/genome/{genome_uuid}/details",
+    "genome_ftplinks": "/genome/{genome_uuid}/ftplinks",
+    "genome_explain": "/genome/{assembly_accession}/explain",
+    "region_checksum": "/genome/{genome_uuid}/checksum/{region_name}",
+    "dataset_attributes": "/genome/{genome_uuid}/dataset/{dataset_type}/attributes",
+    "get_genome_by_keyword": "/genomeid?assembly_accession_id={assembly_accession}",
+    "get_vep_file_paths": "/genome/{vep_genome_uuid}/vep/file_paths",
+    "get_releases": "/releases",
+    "genome_groups": "/genome_groups?group_type=structural_variant",
+    "genomes_in_group": "/genome_groups/grch38-group/genomes",
+    "genome_counts": "/genome_counts",
+    "genome_group_categories": "/genome_group_categories",
+}
+
+client = TestClient(app)
+
+
+def test_every_route_is_benchmarked():
+    route_names = {route.name for route in router.routes if isinstance(route, APIRoute)}
+    assert route_names == ROUTE_URLS.keys()
+
+
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+@pytest.mark.parametrize("route_name", sorted(ROUTE_URLS))
+def test_route(benchmark, request, response_cache, route_name, cache):
+    """
+    cold: every request misses the response cache and goes to the DB.
+    warm: every request is a cache hit. For the routes without redis_cache,
+    both measure the DB path.
+    """
+    sample_ids = request.config.fixture_db.get("sample_ids", SAMPLE_IDS)
+    url = "/api/metadata" + ROUTE_URLS[route_name].format(**sample_ids)
+    benchmark.group = route_name
+    benchmark.extra_info["url"] = url
+
+    response = benchmark.pedantic(
+        client.get,
+        args=(url,),
+        setup=response_cache.clear if cache == "cold" else None,
+        rounds=request.config.getoption("route_rounds"),
+        # Fills the cache, and opens the DB on the first benchmark
+        warmup_rounds=1,
+    )
+    assert response.status_code == 200
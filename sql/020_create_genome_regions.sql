@@ -0,0 +1,84 @@
+# Materialise the karyotype and top-regions payloads for every genome, already
+# ordered and with the response type mapping applied, so the API serves them
+# with one indexed read instead of sorting sequences in Python.
+# Rows mirror api.models.logic.get_top_level_regions and get_top_regions; the
+# API falls back to those functions when these tables do not exist.
+
+# Karyotype: chromosomal sequences, by rank (nulls last) then length, with
+# the sequence columns api.models.regions.create_assembly_region reads.
+drop table if exists genome_karyotype;
+create table genome_karyotype as
+select
+    g.genome_uuid,
+    row_number() over (
+        partition by g.genome_uuid
+        order by s.chromosome_rank asc nulls last, s.length asc, s.name
+    ) as region_order,
+    s.name,
+    s.chromosome_rank,
+    s.md5,
+    s.length,
+    s.sha512t24u,
+    s.chromosomal,
+    s.type,
+    s.is_circular
+from genome g
+join assembly_sequence s on s.assembly_id = g.assembly_id
+where s.chromosomal = 1
+order by g.genome_uuid, region_order;
+
+create index genome_karyotype_genome_uuid_idx on genome_karyotype (genome_uuid);
+
+
+# Top regions: all chromosomes when the assembly has any (by rank, nulls
+# last, then name), otherwise the 30 longest sequences, keeping only
+# non-chromosome regions of at least 5 kb.
+drop table if exists genome_top_regions;
+create table genome_top_regions as
+with chromosomal as (
+    select
+        g.genome_uuid,
+        row_number() over (
+            partition by g.genome_uuid
+            order by s.chromosome_rank asc nulls last, s.name
+        ) as region_order,
+        s.name,
+        'chromosome' as type,
+        s.length,
+        coalesce(cast(s.is_circular as boolean), false) as is_circular
+    from genome g
+    join assembly_sequence s on s.assembly_id = g.assembly_id
+    where s.chromosomal = 1
+),
+longest as (
+    select
+        g.genome_uuid,
+        row_number() over (
+            partition by g.genome_uuid
+            order by s.length desc, s.name
+        ) as region_order,
+        s.name,
+        s.type,
+        s.length,
+        coalesce(cast(s.is_circular as boolean), false) as is_circular
+    from genome g
+    join assembly_sequence s on s.assembly_id = g.assembly_id
+    where g.genome_uuid not in (select genome_uuid from chromosomal)
+)
+select * from chromosomal
+union all
+select * from longest
+where region_order <= 30
+    and type is distinct from 'chromosome'
+    and length >= 5000
+order by genome_uuid, region_order;
+
+create index genome_top_regions_genome_uuid_idx on genome_top_regions (genome_uuid);
+
+
+# View result
+.print ''
+.print 'Created tables genome_karyotype and genome_top_regions:'
+.print ''
+select count(distinct genome_uuid) as genomes, count(*) as regions from genome_karyotype;
+select count(distinct genome_uuid) as genomes, count(*) as regions from genome_top_regions;
@@ -18,7 +18,7 @@ limitations under the License.
 import logging
 
 from starlette.config import Config
-from starlette.datastructures import CommaSeparatedStrings
+from starlette.datastructures import CommaSeparatedStrings, Secret
 
 from api.logconfig import configure_logging
 
@@ -29,20 +29,159 @@ API_PREFIX = "/api"
 config = Config(".env")
 
 DB_URL: str = config("DB_URL", default="duckdb:///./duck_meta.db")
+# Reflect the whole metadata DB schema when the connection is created. When
+# disabled, the schema is reflected lazily the first time it is needed.
+DB_REFLECT_ON_STARTUP: bool = config("DB_REFLECT_ON_STARTUP", cast=bool, default=False)
+# Optional pickle file caching the reflected schema, invalidated whenever the
+# DuckDB file changes.
+DB_SCHEMA_CACHE: str = config("DB_SCHEMA_CACHE", default="")
+# Run the global queries once when a worker starts, before reporting ready.
+WARM_UP_ON_STARTUP: bool = config("WARM_UP_ON_STARTUP", cast=bool, default=True)
+# When opening the metadata DB fails, the worker retries in the background,
+# doubling the delay (in seconds) between attempts up to the maximum.
+STARTUP_RETRY_DELAY: float = config("STARTUP_RETRY_DELAY", cast=float, default=1.0)
+STARTUP_RETRY_MAX_DELAY: float = config(
+    "STARTUP_RETRY_MAX_DELAY", cast=float, default=30.0
+)
 
 DEBUG: bool = config("DEBUG", cast=bool, default=False)
 PROJECT_NAME: str = config("PROJECT_NAME", default="Ensembl Web Metadata API")
+# CORS origins: "*", a host, "*.example.org" or an origin.
 ALLOWED_HOSTS: list[str] = config(
     "ALLOWED_HOSTS",
     cast=CommaSeparatedStrings,
     default="*",
 )
+# Host header values accepted by the routes that embed the host in response
+# URLs (the popular species images), in the same forms as ALLOWED_HOSTS.
+# Requests for any other host are rejected with 400.
+TRUSTED_HOSTS: list[str] = config(
+    "TRUSTED_HOSTS",
+    cast=CommaSeparatedStrings,
+    default="ensembl.org,*.ensembl.org,localhost,127.0.0.1",
+)
 
 # Caching Config
 REDIS_HOST: str = config("REDIS_HOST", default="redis")
 REDIS_PORT: int = config("REDIS_PORT", default=6379)
 ENABLE_REDIS_CACHE: bool = config("ENABLE_REDIS_CACHE", cast=bool, default=True)
 REDIS_MAX_CONNECTION: int = config("REDIS_MAX_CONNECTION", default=10)
+# Seconds to wait for a Redis PING in the readiness check
+REDIS_HEALTH_TIMEOUT: float = config("REDIS_HEALTH_TIMEOUT", cast=float, default=0.5)
+
+# Optional bundle of prerendered responses written by
+# python -m api.tools.export_response_bundle. Served before Redis and the DB;
+# requests missing from the bundle take the normal path.
+RESPONSE_BUNDLE_PATH: str = config("RESPONSE_BUNDLE_PATH", default="")
+
+# Aggregate /genome/{uuid}/stats in DuckDB (MetaAdaptor.fetch_genome_statistics)
+# instead of loading the genome datasets through GenomeAdaptor.
+GENOME_STATS_FROM_SQL: bool = config("GENOME_STATS_FROM_SQL", cast=bool, default=False)
+
+# Serve the genome, sequence and release lookups of explain, details,
+# karyotype, checksum and releases with column-level Core SQL
+# (api.models.core_adaptor) instead of ORM entity queries. Off by default:
+# only enable it with the ensembl-metadata-api commit locked in uv.lock, once
+# the parity workflow (.github/workflows/core-adaptor-parity.yml) passes on it.
+CORE_SQL_ADAPTORS: bool = config("CORE_SQL_ADAPTORS", cast=bool, default=False)
+
+# Build responses from the dicts of api.models.logic through the Pydantic
+# schemas instead of the api.schemas.serializers functions. Slower; for
+# debugging a payload against its schema.
+VALIDATE_RESPONSES: bool = config("VALIDATE_RESPONSES", cast=bool, default=False)
+
+# HTTP caching of the metadata routes (api.resources.http_cache): ETags and
+# Last-Modified derived from the DuckDB file, and the default Cache-Control
+# max-age in seconds (per-genome routes use a longer one). Off by default: it
+# adds headers and 304 answers that clients and proxies may not expect.
+ENABLE_HTTP_CACHE: bool = config("ENABLE_HTTP_CACHE", cast=bool, default=False)
+HTTP_CACHE_MAX_AGE: int = config("HTTP_CACHE_MAX_AGE", cast=int, default=300)
+
+# gzip/br/zstd response compression (api.resources.compression); smaller
+# bodies are sent uncompressed. Off by default: it changes the response
+# headers and adds compressed variants next to the redis_cache entries.
+ENABLE_COMPRESSION: bool = config("ENABLE_COMPRESSION", cast=bool, default=False)
+COMPRESSION_MIN_SIZE: int = config("COMPRESSION_MIN_SIZE", cast=int, default=1024)
+
+# Admission control of the metadata routes (api.resources.admission), per
+# worker: requests in flight per route, requests queued beyond that and how
+# long (seconds) they may wait, and the Retry-After of the 503 answered to
+# the rest. ADMISSION_ROUTE_LIMITS overrides the first two per route, as
+# "route_name=concurrency/queue_size" items. Off by default: it sheds load
+# with 503s, so the limits have to be sized for the deployment first.
+ENABLE_ADMISSION_CONTROL: bool = config(
+    "ENABLE_ADMISSION_CONTROL", cast=bool, default=False
+)
+ADMISSION_CONCURRENCY: int = config("ADMISSION_CONCURRENCY", cast=int, default=16)
+ADMISSION_QUEUE_SIZE: int = config("ADMISSION_QUEUE_SIZE", cast=int, default=32)
+ADMISSION_QUEUE_TIMEOUT: float = config(
+    "ADMISSION_QUEUE_TIMEOUT", cast=float, default=5.0
+)
+ADMISSION_RETRY_AFTER: int = config("ADMISSION_RETRY_AFTER", cast=int, default=1)
+ADMISSION_ROUTE_LIMITS: CommaSeparatedStrings = config(
+    "ADMISSION_ROUTE_LIMITS",
+    cast=CommaSeparatedStrings,
+    default="genome_details=4/8,genome_explain=4/8,validate_location=8/16",
+)
+
+# Per-client token bucket rate limiting (api.resources.rate_limit) of the
+# RATE_LIMIT_ROUTES, as "route_name=rate/burst" items (requests per second,
+# bucket size). Clients are identified by RATE_LIMIT_API_KEY_HEADER when its
+# value is one of RATE_LIMIT_API_KEYS, by IP otherwise. Behind the ingress, set
+# RATE_LIMIT_TRUSTED_PROXIES (addresses or CIDR ranges) to its addresses: the
+# client IP is then the rightmost X-Forwarded-For address not among them.
+# Without it, every client behind a proxy shares the proxy's bucket, hence off
+# by default. RATE_LIMIT_REDIS_SYNC adds up the requests of each client across
+# workers in Redis, every RATE_LIMIT_SYNC_INTERVAL seconds, per
+# RATE_LIMIT_WINDOW seconds.
+ENABLE_RATE_LIMIT: bool = config("ENABLE_RATE_LIMIT", cast=bool, default=False)
+RATE_LIMIT_ROUTES: CommaSeparatedStrings = config(
+    "RATE_LIMIT_ROUTES",
+    cast=CommaSeparatedStrings,
+    default="get_genome_by_keyword=5/20,validate_location=10/40",
+)
+RATE_LIMIT_API_KEY_HEADER: str = config(
+    "RATE_LIMIT_API_KEY_HEADER", default="x-api-key"
+)
+RATE_LIMIT_API_KEYS: CommaSeparatedStrings = config(
+    "RATE_LIMIT_API_KEYS", cast=CommaSeparatedStrings, default=""
+)
+RATE_LIMIT_TRUSTED_PROXIES: CommaSeparatedStrings = config(
+    "RATE_LIMIT_TRUSTED_PROXIES", cast=CommaSeparatedStrings, default=""
+)
+RATE_LIMIT_MAX_CLIENTS: int = config(
+    "RATE_LIMIT_MAX_CLIENTS", cast=int, default=100_000
+)
+RATE_LIMIT_REDIS_SYNC: bool = config("RATE_LIMIT_REDIS_SYNC", cast=bool, default=False)
+RATE_LIMIT_SYNC_INTERVAL: float = config(
+    "RATE_LIMIT_SYNC_INTERVAL", cast=float, default=1.0
+)
+RATE_LIMIT_WINDOW: int = config("RATE_LIMIT_WINDOW", cast=int, default=60)
+
+# Per-route request phase histograms (api.request_phases): time in cache,
+# adaptors, logic, validation and JSON encoding, and DB queries per request.
+# Off by default, like tracing: it wraps every adaptor and adds histogram
+# work to every request.
+ENABLE_PHASE_METRICS: bool = config("ENABLE_PHASE_METRICS", cast=bool, default=False)
+
+# OpenTelemetry tracing (api.tracing), needs opentelemetry-sdk. Exporter:
+# "otlp" (collector set by the OTEL_EXPORTER_OTLP_* variables), "file" (JSON
+# lines in TRACING_FILE) or "console".
+ENABLE_TRACING: bool = config("ENABLE_TRACING", cast=bool, default=False)
+TRACING_EXPORTER: str = config("TRACING_EXPORTER", default="otlp")
+TRACING_FILE: str = config("TRACING_FILE", default="traces.jsonl")
+TRACING_SAMPLE_RATIO: float = config("TRACING_SAMPLE_RATIO", cast=float, default=1.0)
+
+# On-demand profiling (api.resources.profiling): GET /debug/profile and the
+# PROFILING_HEADER request header, both authorised by PROFILING_TOKEN as a
+# bearer token. Off unless ENABLE_PROFILING is set and a token is configured.
+ENABLE_PROFILING: bool = config("ENABLE_PROFILING", cast=bool, default=False)
+PROFILING_TOKEN: Secret = config("PROFILING_TOKEN", cast=Secret, default="")
+PROFILING_HEADER: str = config("PROFILING_HEADER", default="x-profile")
+PROFILING_MAX_SECONDS: int = config("PROFILING_MAX_SECONDS", cast=int, default=60)
+PROFILING_SAMPLE_INTERVAL: float = config(
+    "PROFILING_SAMPLE_INTERVAL", cast=float, default=0.005
+)
 
 # IDENTIFIERS_ORG URL
 IDENTIFIERS_ORG_BASE_URL: str = config(
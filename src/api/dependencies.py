@@ -4,34 +4,177 @@ from ensembl.production.metadata.api.adaptors import (
     ReleaseAdaptor,
 )
 from ensembl.production.metadata.api.adaptors.vep import VepAdaptor
+from api.models.core_adaptor import CoreGenomeAdaptor, CoreReleaseAdaptor
 from api.models.meta_adaptor import MetaAdaptor
-from api.config import DB_URL
+from api.request_phases import PhaseTimedAdaptor
+from api.config import (
+    CORE_SQL_ADAPTORS,
+    DB_URL,
+    DB_REFLECT_ON_STARTUP,
+    DB_SCHEMA_CACHE,
+    ENABLE_PHASE_METRICS,
+    ENABLE_TRACING,
+    STARTUP_RETRY_DELAY,
+    STARTUP_RETRY_MAX_DELAY,
+    WARM_UP_ON_STARTUP,
+)
 from ensembl.utils.database import DBConnection
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class Dependencies:
-    meta_conn = DBConnection(
-        DB_URL, connect_args={"read_only": True, "config": {"memory_limit": "1GB"}}
-    )
+    """
+    Holds the metadata DB connection and the adaptors built on top of it.
+
+    Nothing is opened at import time. The application lifespan runs
+    `startup_with_retries()` in the background so the worker can report
+    liveness while the connection is opened and warmed; `ready` only becomes
+    True once that has finished, and a failed startup is retried with
+    backoff rather than leaving the worker alive but never ready. Code
+    running outside the lifespan (tests, scripts) gets the same
+    initialisation lazily from the first `get_*` call.
+    """
+
+    meta_conn: DBConnection | None = None
+
+    genome_adaptor: GenomeAdaptor | None = None
+    vep_adaptor: VepAdaptor | None = None
+    release_adaptor: ReleaseAdaptor | None = None
+    meta_adaptor: MetaAdaptor | None = None
+
+    ready: bool = False
+    warmed: bool = False
+    startup_error: str | None = None
+
+    _lock = threading.Lock()
+
+    @classmethod
+    def startup(cls):
+        """Open the metadata DB, build the adaptors and warm them up."""
+        with cls._lock:
+            if cls.ready:
+                return
+            start = time.perf_counter()
+            try:
+                if cls.meta_conn is None:
+                    cls._connect()
+                if WARM_UP_ON_STARTUP and not cls.warmed:
+                    cls._warm_up()
+            except Exception as ex:
+                cls.startup_error = str(ex)
+                logger.exception("Metadata DB startup failed")
+                raise
+            cls.startup_error = None
+            cls.ready = True
+            logger.info(
+                "Metadata DB ready in %.3fs (warmed: %s)",
+                time.perf_counter() - start,
+                cls.warmed,
+            )
+
+    @classmethod
+    async def startup_with_retries(
+        cls,
+        delay: float = STARTUP_RETRY_DELAY,
+        max_delay: float = STARTUP_RETRY_MAX_DELAY,
+    ):
+        """Run `startup()` until it succeeds, doubling the delay between tries.
+
+        Meant to run as a task for the lifetime of the worker; cancel it to
+        stop retrying.
+        """
+        while True:
+            try:
+                await run_in_threadpool(cls.startup)
+                return
+            except Exception:
+                logger.warning("Retrying metadata DB startup in %.1fs", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+    @classmethod
+    def shutdown(cls):
+        """Dispose of the connection pool and forget the adaptors."""
+        with cls._lock:
+            if cls.meta_conn is not None:
+                cls.meta_conn.dispose()
+            cls.meta_conn = None
+            cls.genome_adaptor = None
+            cls.vep_adaptor = None
+            cls.release_adaptor = None
+            cls.meta_adaptor = None
+            cls.ready = False
+            cls.warmed = False
+
+    @classmethod
+    def _connect(cls):
+        meta_conn = DBConnection(
+            DB_URL,
+            reflect=DB_REFLECT_ON_STARTUP,
+            lazy_reflect=True,
+            schema_cache=DB_SCHEMA_CACHE or None,
+            connect_args={"read_only": True, "config": {"memory_limit": "1GB"}},
+        )
+        genome_adaptor = GenomeAdaptor(meta_conn, meta_conn)
+        release_adaptor = ReleaseAdaptor(meta_conn)
+        if CORE_SQL_ADAPTORS:
+            genome_adaptor = CoreGenomeAdaptor(genome_adaptor)
+            release_adaptor = CoreReleaseAdaptor(release_adaptor)
+        vep_adaptor = VepAdaptor(meta_conn)
+        meta_adaptor = MetaAdaptor(meta_conn)
+        # The wrapper both times the adaptor phase and opens the adaptor spans
+        if ENABLE_PHASE_METRICS or ENABLE_TRACING:
+            genome_adaptor = PhaseTimedAdaptor(genome_adaptor)
+            vep_adaptor = PhaseTimedAdaptor(vep_adaptor)
+            release_adaptor = PhaseTimedAdaptor(release_adaptor)
+            meta_adaptor = PhaseTimedAdaptor(meta_adaptor)
+        cls.genome_adaptor = genome_adaptor
+        cls.vep_adaptor = vep_adaptor
+        cls.release_adaptor = release_adaptor
+        cls.meta_adaptor = meta_adaptor
+        cls.meta_conn = meta_conn
+
+    @classmethod
+    def _warm_up(cls):
+        # Open a pooled connection and run the global queries once, so the
+        # first requests do not pay for DuckDB file loading or statement
+        # compilation.
+        with cls.meta_conn.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        try:
+            cls.meta_adaptor.fetch_genome_taxonomy_counts()
+            cls.meta_adaptor.fetch_genome_groups()
+        except Exception as ex:
+            logger.warning("Metadata DB warm-up queries failed: %s", ex)
+        cls.warmed = True
 
-    genome_adaptor = GenomeAdaptor(meta_conn, meta_conn)
-    vep_adaptor = VepAdaptor(meta_conn)
-    release_adaptor = ReleaseAdaptor(meta_conn)
-    meta_adaptor = MetaAdaptor(meta_conn)
+    @classmethod
+    def _ensure_started(cls):
+        if not cls.ready:
+            cls.startup()
 
     @staticmethod
     def get_genome_adaptor():
+        Dependencies._ensure_started()
         return Dependencies.genome_adaptor
 
     @staticmethod
     def get_vep_adaptor():
+        Dependencies._ensure_started()
         return Dependencies.vep_adaptor
 
     @staticmethod
     def get_release_adaptor():
+        Dependencies._ensure_started()
         return Dependencies.release_adaptor
 
     @staticmethod
     def get_meta_adaptor():
+        Dependencies._ensure_started()
         return Dependencies.meta_adaptor
@@ -5,8 +5,11 @@ from starlette.status import (
     HTTP_404_NOT_FOUND,
     HTTP_406_NOT_ACCEPTABLE,
     HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_429_TOO_MANY_REQUESTS,
     HTTP_501_NOT_IMPLEMENTED,
     HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
 )
 
 
@@ -16,14 +19,20 @@ def response_error_handler(result):
 
     if status == 400:
         return http_400_bad_request(details)
+    elif status == 403:
+        return http_403_forbidden(details)
     elif status == 404:
         return http_404_not_found(details)
     elif status == 406:
         return http_406_not_acceptable(details)
+    elif status == 429:
+        return http_429_too_many_requests(details, result.get("headers"))
     elif status == 500:
         return http_500_internal_server_error(details)
     elif status == 501:
         return http_501_not_implemented(details)
+    elif status == 503:
+        return http_503_service_unavailable(details, result.get("retry_after"))
     else:
         return http_unknown_error(result)
 
@@ -38,6 +47,11 @@ def http_400_bad_request(details: str = "Bad Request"):
     return PlainTextResponse(response_msg, status_code=HTTP_400_BAD_REQUEST)
 
 
+def http_403_forbidden(details: str = "Forbidden"):
+    response_msg = json.dumps({"status_code": HTTP_403_FORBIDDEN, "details": details})
+    return PlainTextResponse(response_msg, status_code=HTTP_403_FORBIDDEN)
+
+
 def http_404_not_found(details: str = "Not Found"):
     response_msg = json.dumps({"status_code": HTTP_404_NOT_FOUND, "details": details})
     return PlainTextResponse(response_msg, status_code=HTTP_404_NOT_FOUND)
@@ -50,6 +64,17 @@ def http_406_not_acceptable(details: str = "Not Acceptable"):
     return PlainTextResponse(response_msg, status_code=HTTP_406_NOT_ACCEPTABLE)
 
 
+def http_429_too_many_requests(
+    details: str = "Too Many Requests", headers: dict[str, str] | None = None
+):
+    response_msg = json.dumps(
+        {"status_code": HTTP_429_TOO_MANY_REQUESTS, "details": details}
+    )
+    return PlainTextResponse(
+        response_msg, status_code=HTTP_429_TOO_MANY_REQUESTS, headers=headers
+    )
+
+
 def http_501_not_implemented(details: str = "Not Implemented"):
     response_msg = json.dumps(
         {"status_code": HTTP_501_NOT_IMPLEMENTED, "details": details}
@@ -62,3 +87,15 @@ def http_500_internal_server_error(details: str = "Internal Server Error"):
         {"status_code": HTTP_500_INTERNAL_SERVER_ERROR, "details": details}
     )
     return PlainTextResponse(response_msg, status_code=HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def http_503_service_unavailable(
+    details: str = "Service Unavailable", retry_after: int | None = None
+):
+    response_msg = json.dumps(
+        {"status_code": HTTP_503_SERVICE_UNAVAILABLE, "details": details}
+    )
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return PlainTextResponse(
+        response_msg, status_code=HTTP_503_SERVICE_UNAVAILABLE, headers=headers
+    )
@@ -20,6 +20,25 @@ import sys
 
 import ecs_logging
 
+try:
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+
+class TraceContextFilter(logging.Filter):
+    """
+    Adds the ids of the current OpenTelemetry span to the log records, as the
+    fields ecs_logging writes out as trace.id and span.id.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.elasticapm_trace_id = format(span_context.trace_id, "032x")
+            record.elasticapm_span_id = format(span_context.span_id, "016x")
+        return True
+
 
 def configure_logging(level: int, service_name: str) -> None:
     handler = logging.StreamHandler(sys.stderr)
@@ -29,6 +48,8 @@ def configure_logging(level: int, service_name: str) -> None:
             exclude_fields=["log.original", "color_message"],
         )
     )
+    if trace is not None:
+        handler.addFilter(TraceContextFilter())
 
     root_logger = logging.getLogger()
     root_logger.handlers = [handler]
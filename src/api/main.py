@@ -15,6 +15,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -23,9 +24,37 @@ from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
 from starlette.middleware.cors import CORSMiddleware
 
+from api.request_phases import PhaseMetricsMiddleware
+from api.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from api.resources.admission import AdmissionControlMiddleware
+from api.resources.compression import CompressionMiddleware
+from api.resources.http_cache import (
+    ConditionalRequestMiddleware,
+    data_generation_tag,
+)
+from api.resources.json_responses import APIJSONResponse
+from api.resources.profiling import ProfilingMiddleware, router as profiling_router
+from api.resources.rate_limit import RateLimitMiddleware
 from api.resources.redis import close_redis_pool
+from api.resources.response_bundle import open_response_bundle, close_response_bundle
 from api.resources.routes import router
-from api.config import API_PREFIX, ALLOWED_HOSTS, VERSION, PROJECT_NAME, DEBUG
+from api.resources.health import router as health_router
+from api.config import (
+    API_PREFIX,
+    ALLOWED_HOSTS,
+    VERSION,
+    PROJECT_NAME,
+    DEBUG,
+    ENABLE_ADMISSION_CONTROL,
+    ENABLE_COMPRESSION,
+    ENABLE_HTTP_CACHE,
+    ENABLE_PHASE_METRICS,
+    ENABLE_PROFILING,
+    ENABLE_RATE_LIMIT,
+    ENABLE_TRACING,
+    PROFILING_TOKEN,
+    RESPONSE_BUNDLE_PATH,
+)
 from api.dependencies import Dependencies
 
 
@@ -33,21 +62,72 @@ from api.dependencies import Dependencies
 async def lifespan(app: FastAPI):
     """
     Async context manager for FastAPI lifespan events.
-    Logs the PID of the worker at startup, and cleans up Redis on shutdown.
+    Logs the PID of the worker at startup and opens the metadata DB in the
+    background, and cleans up Redis and the DB connection on shutdown.
     - Code before yield runs on startup
     - Code after yield runs on shutdown
     """
     logger = logging.getLogger("uvicorn.worker")
     logger.info(f"Worker process started (PID: {os.getpid()})")
+    if RESPONSE_BUNDLE_PATH:
+        open_response_bundle(RESPONSE_BUNDLE_PATH, data_generation_tag())
+    # Don't block startup on the DB: the worker starts serving straight away
+    # and Dependencies.ready flips once the connection is open and warmed.
+    # A failed startup is retried until it succeeds or the worker stops.
+    startup_task = asyncio.create_task(Dependencies.startup_with_retries())
     yield
+    startup_task.cancel()
+    await asyncio.gather(startup_task, return_exceptions=True)
     await close_redis_pool()
+    close_response_bundle()
+    Dependencies.shutdown()
+    shutdown_tracing()
 
 
 def get_application() -> FastAPI:
     application = FastAPI(
-        title=PROJECT_NAME, debug=DEBUG, version=VERSION, lifespan=lifespan
+        title=PROJECT_NAME,
+        debug=DEBUG,
+        version=VERSION,
+        lifespan=lifespan,
+        default_response_class=APIJSONResponse,
     )
 
+    # Innermost: phases are the time spent by the application itself
+    if ENABLE_PHASE_METRICS:
+        application.add_middleware(
+            PhaseMetricsMiddleware, routes=router.routes, prefix=API_PREFIX
+        )
+    # Added before CORSMiddleware so that their responses get the CORS headers.
+    # Inside the caching and rate limiting middlewares, so that 304 Not
+    # Modified answers and refused clients are never queued or shed.
+    if ENABLE_ADMISSION_CONTROL:
+        application.add_middleware(
+            AdmissionControlMiddleware, routes=router.routes, prefix=API_PREFIX
+        )
+    # Outside AdmissionControlMiddleware, so that refused clients hold no slot
+    if ENABLE_RATE_LIMIT:
+        application.add_middleware(
+            RateLimitMiddleware, routes=router.routes, prefix=API_PREFIX
+        )
+    if ENABLE_HTTP_CACHE:
+        application.add_middleware(
+            ConditionalRequestMiddleware, routes=router.routes, prefix=API_PREFIX
+        )
+    # Outside ConditionalRequestMiddleware, to mark the ETags of the bodies it
+    # compresses as weak
+    if ENABLE_COMPRESSION:
+        application.add_middleware(CompressionMiddleware)
+    # Outside the limiting middlewares, so that the spans include the requests
+    # refused with 429 or 503 and the time spent queueing
+    if ENABLE_TRACING and setup_tracing():
+        application.add_middleware(
+            TracingMiddleware, routes=router.routes, prefix=API_PREFIX
+        )
+    profiling = ENABLE_PROFILING and bool(str(PROFILING_TOKEN))
+    if profiling:
+        application.add_middleware(ProfilingMiddleware)
+
     application.add_middleware(
         CORSMiddleware,
         allow_origins=ALLOWED_HOSTS or ["*"],
@@ -57,8 +137,13 @@ def get_application() -> FastAPI:
     )
 
     application.include_router(router, prefix=API_PREFIX)
+    application.include_router(health_router)
+    if profiling:
+        application.include_router(profiling_router)
 
-    Instrumentator(excluded_handlers=["/metrics"]).instrument(
+    # Profiles take seconds by design
+    excluded_handlers = ["/metrics", "/health/.*", "/debug/.*"]
+    Instrumentator(excluded_handlers=excluded_handlers).instrument(
         application,
         latency_lowr_buckets=(
             0.01,
@@ -0,0 +1,301 @@
+# See the NOTICE file distributed with this work for additional information
+#   regarding copyright ownership.
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#       http://www.apache.org/licenses/LICENSE-2.0
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+"""
+Core-SQL versions of the adaptor lookups used by the hot endpoints
+(explain, details, karyotype, checksum and releases).
+
+The ensembl-metadata-api adaptors select whole ORM entities, so each row
+hydrates and tracks a Genome, Organism, Assembly, GenomeRelease,
+EnsemblRelease and EnsemblSite object with every column of those tables.
+The adaptors below select only the columns the api.models.logic builders
+read, and return lightweight rows exposing the same attribute paths
+(row.Genome.genome_uuid, row.EnsemblRelease.label, ...), so the builders
+are unchanged.
+
+Lookups with arguments these adaptors do not handle, and every other
+method, are delegated to the wrapped adaptor.
+
+They are off by default (CORE_SQL_ADAPTORS). The tests of
+tests/api/models/test_core_adaptor.py compare them with the adaptors of the
+ensembl-metadata-api commit locked in uv.lock, in CI
+(.github/workflows/core-adaptor-parity.yml) and whenever the lock is
+updated. Upstream behaviours deliberately not reproduced:
+
+- Rows are SimpleNamespaces with only the columns of GENOME_COLUMNS,
+  SEQUENCE_COLUMNS and RELEASE_COLUMNS: other columns, relationships
+  (row.Genome.genome_datasets, ...) and session tracking are not available.
+- fetch_genomes only handles a genome UUID or an assembly accession, with an
+  optional release_version, and only returns released genomes; lookups
+  with any other argument are delegated.
+- fetch_sequences only handles a genome UUID and does not check that the
+  genome is released. Sequences are ordered by chromosome rank, then name,
+  so that responses do not depend on the storage order.
+- fetch_releases only filters by site name, release labels and current flag.
+"""
+
+from __future__ import annotations
+
+import logging
+from types import SimpleNamespace
+
+import sqlalchemy as db
+from ensembl.production.metadata.api.models import (
+    Assembly,
+    AssemblySequence,
+    EnsemblRelease,
+    EnsemblSite,
+    Genome,
+    GenomeRelease,
+    Organism,
+    ReleaseStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns read by create_genome/create_brief_genome_details and the
+# latest_genome selection, grouped by the entity they are exposed under.
+GENOME_COLUMNS = {
+    "Genome": (
+        Genome.genome_uuid,
+        Genome.created,
+        Genome.url_name,
+        Genome.suppressed,
+        Genome.suppression_details,
+    ),
+    "Organism": (
+        Organism.common_name,
+        Organism.strain,
+        Organism.strain_type,
+        Organism.scientific_name,
+        Organism.biosample_id,
+        Organism.scientific_parlance_name,
+        Organism.organism_uuid,
+        Organism.taxonomy_id,
+        Organism.species_taxonomy_id,
+    ),
+    "Assembly": (
+        Assembly.assembly_uuid,
+        Assembly.accession,
+        Assembly.level,
+        Assembly.name,
+        Assembly.ucsc_name,
+        Assembly.ensembl_name,
+        Assembly.is_reference,
+    ),
+    "EnsemblRelease": (
+        EnsemblRelease.version,
+        EnsemblRelease.release_date,
+        EnsemblRelease.label,
+        EnsemblRelease.release_type,
+        EnsemblRelease.is_current,
+    ),
+    "EnsemblSite": (
+        EnsemblSite.name,
+        EnsemblSite.label,
+        EnsemblSite.uri,
+    ),
+}
+
+# Columns read by create_assembly_region/create_genome_assembly_sequence_region
+SEQUENCE_COLUMNS = {
+    "AssemblySequence": (
+        AssemblySequence.name,
+        AssemblySequence.chromosome_rank,
+        AssemblySequence.md5,
+        AssemblySequence.length,
+        AssemblySequence.sha512t24u,
+        AssemblySequence.chromosomal,
+        AssemblySequence.type,
+        AssemblySequence.is_circular,
+    ),
+}
+
+# Columns read by create_release
+RELEASE_COLUMNS = {
+    "EnsemblRelease": GENOME_COLUMNS["EnsemblRelease"],
+    "EnsemblSite": GENOME_COLUMNS["EnsemblSite"],
+}
+
+
+def _select_columns(columns_by_entity: dict) -> list:
+    return [
+        column.label(f"{entity}_{column.key}")
+        for entity, columns in columns_by_entity.items()
+        for column in columns
+    ]
+
+
+GENOME_SELECT = _select_columns(GENOME_COLUMNS)
+SEQUENCE_SELECT = _select_columns(SEQUENCE_COLUMNS)
+RELEASE_SELECT = _select_columns(RELEASE_COLUMNS)
+
+
+def _to_entity_rows(result, columns_by_entity: dict) -> list[SimpleNamespace]:
+    """Regroup flat result rows under one namespace per entity."""
+    layout = [
+        (entity, [column.key for column in columns])
+        for entity, columns in columns_by_entity.items()
+    ]
+    rows = []
+    for values in result:
+        position = 0
+        entities = {}
+        for entity, keys in layout:
+            entities[entity] = SimpleNamespace(
+                **dict(zip(keys, values[position : position + len(keys)]))
+            )
+            position += len(keys)
+        rows.append(SimpleNamespace(**entities))
+    return rows
+
+
+class CoreAdaptor:
+    """Delegates everything not overridden to the wrapped adaptor."""
+
+    def __init__(self, adaptor):
+        self._adaptor = adaptor
+
+    def __getattr__(self, name):
+        return getattr(self._adaptor, name)
+
+    @property
+    def _db_conn(self):
+        return self._adaptor.metadata_db
+
+
+class CoreGenomeAdaptor(CoreAdaptor):
+    def fetch_genomes(
+        self,
+        genome_uuid: str | None = None,
+        assembly_accession: str | None = None,
+        release_version: float | None = None,
+        **kwargs,
+    ):
+        """
+        GenomeAdaptor.fetch_genomes for a genome UUID or an assembly
+        accession, restricted to released genomes and ordered like the
+        adaptor (production name, newest release first).
+        """
+        if kwargs or (genome_uuid is None) == (assembly_accession is None):
+            return self._adaptor.fetch_genomes(
+                genome_uuid=genome_uuid,
+                assembly_accession=assembly_accession,
+                release_version=release_version,
+                **kwargs,
+            )
+
+        genome_select = db.lambda_stmt(
+            lambda: db.select(*GENOME_SELECT)
+            .select_from(Genome)
+            .join(Organism, Organism.organism_id == Genome.organism_id)
+            .join(Assembly, Assembly.assembly_id == Genome.assembly_id)
+            .join(GenomeRelease, GenomeRelease.genome_id == Genome.genome_id)
+            .join(EnsemblRelease, EnsemblRelease.release_id == GenomeRelease.release_id)
+            .join(EnsemblSite, EnsemblSite.site_id == EnsemblRelease.site_id)
+            .where(EnsemblRelease.status == ReleaseStatus.RELEASED)
+        )
+        if genome_uuid is not None:
+            genome_select += lambda s: s.where(Genome.genome_uuid == genome_uuid)
+        else:
+            genome_select += lambda s: s.where(Assembly.accession == assembly_accession)
+        if release_version is not None:
+            genome_select += lambda s: s.where(
+                EnsemblRelease.version <= release_version
+            )
+        genome_select += lambda s: s.order_by(
+            Genome.production_name, EnsemblRelease.release_date.desc()
+        )
+
+        with self._db_conn.connect() as conn:
+            return _to_entity_rows(conn.execute(genome_select), GENOME_COLUMNS)
+
+    def fetch_sequences(
+        self,
+        genome_uuid: str | None = None,
+        assembly_sequence_name: str | None = None,
+        chromosomal_only: bool = False,
+        **kwargs,
+    ):
+        """
+        GenomeAdaptor.fetch_sequences for the sequences of a genome,
+        optionally only the chromosomal ones or the one with a given name,
+        ordered by chromosome rank and name.
+        """
+        if kwargs or genome_uuid is None:
+            return self._adaptor.fetch_sequences(
+                genome_uuid=genome_uuid,
+                assembly_sequence_name=assembly_sequence_name,
+                chromosomal_only=chromosomal_only,
+                **kwargs,
+            )
+
+        sequence_select = db.lambda_stmt(
+            lambda: db.select(*SEQUENCE_SELECT)
+            .select_from(Genome)
+            .join(
+                AssemblySequence,
+                AssemblySequence.assembly_id == Genome.assembly_id,
+            )
+            .where(Genome.genome_uuid == genome_uuid)
+        )
+        if chromosomal_only:
+            sequence_select += lambda s: s.where(AssemblySequence.chromosomal == 1)
+        if assembly_sequence_name is not None:
+            sequence_select += lambda s: s.where(
+                AssemblySequence.name == assembly_sequence_name
+            )
+        sequence_select += lambda s: s.order_by(
+            AssemblySequence.chromosome_rank, AssemblySequence.name
+        )
+
+        with self._db_conn.connect() as conn:
+            return _to_entity_rows(conn.execute(sequence_select), SEQUENCE_COLUMNS)
+
+
+class CoreReleaseAdaptor(CoreAdaptor):
+    def fetch_releases(
+        self,
+        site_name: str | None = None,
+        release_label: list[str] | None = None,
+        current_only: bool = False,
+        **kwargs,
+    ):
+        """
+        ReleaseAdaptor.fetch_releases filtered by site name, release labels
+        and current flag, ordered by release version.
+        """
+        if kwargs:
+            return self._adaptor.fetch_releases(
+                site_name=site_name,
+                release_label=release_label,
+                current_only=current_only,
+                **kwargs,
+            )
+
+        release_select = db.lambda_stmt(
+            lambda: db.select(*RELEASE_SELECT)
+            .select_from(EnsemblRelease)
+            .join(EnsemblSite, EnsemblSite.site_id == EnsemblRelease.site_id)
+        )
+        if site_name is not None:
+            release_select += lambda s: s.where(EnsemblSite.name == site_name)
+        if release_label is not None:
+            release_labels = list(release_label)
+            release_select += lambda s: s.where(
+                EnsemblRelease.label.in_(release_labels)
+            )
+        if current_only:
+            release_select += lambda s: s.where(EnsemblRelease.is_current == 1)
+        release_select += lambda s: s.order_by(EnsemblRelease.version)
+
+        with self._db_conn.connect() as conn:
+            return _to_entity_rows(conn.execute(release_select), RELEASE_COLUMNS)
@@ -37,10 +37,13 @@ from ensembl.production.metadata.api.models import (
 from ensembl.production.metadata.api.adaptors import GenomeAdaptor, ReleaseAdaptor
 from ensembl.production.metadata.api.adaptors.vep import VepAdaptor
 from api.models.meta_adaptor import MetaAdaptor
+from api.models.regions import create_assembly_region, sort_top_level_regions
+from api.request_phases import timed
 
 logger = logging.getLogger(__name__)
 
 
+@timed("logic")
 def get_top_level_statistics_by_uuid(db_conn, genome_uuid):
     if not genome_uuid:
         logger.warning("Missing or Empty Genome UUID field.")
@@ -75,35 +78,43 @@ def get_top_level_statistics_by_uuid(db_conn, genome_uuid):
     return None
 
 
-def get_top_level_regions(adaptor: GenomeAdaptor, genome_uuid: str):
+TOP_REGIONS_MIN_LENGTH = 5000
+
+
+@timed("logic")
+def get_top_level_regions(
+    adaptor: GenomeAdaptor, genome_uuid: str, meta_adaptor: MetaAdaptor = None
+):
+    # Use the karyotype materialised by sql/020_create_genome_regions.sql when
+    # it has been built; its rows are the regions below, already sorted.
+    if meta_adaptor is not None:
+        precomputed_regions = meta_adaptor.fetch_karyotype(genome_uuid)
+        if precomputed_regions is not None:
+            return precomputed_regions
+
     chromosomal_only = True
     top_level_regions = assembly_region_iterator(adaptor, genome_uuid, chromosomal_only)
     genome_top_level_regions = []
     for tlr in top_level_regions:
         genome_top_level_regions.append(tlr)
 
-    # Sort the list of regions by two criteria:
-    # 1. By "rank" if present. Missing and null ranks are considered to have
-    #    the highest possible rank (so they go last).
-    # 2. Then by "length", which is stored as a string, so we convert it to an integer for proper numeric sorting
-    genome_top_level_regions.sort(
-        key=lambda region: (
-            # A present rank can still be null in metadata; normalize it so
-            # Python never compares an integer with None.
-            region["rank"] if region.get("rank") is not None else float("inf"),
-            # Convert the "length" from string to integer so numeric comparison works correctly
-            # If "length" is missing, treat it as 0
-            int(region.get("length", 0)),
-        )
-    )
+    sort_top_level_regions(genome_top_level_regions)
     return genome_top_level_regions
 
 
+@timed("logic")
 def get_top_regions(
     adaptor: GenomeAdaptor,
     genome_uuid: str,
-    min_length: int = 5000,
+    min_length: int = TOP_REGIONS_MIN_LENGTH,
+    meta_adaptor: MetaAdaptor = None,
 ):
+    # The materialised top regions apply the default length threshold only.
+    if meta_adaptor is not None and min_length == TOP_REGIONS_MIN_LENGTH:
+        precomputed_regions = meta_adaptor.fetch_top_regions(genome_uuid)
+        if precomputed_regions is not None:
+            return precomputed_regions
+
     def create_response_region(region):
         is_chromosome = bool(region.get("chromosomal"))
         length = int(region.get("length", 0))
@@ -170,24 +181,7 @@ def assembly_region_iterator(db_conn, genome_uuid, chromosomal_only):
         yield create_assembly_region(result)
 
 
-def create_assembly_region(data=None):
-    if data is None:
-        return None
-
-    assembly_region = {
-        "name": data.AssemblySequence.name,
-        "rank": data.AssemblySequence.chromosome_rank,
-        "md5": data.AssemblySequence.md5,
-        "length": data.AssemblySequence.length,
-        "sha512t24u": data.AssemblySequence.sha512t24u,
-        "chromosomal": data.AssemblySequence.chromosomal,
-        "sequence_type": data.AssemblySequence.type,
-        "is_circular": data.AssemblySequence.is_circular,
-    }
-
-    return assembly_region
-
-
+@timed("logic")
 def get_organisms_group_count(db_conn, release_label):
     count_result = db_conn.fetch_organisms_group_counts(release_label=release_label)
     response_data = create_organisms_group_count(count_result, release_label)
@@ -213,6 +207,7 @@ def create_organisms_group_count(data, release_label):
     return {"organisms_group_count": organisms_list, "release_label": release_label}
 
 
+@timed("logic")
 def get_attributes_by_genome_uuid(db_conn, genome_uuid, release_version):
     if not genome_uuid:
         logger.warning("Missing or Empty Genome UUID field.")
@@ -292,6 +287,7 @@ def create_attributes_info(data=None):
     }
 
 
+@timed("logic")
 def get_genome_by_uuid(db_conn, genome_uuid, release_version):
     if not genome_uuid:
         logger.warning("Missing or Empty Genome UUID field.")
@@ -460,6 +456,7 @@ def create_release(data=None):
     return release
 
 
+@timed("logic")
 def get_ftp_links(db_conn, genome_uuid, dataset_type, release_version):
     # Request is sending an empty string '' instead of None when
     # an input parameter is not supplied by the user
@@ -516,6 +513,7 @@ def create_paths(data=None):
     return {"links": ftp_links_list}
 
 
+@timed("logic")
 def get_brief_genome_details_by_uuid(db_conn, genome_id_or_accession, release_version):
     """
     Fetch brief genome details by UUID or tag and release version.
@@ -645,9 +643,12 @@ def fetch_genomes_by_url_name(db_conn, url_name, release_version):
     # Public genome tags are stored as canonical accessions, e.g.
     # GCA_000001405.29, but users may type them in any case. Match
     # case-insensitively while returning the canonical genome_tag from the row.
+    # The statement is built through lambda_stmt so its construction and
+    # compilation are cached; url_name_lower and release_version become bound
+    # parameters instead of producing a new statement on every request.
     url_name_lower = url_name.lower()
-    genome_select = (
-        db.select(Genome, Organism, Assembly)
+    genome_select = db.lambda_stmt(
+        lambda: db.select(Genome, Organism, Assembly)
         .select_from(Genome)
         .join(Organism, Organism.organism_id == Genome.organism_id)
         .join(Assembly, Assembly.assembly_id == Genome.assembly_id)
@@ -660,15 +661,15 @@ def fetch_genomes_by_url_name(db_conn, url_name, release_version):
     )
 
     if release_version is not None:
-        genome_select = genome_select.where(EnsemblRelease.version <= release_version)
+        genome_select += lambda s: s.where(EnsemblRelease.version <= release_version)
+
+    genome_select += lambda s: s.order_by(
+        Genome.production_name, EnsemblRelease.release_date.desc()
+    )
 
     with db_conn.metadata_db.session_scope() as session:
         session.expire_on_commit = False
-        return session.execute(
-            genome_select.order_by(
-                Genome.production_name, EnsemblRelease.release_date.desc()
-            )
-        ).all()
+        return session.execute(genome_select).all()
 
 
 def find_latest_genome_in_same_release_type(
@@ -781,6 +782,7 @@ def create_brief_genome_details(data=None, genome_tag=None, latest_genome=None):
     return brief_genome_details
 
 
+@timed("logic")
 def genome_assembly_sequence_region(db_conn, genome_uuid, sequence_region_name):
     if not genome_uuid or not sequence_region_name:
         logger.warning("Missing or Empty Genome UUID or Sequence region name field.")
@@ -820,6 +822,7 @@ def create_genome_assembly_sequence_region(data=None):
     return genome_assembly_sequence_region
 
 
+@timed("logic")
 def get_dataset_attributes(
     adaptor: GenomeAdaptor, genome_uuid: str, dataset_type: str, attribute_names: list
 ):
@@ -985,6 +988,7 @@ def create_attribute_value(data=None, attribute_names=None, latest_only=False):
     return {"attributes": attributes_list, "release_version": data[0].release.version}
 
 
+@timed("logic")
 def get_genomes_by_specific_keyword_iterator(
     db_conn,
     tolid,
@@ -1085,6 +1089,7 @@ def get_genomes_by_specific_keyword_iterator(
     return None
 
 
+@timed("logic")
 def get_vep_paths_by_uuid(db_conn: VepAdaptor, genome_uuid: str):
     if not genome_uuid:
         logger.warning("Missing or Empty Genome UUID field.")
@@ -1100,6 +1105,7 @@ def get_vep_paths_by_uuid(db_conn: VepAdaptor, genome_uuid: str):
     return None
 
 
+@timed("logic")
 def release_iterator(db_conn: ReleaseAdaptor, site_name, release_label, current_only):
 
     # set release_label and site_name to None if it's an empty list
@@ -1117,6 +1123,7 @@ def release_iterator(db_conn: ReleaseAdaptor, site_name, release_label, current_
         yield create_release(result)
 
 
+@timed("logic")
 def get_genome_groups_by_reference(
     db_conn: Any,
     group_type: str,
@@ -1242,6 +1249,7 @@ def get_genome_groups_by_reference(
 
 
 # Dummy methods as found in upstream. Need to be properly connected to DB
+@timed("logic")
 def data_get_genomes_in_group(
     db_conn: Any,
     group_id: str,
@@ -1628,6 +1636,7 @@ def data_get_genomes_in_group(
         return None
 
 
+@timed("logic")
 def data_get_genome_counts(adaptor: MetaAdaptor, release_label: str | None):
     data = adaptor.fetch_genome_taxonomy_counts(release_label)
     total = 0
@@ -1637,6 +1646,7 @@ def data_get_genome_counts(adaptor: MetaAdaptor, release_label: str | None):
     return {"total": total, "counts": data}
 
 
+@timed("logic")
 def data_genome_group_categories(adaptor: MetaAdaptor):
     data = adaptor.fetch_genome_groups()
     genome_group_categories = {}
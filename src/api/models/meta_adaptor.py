@@ -18,11 +18,9 @@ import sqlalchemy as db
 from ensembl.utils.database import DBConnection
 from ensembl.production.metadata.api.models.genome import Genome
 
-from sqlalchemy import Column, Integer, create_engine, Index, ForeignKey, func
-from sqlalchemy.orm import DeclarativeBase, relationship, declarative_base
-from sqlalchemy.orm.session import Session
+from sqlalchemy import Column, Integer, BigInteger, Boolean, Numeric, String, func
 
-from sqlalchemy.ext.declarative import DeferredReflection
+from sqlalchemy.orm import DeclarativeBase
 
 logger = logging.getLogger(__name__)
 
@@ -31,34 +29,118 @@ class Base(DeclarativeBase):
     pass
 
 
-class GenomeTaxonomyCounts(DeferredReflection, Base):
+# The tables below are declared with the columns MetaAdaptor queries instead of
+# being reflected (DeferredReflection) when the adaptor is created, so building
+# the adaptor does not touch the database and worker startup does not depend on
+# the schema size. Add a column here before using it in a query.
+class GenomeTaxonomyCounts(Base):
+    # Created by sql/010_create_genome_counts.sql
     __tablename__ = "genome_taxonomy_counts"
-    __table_args__ = {"extend_existing": True}
-    genome_id = Column(Integer, primary_key=True)
+    release_id = Column(Integer, primary_key=True)
+    taxon_id = Column(Integer, primary_key=True)
+    label = Column(String)
+    ensembl_taxon_name = Column(String)
+    count = Column(BigInteger)
+    ord = Column(Integer)
 
 
-class GenomeGroup(DeferredReflection, Base):
+class GenomeGroup(Base):
     __tablename__ = "genome_group"
-    __table_args__ = {"extend_existing": True}
     genome_group_id = Column(Integer, primary_key=True)
+    type = Column(String)
+    name = Column(String)
+    label = Column(String)
+    description = Column(String)
 
 
-class GenomeGroupMember(DeferredReflection, Base):
+class GenomeGroupMember(Base):
     __tablename__ = "genome_group_member"
-    __table_args__ = {"extend_existing": True}
     genome_group_member_id = Column(Integer, primary_key=True)
+    genome_group_id = Column(Integer)
+    genome_id = Column(Integer)
+    is_current = Column(Integer)
 
 
-class GenomeRelease(DeferredReflection, Base):
+class GenomeRelease(Base):
     __tablename__ = "genome_release"
-    __table_args__ = {"extend_existing": True}
     genome_release_id = Column(Integer, primary_key=True)
+    genome_id = Column(Integer)
+    release_id = Column(Integer)
+    is_current = Column(Integer)
 
 
-class EnsemblRelease(DeferredReflection, Base):
+class EnsemblRelease(Base):
     __tablename__ = "ensembl_release"
-    __table_args__ = {"extend_existing": True}
     release_id = Column(Integer, primary_key=True)
+    version = Column(Numeric)
+    is_current = Column(Integer)
+    release_type = Column(String)
+    status = Column(String)
+
+
+class Dataset(Base):
+    __tablename__ = "dataset"
+    dataset_id = Column(Integer, primary_key=True)
+    status = Column(String)
+
+
+class GenomeDataset(Base):
+    __tablename__ = "genome_dataset"
+    genome_dataset_id = Column(Integer, primary_key=True)
+    genome_id = Column(Integer)
+    dataset_id = Column(Integer)
+    release_id = Column(Integer)
+
+
+class DatasetAttribute(Base):
+    __tablename__ = "dataset_attribute"
+    dataset_attribute_id = Column(Integer, primary_key=True)
+    dataset_id = Column(Integer)
+    attribute_id = Column(Integer)
+    value = Column(String)
+
+
+class Attribute(Base):
+    __tablename__ = "attribute"
+    attribute_id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+# Value of ensembl_release.status and dataset.status once published
+RELEASED = "Released"
+
+
+class GenomeKaryotype(Base):
+    # Created by sql/020_create_genome_regions.sql
+    __tablename__ = "genome_karyotype"
+    genome_uuid = Column(String, primary_key=True)
+    region_order = Column(Integer, primary_key=True)
+    name = Column(String)
+    chromosome_rank = Column(Integer)
+    md5 = Column(String)
+    length = Column(BigInteger)
+    sha512t24u = Column(String)
+    chromosomal = Column(Integer)
+    type = Column(String)
+    is_circular = Column(Integer)
+
+
+class GenomeTopRegions(Base):
+    # Created by sql/020_create_genome_regions.sql
+    __tablename__ = "genome_top_regions"
+    genome_uuid = Column(String, primary_key=True)
+    region_order = Column(Integer, primary_key=True)
+    name = Column(String)
+    type = Column(String)
+    length = Column(BigInteger)
+    is_circular = Column(Boolean)
+
+
+class GenomeStatsDocument(Base):
+    # Created by python -m api.tools.build_genome_stats
+    __tablename__ = "genome_stats_document"
+    genome_uuid = Column(String, primary_key=True)
+    document = Column(String)
 
 
 class MetaAdaptor:
@@ -66,7 +148,18 @@ class MetaAdaptor:
 
     def __init__(self, db_conn: DBConnection):
         self.db_conn = db_conn
-        DeferredReflection.prepare(db_conn._engine)
+        self._has_table = {}
+
+    def has_table(self, table_name: str) -> bool:
+        """
+        Whether an optional table (e.g. one materialised by the sql/ scripts)
+        exists. The metadata DB is opened read-only, so the answer is cached.
+        """
+        if table_name not in self._has_table:
+            self._has_table[table_name] = db.inspect(self.db_conn._engine).has_table(
+                table_name
+            )
+        return self._has_table[table_name]
 
     @staticmethod
     def _genome_group_category_mock():
@@ -108,19 +201,78 @@ class MetaAdaptor:
         """
         if release_label == None:
             release_label = ""
-        with self.db_conn.session_scope() as session:
-            sql = (
-                db.select(
-                    GenomeTaxonomyCounts.ensembl_taxon_name,
-                    GenomeTaxonomyCounts.count,
-                )
-                .where(GenomeTaxonomyCounts.label == release_label)
-                .order_by(GenomeTaxonomyCounts.ord)
+        # lambda_stmt caches the constructed statement and its compiled
+        # form; release_label is extracted as a bound parameter per call.
+        sql = db.lambda_stmt(
+            lambda: db.select(
+                GenomeTaxonomyCounts.ensembl_taxon_name,
+                GenomeTaxonomyCounts.count,
             )
-            logger.debug(sql)
-            genome_taxonomy_counts = session.execute(sql).mappings().all()
+            .where(GenomeTaxonomyCounts.label == release_label)
+            .order_by(GenomeTaxonomyCounts.ord)
+        )
+        logger.debug(sql)
+        # Bulk read: rows come straight from DuckDB's columnar result
+        genome_taxonomy_counts = self.db_conn.fetch_records(sql)
         return genome_taxonomy_counts
 
+    @staticmethod
+    def _genome_groups_select():
+        genome_group_category = MetaAdaptor._genome_group_category_mock()
+
+        return (
+            db.select(
+                GenomeGroup.type,
+                GenomeGroup.genome_group_id,
+                GenomeGroup.name,
+                GenomeGroup.label,
+                GenomeGroup.description,
+                genome_group_category.c.display_name,
+                func.count(db.distinct(GenomeGroupMember.genome_id)).label(
+                    "genome_count"
+                ),
+            )
+            .join(
+                GenomeGroupMember,
+                GenomeGroupMember.genome_group_id == GenomeGroup.genome_group_id,
+            )
+            .join(
+                GenomeRelease,
+                GenomeRelease.genome_id == GenomeGroupMember.genome_id,
+            )
+            .join(
+                EnsemblRelease,
+                EnsemblRelease.release_id == GenomeRelease.release_id,
+            )
+            .join(
+                genome_group_category,
+                genome_group_category.c.type == GenomeGroup.type,
+            )
+            .where(
+                GenomeGroupMember.is_current == 1,
+                db.or_(
+                    db.and_(
+                        EnsemblRelease.is_current == 1,
+                        EnsemblRelease.release_type == "integrated",
+                    ),
+                    db.and_(
+                        GenomeRelease.is_current == 1,
+                        EnsemblRelease.release_type == "partial",
+                    ),
+                ),
+            )
+            .group_by(
+                GenomeGroup.type,
+                GenomeGroup.genome_group_id,
+                GenomeGroup.name,
+                GenomeGroup.label,
+                GenomeGroup.description,
+                genome_group_category.c.display_name,
+                genome_group_category.c.ggc_order,
+            )
+            .order_by(genome_group_category.c.ggc_order, GenomeGroup.genome_group_id)
+        )
+
     def fetch_genome_groups(self):
         """
         Fetches genome groups.
@@ -136,38 +288,83 @@ class MetaAdaptor:
         """
 
         with self.db_conn.session_scope() as session:
-            genome_group_category = self._genome_group_category_mock()
+            # The statement has no parameters, so after the first call both the
+            # select construction and its compilation come from the cache.
+            sql = db.lambda_stmt(lambda: MetaAdaptor._genome_groups_select())
+            logger.debug(sql)
+            genome_groups = session.execute(sql).mappings().all()
+        return genome_groups
 
-            sql = (
-                db.select(
-                    GenomeGroup.type,
-                    GenomeGroup.genome_group_id,
-                    GenomeGroup.name,
-                    GenomeGroup.label,
-                    GenomeGroup.description,
-                    genome_group_category.c.display_name,
-                    func.count(db.distinct(GenomeGroupMember.genome_id)).label(
-                        "genome_count"
-                    ),
+    def fetch_genome_statistics(self, genome_uuid: str) -> dict[str, str]:
+        """
+        Fetches the statistics (dataset attributes) of a genome as a single
+        {attribute name: value} mapping, aggregated in the database.
+
+        Attributes of every released dataset of the genome are considered,
+        with the dataset and release status filters of
+        GenomeAdaptor.fetch_genome_datasets; when several releases provide the
+        same attribute the value from the newest release wins, as in
+        get_top_level_statistics_by_uuid. Within a release, the attribute
+        row loaded last there, i.e. the highest dataset_attribute_id, wins.
+
+        Args:
+            genome_uuid: Genome UUID
+
+        Returns:
+            The statistic values by attribute name (empty if none).
+        """
+        with self.db_conn.session_scope() as session:
+            sql = db.lambda_stmt(
+                lambda: db.select(
+                    Attribute.name,
+                    func.arg_max(
+                        DatasetAttribute.value,
+                        db.tuple_(
+                            EnsemblRelease.version,
+                            GenomeDataset.release_id,
+                            DatasetAttribute.dataset_attribute_id,
+                        ),
+                    ).label("value"),
                 )
+                .select_from(Genome)
+                .join(GenomeDataset, GenomeDataset.genome_id == Genome.genome_id)
                 .join(
-                    GenomeGroupMember,
-                    GenomeGroupMember.genome_group_id == GenomeGroup.genome_group_id,
+                    EnsemblRelease,
+                    EnsemblRelease.release_id == GenomeDataset.release_id,
                 )
+                .join(Dataset, Dataset.dataset_id == GenomeDataset.dataset_id)
                 .join(
-                    GenomeRelease,
-                    GenomeRelease.genome_id == GenomeGroupMember.genome_id,
+                    DatasetAttribute,
+                    DatasetAttribute.dataset_id == GenomeDataset.dataset_id,
                 )
                 .join(
-                    EnsemblRelease,
-                    EnsemblRelease.release_id == GenomeRelease.release_id,
+                    Attribute, Attribute.attribute_id == DatasetAttribute.attribute_id
                 )
+                .where(Genome.genome_uuid == genome_uuid)
+                .where(Dataset.status == RELEASED)
+                .where(EnsemblRelease.status == RELEASED)
+                .group_by(Attribute.name)
+            )
+            logger.debug(sql)
+            rows = session.execute(sql).all()
+        return {name: value for name, value in rows}
+
+    def fetch_current_genome_uuids(self) -> List[str]:
+        """
+        Fetches the UUIDs of the genomes in the current release(s), i.e. the
+        genomes of the current integrated release and the current genomes of
+        partial releases.
+        """
+        with self.db_conn.session_scope() as session:
+            sql = db.lambda_stmt(
+                lambda: db.select(Genome.genome_uuid)
+                .distinct()
+                .join(GenomeRelease, GenomeRelease.genome_id == Genome.genome_id)
                 .join(
-                    genome_group_category,
-                    genome_group_category.c.type == GenomeGroup.type,
+                    EnsemblRelease,
+                    EnsemblRelease.release_id == GenomeRelease.release_id,
                 )
                 .where(
-                    GenomeGroupMember.is_current == 1,
                     db.or_(
                         db.and_(
                             EnsemblRelease.is_current == 1,
@@ -177,39 +374,106 @@ class MetaAdaptor:
                             GenomeRelease.is_current == 1,
                             EnsemblRelease.release_type == "partial",
                         ),
-                    ),
-                )
-                .group_by(
-                    GenomeGroup.type,
-                    GenomeGroup.genome_group_id,
-                    GenomeGroup.name,
-                    GenomeGroup.label,
-                    GenomeGroup.description,
-                    genome_group_category.c.display_name,
-                    genome_group_category.c.ggc_order,
-                )
-                .order_by(
-                    genome_group_category.c.ggc_order, GenomeGroup.genome_group_id
+                    )
                 )
+                .order_by(Genome.genome_uuid)
             )
             logger.debug(sql)
-            genome_groups = session.execute(sql).mappings().all()
-        return genome_groups
+            genome_uuids = session.execute(sql).scalars().all()
+        return genome_uuids
 
     def fetch_genome_group_members(self, group_id: int):
         if group_id is None:
             raise ValueError
 
+        sql = db.lambda_stmt(
+            lambda: db.select(Genome.genome_uuid)
+            .join(GenomeGroupMember, Genome.genome_id == GenomeGroupMember.genome_id)
+            .where(GenomeGroupMember.genome_group_id == group_id)
+            .order_by(Genome.genome_uuid)
+        )
+        logger.debug(sql)
+        return self.db_conn.fetch_records(sql)
+
+    def fetch_karyotype(self, genome_uuid: str):
+        """
+        Fetches the precomputed karyotype of a genome.
+
+        Args:
+            genome_uuid: Genome UUID
+
+        Returns:
+            A list of region dicts, as api.models.regions.create_assembly_region
+            builds them, in display order, or None if genome_karyotype has not
+            been built.
+        """
+        if not self.has_table(GenomeKaryotype.__tablename__):
+            return None
+
+        sql = db.lambda_stmt(
+            lambda: db.select(
+                GenomeKaryotype.name,
+                GenomeKaryotype.chromosome_rank.label("rank"),
+                GenomeKaryotype.md5,
+                GenomeKaryotype.length,
+                GenomeKaryotype.sha512t24u,
+                GenomeKaryotype.chromosomal,
+                GenomeKaryotype.type.label("sequence_type"),
+                GenomeKaryotype.is_circular,
+            )
+            .where(GenomeKaryotype.genome_uuid == genome_uuid)
+            .order_by(GenomeKaryotype.region_order)
+        )
+        logger.debug(sql)
+        return self.db_conn.fetch_records(sql)
+
+    def fetch_top_regions(self, genome_uuid: str):
+        """
+        Fetches the precomputed top regions of a genome.
+
+        Args:
+            genome_uuid: Genome UUID
+
+        Returns:
+            A list of region dicts (name, type, length, is_circular) in
+            display order, or None if genome_top_regions has not been built.
+        """
+        if not self.has_table(GenomeTopRegions.__tablename__):
+            return None
+
+        sql = db.lambda_stmt(
+            lambda: db.select(
+                GenomeTopRegions.name,
+                GenomeTopRegions.type,
+                GenomeTopRegions.length,
+                GenomeTopRegions.is_circular,
+            )
+            .where(GenomeTopRegions.genome_uuid == genome_uuid)
+            .order_by(GenomeTopRegions.region_order)
+        )
+        logger.debug(sql)
+        return self.db_conn.fetch_records(sql)
+
+    def fetch_genome_stats_document(self, genome_uuid: str) -> str | None:
+        """
+        Fetches the prebuilt /stats response of a genome.
+
+        Args:
+            genome_uuid: Genome UUID
+
+        Returns:
+            The serialised JSON document, or None if genome_stats_document
+            has not been built or has no entry for this genome.
+        """
+        if not self.has_table(GenomeStatsDocument.__tablename__):
+            return None
+
         with self.db_conn.session_scope() as session:
-            sql = (
-                db.select(Genome.genome_uuid)
-                .join(
-                    GenomeGroupMember, Genome.genome_id == GenomeGroupMember.genome_id
+            sql = db.lambda_stmt(
+                lambda: db.select(GenomeStatsDocument.document).where(
+                    GenomeStatsDocument.genome_uuid == genome_uuid
                 )
-                .where(GenomeGroupMember.genome_group_id == group_id)
-                .order_by(Genome.genome_uuid)
             )
             logger.debug(sql)
-            data = session.execute(sql).mappings().all()
-
-        return data
+            document = session.execute(sql).scalar_one_or_none()
+        return document
@@ -0,0 +1,56 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Assembly regions as the karyotype and top-regions logic handles them. Kept
+apart from api.models.logic, which needs ensembl-metadata-api, so that
+sql/020_create_genome_regions.sql can be checked against it on its own.
+"""
+
+
+def create_assembly_region(data=None):
+    if data is None:
+        return None
+
+    assembly_region = {
+        "name": data.AssemblySequence.name,
+        "rank": data.AssemblySequence.chromosome_rank,
+        "md5": data.AssemblySequence.md5,
+        "length": data.AssemblySequence.length,
+        "sha512t24u": data.AssemblySequence.sha512t24u,
+        "chromosomal": data.AssemblySequence.chromosomal,
+        "sequence_type": data.AssemblySequence.type,
+        "is_circular": data.AssemblySequence.is_circular,
+    }
+
+    return assembly_region
+
+
+def sort_top_level_regions(regions: list[dict]) -> None:
+    """Sorts karyotype regions in place, in display order."""
+    # Sort the list of regions by two criteria:
+    # 1. By "rank" if present. Missing and null ranks are considered to have
+    #    the highest possible rank (so they go last).
+    # 2. Then by "length", which is stored as a string, so we convert it to an integer for proper numeric sorting
+    regions.sort(
+        key=lambda region: (
+            # A present rank can still be null in metadata; normalize it so
+            # Python never compares an integer with None.
+            region["rank"] if region.get("rank") is not None else float("inf"),
+            # Convert the "length" from string to integer so numeric comparison works correctly
+            # If "length" is missing, treat it as 0
+            int(region.get("length", 0)),
+        )
+    )
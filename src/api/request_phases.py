@@ -0,0 +1,209 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Per-route latency breakdown of the metadata requests.
+
+PhaseMetricsMiddleware gives each request a RequestPhases record, and the
+code paths below charge their time to it:
+
+- cache: response bundle and Redis lookups and writes (redis_cache)
+- adaptor: adaptor calls, i.e. DB queries and ORM row building
+  (PhaseTimedAdaptor, set up by Dependencies)
+- logic: the api.models.logic functions called by the routes
+- validation: building the response payloads (api.schemas.serializers,
+  through the Pydantic schemas with VALIDATE_RESPONSES)
+- json: JSON encoding (api.resources.json_responses.dumps)
+- other: the rest (routing, parameter parsing, middleware)
+
+Phases nest (logic calls adaptors), and time is charged to the innermost
+one, so the phases of a request add up to its duration. They are exported
+as the request_phase_seconds histogram, by route and phase, along with
+request_db_queries, the number of SQL statements each request executed.
+"""
+
+import functools
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterable
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api import tracing
+from api.resources.route_matching import RouteMatcher
+
+PHASES = ("cache", "adaptor", "logic", "validation", "json", "other")
+
+PHASE_SECONDS = Histogram(
+    "request_phase_seconds",
+    "Time spent by requests in each phase",
+    ["route", "phase"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_QUERIES = Histogram(
+    "request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+_current_phases: ContextVar["RequestPhases | None"] = ContextVar(
+    "request_phases", default=None
+)
+
+
+class RequestPhases:
+    """Time per phase and DB queries of one request."""
+
+    __slots__ = ("seconds", "db_queries", "_stack", "_started")
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.db_queries = 0
+        self._stack: list[str] = []
+        self._started = 0.0
+
+    def enter(self, phase: str):
+        now = perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._started
+        self._stack.append(phase)
+        self._started = now
+
+    def exit(self):
+        now = perf_counter()
+        self.seconds[self._stack.pop()] += now - self._started
+        self._started = now
+
+    def observe(self, route_name: str, duration: float):
+        timed_seconds = sum(self.seconds.values()) - self.seconds["other"]
+        self.seconds["other"] = max(duration - timed_seconds, 0.0)
+        for phase, seconds in self.seconds.items():
+            PHASE_SECONDS.labels(route_name, phase).observe(seconds)
+        DB_QUERIES.labels(route_name).observe(self.db_queries)
+
+
+@contextmanager
+def phase(name: str):
+    """Charge the time spent in the block to a phase of the current request."""
+    phases = _current_phases.get()
+    if phases is None:
+        yield
+        return
+    phases.enter(name)
+    try:
+        yield
+    finally:
+        phases.exit()
+
+
+def timed(name: str):
+    """
+    Charge the time spent in the decorated function to a phase, and trace its
+    calls as spans when tracing is on. For generator functions, the time
+    spent producing each item (and no span).
+    """
+
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                with phase(name):
+                    items = func(*args, **kwargs)
+                while True:
+                    with phase(name):
+                        try:
+                            item = next(items)
+                        except StopIteration as stop:
+                            return stop.value
+                    yield item
+
+            return generator_wrapper
+
+        span_name = f"{name} {func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_phases.get() is None and tracing.tracer is None:
+                return func(*args, **kwargs)
+            with phase(name), tracing.span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class PhaseTimedAdaptor:
+    """Charges the calls to the wrapped adaptor's methods to the adaptor phase."""
+
+    def __init__(self, adaptor):
+        self._adaptor = adaptor
+        self._methods = {}
+
+    def __getattr__(self, name):
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        value = getattr(self._adaptor, name)
+        if not callable(value):
+            return value
+        method = self._methods[name] = timed("adaptor")(value)
+        return method
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_db_query(conn, cursor, statement, parameters, context, executemany):
+    phases = _current_phases.get()
+    if phases is not None:
+        phases.db_queries += 1
+
+
+class PhaseMetricsMiddleware:
+    """
+    Records the phases of the requests of the given routes, by route name.
+
+    Args:
+        routes: The routes instrumented, matched on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[BaseRoute], prefix: str = ""):
+        self.app = app
+        self.route_matcher = RouteMatcher(routes, prefix)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_name = None
+        if scope["type"] == "http":
+            route_name = self.route_matcher.route_name(scope["path"])
+        if route_name is None:
+            await self.app(scope, receive, send)
+            return
+
+        phases = RequestPhases()
+        token = _current_phases.set(phases)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_phases.reset(token)
+            phases.observe(route_name, perf_counter() - start)
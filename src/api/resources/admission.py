@@ -0,0 +1,239 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Per-route admission control (load shedding).
+
+Each metadata route gets a RouteLimiter: at most `concurrency` requests in
+flight per worker, up to `queue_size` more waiting (at most `queue_timeout`
+seconds) for a slot, and a fast 503 with Retry-After for the rest. A burst on
+an expensive route (details, explain) is then bounded and cannot hold the
+worker away from the cheap ones (releases).
+
+Requests are counted from the moment the middleware sees them, which is
+what bounds the load: the route handlers run their DB queries on the event
+loop, so a request in flight is mostly a request waiting for it.
+
+Cached responses are always admitted. For routes wrapped by redis_cache, a
+request beyond the concurrency limit is let through without a slot, and only
+queues (or is rejected) if it misses the cache, in call_admitted.
+"""
+
+import asyncio
+import collections
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Iterable
+
+from prometheus_client import Counter, Gauge
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api.config import (
+    ADMISSION_CONCURRENCY,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RETRY_AFTER,
+    ADMISSION_ROUTE_LIMITS,
+)
+from api.error_response import response_error_handler
+from api.resources.route_matching import RouteMatcher
+
+logger = logging.getLogger("admission")
+
+IN_FLIGHT = Gauge("admission_in_flight", "Requests holding a route slot", ["route"])
+QUEUED = Gauge("admission_queued", "Requests waiting for a route slot", ["route"])
+REJECTED = Counter(
+    "admission_rejected", "Requests rejected with a 503", ["route", "reason"]
+)
+CONCURRENCY_LIMIT = Gauge(
+    "admission_concurrency_limit", "Route slots per worker", ["route"]
+)
+QUEUE_LIMIT = Gauge("admission_queue_limit", "Route queue size per worker", ["route"])
+
+# Limiter of a cached route's request admitted without a slot (see module doc)
+_pending_admission: contextvars.ContextVar["RouteLimiter | None"] = (
+    contextvars.ContextVar("pending_admission", default=None)
+)
+
+
+def parse_route_limits(values: Iterable[str]) -> dict[str, tuple[int, int]]:
+    """Parse "route=concurrency/queue_size" items."""
+    route_limits = {}
+    for value in values:
+        route_name, _, limits = value.strip().partition("=")
+        concurrency, _, queue_size = limits.partition("/")
+        route_limits[route_name.strip()] = (
+            int(concurrency),
+            int(queue_size) if queue_size else ADMISSION_QUEUE_SIZE,
+        )
+    return route_limits
+
+
+class RouteLimiter:
+    def __init__(
+        self,
+        route_name: str,
+        concurrency: int = ADMISSION_CONCURRENCY,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.route_name = route_name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+        CONCURRENCY_LIMIT.labels(route_name).set(concurrency)
+        QUEUE_LIMIT.labels(route_name).set(queue_size)
+
+    def _report(self):
+        IN_FLIGHT.labels(self.route_name).set(self.active)
+        QUEUED.labels(self.route_name).set(len(self._waiters))
+
+    def try_acquire(self) -> bool:
+        """Take a free slot, without waiting."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._report()
+            return True
+        return False
+
+    async def acquire(self) -> bool:
+        """Take a slot, queueing for one if the queue is not full."""
+        if self.try_acquire():
+            return True
+        if len(self._waiters) >= self.queue_size:
+            REJECTED.labels(self.route_name, "queue_full").inc()
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._report()
+        try:
+            # release() hands its slot over by resolving the waiter
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            REJECTED.labels(self.route_name, "queue_timeout").inc()
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._report()
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._report()
+                return
+        self.active -= 1
+        self._report()
+
+    def rejection(self):
+        return response_error_handler(
+            {
+                "status": 503,
+                "details": f"Too many requests for {self.route_name}, retry later",
+                "retry_after": ADMISSION_RETRY_AFTER,
+            }
+        )
+
+
+async def call_admitted(func: Callable[..., Awaitable[Any]], *args, **kwargs):
+    """
+    Call a cached route's handler after a cache miss, first taking a route
+    slot (or answering 503) if the request was let through without one.
+    """
+    limiter = _pending_admission.get()
+    if limiter is None:
+        return await func(*args, **kwargs)
+    if not await limiter.acquire():
+        return limiter.rejection()
+    try:
+        return await func(*args, **kwargs)
+    finally:
+        limiter.release()
+
+
+def is_cached(route: BaseRoute) -> bool:
+    # Set by redis_cache on the endpoints it wraps
+    return hasattr(getattr(route, "endpoint", None), "cache_key_prefix")
+
+
+class AdmissionControlMiddleware:
+    """
+    Applies a RouteLimiter to the GET requests of each of the given routes.
+
+    Args:
+        routes: The routes limited, matched on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+        route_limits: {route name: (concurrency, queue_size)} overriding the
+            defaults; defaults to ADMISSION_ROUTE_LIMITS.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Iterable[BaseRoute],
+        prefix: str = "",
+        route_limits: dict[str, tuple[int, int]] | None = None,
+    ):
+        self.app = app
+        self.route_matcher = RouteMatcher(routes, prefix)
+        if route_limits is None:
+            route_limits = parse_route_limits(ADMISSION_ROUTE_LIMITS)
+        self.limiters = {
+            route.name: RouteLimiter(route.name, *route_limits.get(route.name, ()))
+            for route in self.route_matcher.routes
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route = None
+        if scope["type"] == "http":
+            route = self.route_matcher.match(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiters[route.name]
+
+        if limiter.try_acquire():
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                limiter.release()
+            return
+
+        if is_cached(route):
+            token = _pending_admission.set(limiter)
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _pending_admission.reset(token)
+            return
+
+        if not await limiter.acquire():
+            await limiter.rejection()(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
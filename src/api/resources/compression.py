@@ -0,0 +1,181 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Response compression with Accept-Encoding negotiation.
+
+zstd, brotli (br) and gzip are offered; br and zstd are left out if the
+`brotli` or `zstandard` dependency cannot be imported. Bodies smaller than
+COMPRESSION_MIN_SIZE are sent as is.
+
+CompressionMiddleware compresses the responses that are not compressed yet.
+redis_cache and the response bundle store compressed variants next to each
+body (variant_key), so cached payloads are compressed once and sent
+compressed on every HIT. The bundle has every variant, compressed when it is
+exported; redis_cache compresses the coding negotiated on the MISS, and the
+others after their first HIT.
+
+Median cost and compressed size (tests/api/resources/test_compression.py),
+on the fly / cached level:
+
+    coding   stats document, 1.9 KB        genome list, 15 KB
+    zstd     9us / 76us,   33% / 32%       12us / 795us,  4.1% / 4.1%
+    br       39us / 970us, 32% / 29%       66us / 1.1ms,  3.6% / 3.5%
+    gzip     19us / 20us,  32% / 32%       55us / 65us,   4.5% / 4.5%
+"""
+
+import gzip
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import COMPRESSION_MIN_SIZE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encoders by content coding, in order of preference. Cached variants are
+# compressed once, so they use a higher level than on-the-fly compression.
+ENCODERS: dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = (
+        zstandard.ZstdCompressor(level=3).compress,
+        zstandard.ZstdCompressor(level=12).compress,
+    )
+if brotli is not None:
+    ENCODERS["br"] = (
+        lambda body: brotli.compress(body, quality=4),
+        lambda body: brotli.compress(body, quality=9),
+    )
+ENCODERS["gzip"] = (
+    lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+    lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    The content coding to use for an Accept-Encoding header: the available
+    coding with the highest q-value, ties going to ENCODERS order.
+    """
+    if not accept_encoding:
+        return None
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        qvalue = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                qvalue = float(params[2:])
+            except ValueError:
+                qvalue = 0.0
+        qvalues[coding.strip().lower()] = qvalue
+    best, best_qvalue = None, 0.0
+    for encoding in ENCODERS:
+        qvalue = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+    return best
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    fast, small = ENCODERS[encoding]
+    return small(body) if cached else fast(body)
+
+
+def variant_key(key: str, encoding: str) -> str:
+    """Cache key of the `encoding` compressed variant of the body under key."""
+    return key + "\x00" + encoding
+
+
+def encoding_headers(encoding: str) -> dict[str, str]:
+    return {"content-encoding": encoding, "vary": "Accept-Encoding"}
+
+
+def _weaken_etag(headers: MutableHeaders):
+    # The ETag identifies the uncompressed representation; a compressed body
+    # is only semantically equivalent, i.e. a weak match.
+    response_etag = headers.get("etag")
+    if response_etag and not response_etag.startswith("W/"):
+        headers["etag"] = "W/" + response_etag
+
+
+class CompressionMiddleware:
+    """
+    Compresses single-chunk responses of a compressible content type and at
+    least minimum_size bytes with the coding negotiated from Accept-Encoding.
+    Streamed (multi-chunk) and already encoded responses are passed through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "content-encoding" in headers:
+                    # Precompressed, e.g. a cached variant
+                    _weaken_etag(headers)
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(scope=start_message)
+            if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+                headers.add_vary_header("Accept-Encoding")
+                single_chunk = not message.get("more_body", False)
+                if single_chunk and len(body) >= self.minimum_size:
+                    body = compress(body, encoding)
+                    headers["content-encoding"] = encoding
+                    headers["content-length"] = str(len(body))
+                    _weaken_etag(headers)
+                    message = {**message, "body": body}
+            passthrough = True
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
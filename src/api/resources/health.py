@@ -0,0 +1,92 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import logging
+import time
+
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+
+from api.config import ENABLE_REDIS_CACHE, REDIS_HEALTH_TIMEOUT
+from api.dependencies import Dependencies
+from api.resources.json_responses import APIJSONResponse
+from api.resources.redis import redis_client
+
+router = APIRouter(
+    tags=["health"], prefix="/health", default_response_class=APIJSONResponse
+)
+
+logger = logging.getLogger("health")
+
+
+def _ping_database():
+    with Dependencies.meta_conn.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+async def database_status():
+    status = {
+        "connected": False,
+        "warmed": Dependencies.warmed,
+        "error": Dependencies.startup_error,
+    }
+    if Dependencies.meta_conn is None:
+        return status
+    try:
+        await run_in_threadpool(_ping_database)
+        status["connected"] = True
+    except Exception as ex:
+        logger.warning("Metadata DB health check failed: %s", ex)
+        status["error"] = str(ex)
+    return status
+
+
+async def redis_status():
+    if not ENABLE_REDIS_CACHE:
+        return {"enabled": False, "reachable": None, "latency_ms": None}
+
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(redis_client.ping(), timeout=REDIS_HEALTH_TIMEOUT)
+        reachable = True
+    except Exception as ex:
+        logger.warning("Redis health check failed: %s", ex)
+        reachable = False
+    latency_ms = round((time.perf_counter() - start) * 1000, 3)
+    return {"enabled": True, "reachable": reachable, "latency_ms": latency_ms}
+
+
+@router.get("/live", name="liveness")
+async def liveness():
+    return APIJSONResponse({"status": "alive"})
+
+
+@router.get("/ready", name="readiness")
+async def readiness():
+    database, redis = await asyncio.gather(database_status(), redis_status())
+    # Redis is reported but not required: the cache falls back to the DB when
+    # Redis is unavailable, so an outage must not take every pod out of service.
+    is_ready = Dependencies.ready and database["connected"]
+    return APIJSONResponse(
+        {
+            "status": "ready" if is_ready else "not_ready",
+            "database": database,
+            "redis": redis,
+        },
+        status_code=200 if is_ready else 503,
+    )
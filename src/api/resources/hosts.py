@@ -0,0 +1,70 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Validation of the request Host header, for the responses that embed it (and
+are cached per host): an arbitrary client-supplied value must neither end up
+in URLs served to others nor create unbounded cache keys.
+"""
+
+import re
+from typing import Iterable
+from urllib.parse import urlsplit
+
+# hostname (a trailing dot is dropped) or [IPv6 address], and optional port
+HOST_PATTERN = re.compile(
+    r"^(?P<name>[a-z0-9](?:[a-z0-9-]*[a-z0-9])?(?:\.[a-z0-9](?:[a-z0-9-]*[a-z0-9])?)*"
+    r"|\[[0-9a-f:.]+\])\.?(?P<port>:[0-9]{1,5})?$"
+)
+
+
+def _allowed_names(allowed_hosts: Iterable[str]) -> list[str]:
+    # Entries may also be given as origins (scheme://host), as for CORS
+    names = []
+    for entry in allowed_hosts:
+        entry = entry.strip().lower()
+        if "://" in entry:
+            entry = urlsplit(entry).netloc
+        if entry:
+            names.append(entry)
+    return names
+
+
+def is_allowed_host(name: str, port: str, allowed_hosts: Iterable[str]) -> bool:
+    """
+    Whether the host name and port (":8000" or "") match allowed_hosts: "*"
+    allows any host, "*.example.org" any subdomain of example.org, and an
+    entry without a port any port of that host.
+    """
+    for allowed in _allowed_names(allowed_hosts):
+        if allowed in ("*", name, name + port):
+            return True
+        if allowed.startswith("*.") and name.endswith(allowed[1:]):
+            return True
+    return False
+
+
+def normalise_host(host: str | None, allowed_hosts: Iterable[str]) -> str | None:
+    """
+    The Host header, lowercased and without a trailing dot, if it is well
+    formed and allowed, otherwise None.
+    """
+    match = HOST_PATTERN.match((host or "").strip().lower())
+    if match is None:
+        return None
+    name, port = match.group("name"), match.group("port") or ""
+    if not is_allowed_host(name, port, allowed_hosts):
+        return None
+    return name + port
@@ -0,0 +1,214 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+HTTP conditional requests for the metadata routes.
+
+Every metadata response is a function of the request and of the metadata DB,
+which is a read-only DuckDB file replaced as a whole on each data release.
+The stat of that file (size, mtime) plus the API version therefore identify
+a "data generation", and a strong ETag is derived from the generation, the
+host, the path and the query string, without looking at the response body.
+
+This lets ConditionalRequestMiddleware answer If-None-Match (and
+If-Modified-Since) with a 304 before the request reaches the route, i.e.
+before any Redis or DB work. 200 responses get the ETag, Last-Modified and
+the Cache-Control of their route.
+"""
+
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable
+
+from sqlalchemy.engine import make_url
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import DB_URL, HTTP_CACHE_MAX_AGE, VERSION
+from api.resources.json_responses import NDJSON_MEDIA_TYPE
+from api.resources.route_matching import RouteMatcher
+
+logger = logging.getLogger("http_cache")
+
+# Cache-Control max-age (seconds) of the routes that differ from
+# HTTP_CACHE_MAX_AGE. Routes listed as None are not given validators at all.
+ROUTE_MAX_AGE: dict[str, int | None] = {
+    # Per-genome payloads only change with a new data generation
+    "statistics": 3600,
+    "karyotype": 3600,
+    "top_regions": 3600,
+    "example_objects": 3600,
+    "genome_details": 3600,
+    "genome_ftplinks": 3600,
+    "genome_explain": 3600,
+    "region_checksum": 3600,
+    "dataset_attributes": 3600,
+    "validate_location": 3600,
+}
+
+
+class DataGeneration:
+    """Identifies the metadata DB content currently served."""
+
+    def __init__(self, tag: str, last_modified: datetime):
+        self.tag = tag
+        self.last_modified = last_modified.replace(microsecond=0)
+        self.last_modified_header = format_datetime(self.last_modified, usegmt=True)
+
+    @classmethod
+    def from_db_url(cls, db_url: str) -> "DataGeneration | None":
+        """The generation of a file-based DB, None for other databases."""
+        database = make_url(db_url).database
+        if not database or database == ":memory:":
+            return None
+        try:
+            stat = os.stat(database)
+        except OSError as ex:
+            logger.warning("No data generation for %s: %s", database, ex)
+            return None
+        tag = f"{VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+        last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        return cls(tag, last_modified)
+
+
+_data_generation: DataGeneration | None = None
+
+
+def data_generation() -> DataGeneration | None:
+    """The generation of DB_URL, read once per worker: the file is read only."""
+    global _data_generation
+    if _data_generation is None:
+        _data_generation = DataGeneration.from_db_url(DB_URL)
+    return _data_generation
+
+
+def data_generation_tag() -> str | None:
+    generation = data_generation()
+    return generation.tag if generation is not None else None
+
+
+def cache_control(route_name: str) -> str | None:
+    max_age = ROUTE_MAX_AGE.get(route_name, HTTP_CACHE_MAX_AGE)
+    if max_age is None:
+        return None
+    return f"public, max-age={max_age}"
+
+
+def etag(generation: DataGeneration, scope: Scope, headers: Headers) -> str:
+    """Strong ETag of a GET request for the given data generation."""
+    representation = "ndjson" if NDJSON_MEDIA_TYPE in headers.get("accept", "") else ""
+    parts = (
+        generation.tag,
+        headers.get("host", ""),
+        scope["path"],
+        scope.get("query_string", b"").decode("latin-1"),
+        representation,
+    )
+    digest = hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def is_not_modified(
+    headers: Headers, response_etag: str, generation: DataGeneration
+) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present. The
+        # comparison is weak: compressed responses carry W/ ETags.
+        return response_etag in (
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        )
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= generation.last_modified
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class ConditionalRequestMiddleware:
+    """
+    Adds ETag, Last-Modified and Cache-Control to the successful GET
+    responses of the given routes, and answers matching conditional requests
+    with 304 Not Modified without calling the application.
+
+    Args:
+        routes: The routes handled, matched on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+        generation: Fixed data generation; defaults to data_generation().
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Iterable[BaseRoute],
+        prefix: str = "",
+        generation: DataGeneration | None = None,
+    ):
+        self.app = app
+        self.route_matcher = RouteMatcher(routes, prefix)
+        self.generation = generation
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        route_name = self.route_matcher.route_name(scope["path"])
+        control = cache_control(route_name) if route_name is not None else None
+        generation = self.generation or data_generation()
+        if control is None or generation is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        response_etag = etag(generation, scope, headers)
+        validators = {
+            "etag": response_etag,
+            "last-modified": generation.last_modified_header,
+            "cache-control": control,
+            "vary": "Accept",
+        }
+
+        if is_not_modified(headers, response_etag, generation):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (name.encode("latin-1"), value.encode("latin-1"))
+                        for name, value in validators.items()
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_validators(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                for name, value in validators.items():
+                    if name == "vary":
+                        response_headers.add_vary_header(value)
+                    else:
+                        response_headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -0,0 +1,137 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import datetime
+import decimal
+import json
+import math
+import uuid
+from typing import Any, Iterable, Iterator
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from api.request_phases import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types found in DB rows."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, decimal.Decimal):
+        return float(value) if value.is_finite() else None
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value: Any) -> Any:
+    """value with NaN and infinite floats replaced by None, as orjson does."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(content: Any) -> str:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    )
+
+
+@timed("json")
+def dumps(content: Any) -> bytes:
+    """
+    Serialise content to compact UTF-8 JSON. Uses orjson when it is installed;
+    the stdlib fallback produces the same bytes (same separators, no ASCII
+    escaping, ISO dates, UUIDs as strings, NaN and infinities as null).
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        return _stdlib_dumps(content).encode("utf-8")
+    except ValueError:
+        # Out of range floats: rare, so only then copy the content
+        return _stdlib_dumps(_finite(content)).encode("utf-8")
+
+
+class APIJSONResponse(JSONResponse):
+    """Default response class of the API, serialised with dumps()."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def render_json(content: Any) -> bytes:
+    """Serialise content exactly as the responses returned by the routes."""
+    return dumps(content)
+
+
+class PrerenderedJSONResponse(APIJSONResponse):
+    """
+    A JSON response whose content is already serialised (str or bytes), e.g.
+    a document read from a precomputed table or the Redis cache. The content
+    is sent as is.
+    """
+
+    def render(self, content: str | bytes) -> bytes:
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return content
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client opted in to a streamed NDJSON response."""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_lines(items: Iterable[Any]) -> Iterator[bytes]:
+    for item in items:
+        yield dumps(item) + b"\n"
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    Streams items as newline-delimited JSON while they are produced. Sync
+    iterators are consumed in the threadpool, so DB-backed iterators do not
+    block the event loop.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(self, items: Iterable[Any], status_code: int = 200, **kwargs):
+        super().__init__(
+            ndjson_lines(items),
+            status_code=status_code,
+            media_type=self.media_type,
+            **kwargs,
+        )
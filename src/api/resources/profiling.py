@@ -0,0 +1,249 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+On-demand profiling of a worker, for ENABLE_PROFILING deployments only.
+
+GET /debug/profile?seconds=N&mode=wall|cpu profiles the worker serving it
+for N seconds:
+
+- wall: samples the stacks of every thread each PROFILING_SAMPLE_INTERVAL
+  seconds, waits included, and returns a speedscope profile (open it at
+  https://www.speedscope.app) or, with format=collapsed, folded stacks for
+  flamegraph.pl.
+- cpu: runs cProfile on the event loop thread, timed with the thread's CPU
+  time, and returns a pstats dump (python -m pstats, snakeviz).
+
+A request sent with the PROFILING_HEADER header (value "text" or "pstats")
+is answered with the cProfile profile of its own processing instead of its
+response. The profile covers the event loop thread: the routes are async,
+but the sync ones run in the threadpool and only show as waits.
+
+Both need an "Authorization: Bearer <PROFILING_TOKEN>" header, and a worker
+runs one profile at a time. When ENABLE_PROFILING is off (the default),
+neither the route nor the middleware is installed.
+"""
+
+import asyncio
+import collections
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import (
+    PROFILING_HEADER,
+    PROFILING_MAX_SECONDS,
+    PROFILING_SAMPLE_INTERVAL,
+    PROFILING_TOKEN,
+    SERVICE_NAME,
+)
+from api.error_response import response_error_handler
+from api.resources.json_responses import APIJSONResponse
+
+router = APIRouter(tags=["debug"], prefix="/debug", include_in_schema=False)
+
+# One profile at a time per worker: cProfile cannot be nested
+_profiling = asyncio.Lock()
+
+# (function name, file name, first line)
+Frame = tuple[str, str, int]
+
+
+def is_authorized(headers: Headers) -> bool:
+    token = str(PROFILING_TOKEN)
+    scheme, _, credentials = headers.get("authorization", "").partition(" ")
+    return (
+        bool(token)
+        and scheme.lower() == "bearer"
+        and hmac.compare_digest(credentials.encode(), token.encode())
+    )
+
+
+def sample_stacks(
+    seconds: float, interval: float = PROFILING_SAMPLE_INTERVAL
+) -> tuple[collections.Counter, float]:
+    """
+    Sample the stacks of the other threads for `seconds`. Returns the count
+    of each (thread name, stack) and the average time between samples.
+    """
+    sampler = threading.get_ident()
+    samples: collections.Counter = collections.Counter()
+    start = time.perf_counter()
+    deadline = start + seconds
+    sweeps = 0
+    while time.perf_counter() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == sampler:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            samples[(thread_names.get(ident, str(ident)), tuple(stack))] += 1
+        sweeps += 1
+        time.sleep(interval)
+    return samples, (time.perf_counter() - start) / max(sweeps, 1)
+
+
+def speedscope_profile(samples: collections.Counter, weight: float) -> dict:
+    """The samples in the speedscope file format, one profile per thread."""
+    frames: dict[Frame, int] = {}
+    profiles: dict[str, dict] = {}
+    for (thread_name, stack), count in samples.items():
+        profile = profiles.setdefault(
+            thread_name,
+            {
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": [],
+            },
+        )
+        profile["samples"].append([frames.setdefault(f, len(frames)) for f in stack])
+        profile["weights"].append(count * weight)
+        profile["endValue"] += count * weight
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{SERVICE_NAME} (PID {os.getpid()})",
+        "exporter": SERVICE_NAME,
+        "shared": {
+            "frames": [
+                {"name": name, "file": file, "line": line}
+                for name, file, line in frames
+            ]
+        },
+        "profiles": list(profiles.values()),
+    }
+
+
+def collapsed_stacks(samples: collections.Counter) -> str:
+    """The samples as folded stacks ("thread;frame;frame count" lines)."""
+    lines = []
+    for (thread_name, stack), count in samples.items():
+        names = [
+            f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack
+        ]
+        lines.append(";".join([thread_name, *names]) + f" {count}")
+    return "\n".join(lines) + "\n"
+
+
+def profile_response(profiler: cProfile.Profile, output: str) -> Response:
+    if output == "pstats":
+        profiler.create_stats()
+        return Response(
+            marshal.dumps(profiler.stats),
+            media_type="application/octet-stream",
+            headers={"content-disposition": 'attachment; filename="profile.pstats"'},
+        )
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(60)
+    return PlainTextResponse(stream.getvalue())
+
+
+def busy_response(retry_after: int):
+    return response_error_handler(
+        {
+            "status": 503,
+            "details": "A profile is already running in this worker",
+            "retry_after": retry_after,
+        }
+    )
+
+
+@router.get("/profile", name="profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=PROFILING_MAX_SECONDS),
+    mode: Literal["wall", "cpu"] = "wall",
+    format: Literal["speedscope", "collapsed"] = "speedscope",
+):
+    if not is_authorized(request.headers):
+        return response_error_handler({"status": 403})
+    if _profiling.locked():
+        return busy_response(int(seconds))
+
+    async with _profiling:
+        if mode == "cpu":
+            profiler = cProfile.Profile(time.thread_time)
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+            return profile_response(profiler, "pstats")
+
+        samples, weight = await run_in_threadpool(sample_stacks, seconds)
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(samples))
+    return APIJSONResponse(speedscope_profile(samples, weight))
+
+
+class ProfilingMiddleware:
+    """
+    Answers the requests sent with the PROFILING_HEADER header with the
+    profile of their processing (see module doc).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        output = headers.get(PROFILING_HEADER) if headers is not None else None
+        if output is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not is_authorized(headers):
+            response = response_error_handler({"status": 403})
+        elif _profiling.locked():
+            response = busy_response(1)
+        else:
+            status_code = None
+
+            async def discard(message: Message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+
+            async with _profiling:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, discard)
+                finally:
+                    profiler.disable()
+            response = profile_response(profiler, output)
+            response.headers["x-profiled-status"] = str(status_code)
+        await response(scope, receive, send)
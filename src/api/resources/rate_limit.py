@@ -0,0 +1,356 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Per-client rate limiting of the routes that hit the DB on every call
+(/genomeid, /validate_location).
+
+Clients are identified by their API key header when it is one of
+RATE_LIMIT_API_KEYS, by their IP address otherwise. Behind proxies (the k8s
+ingress), the IP is the rightmost X-Forwarded-For address that is not one of
+RATE_LIMIT_TRUSTED_PROXIES: the addresses left of it are set by the client.
+Each (route, client) has a token bucket refilled at `rate` tokens per second
+up to `burst`, held in the worker: the decision never waits on the network.
+
+With RATE_LIMIT_REDIS_SYNC, workers also add up what each client consumed
+in Redis, in fixed windows of RATE_LIMIT_WINDOW seconds, in the background
+and at most every RATE_LIMIT_SYNC_INTERVAL seconds per client. A client over
+the cluster-wide allowance of the window (burst + rate * window) is then
+refused by every worker until the window ends. This is approximate: a
+client may exceed the allowance by up to a sync interval's worth of requests.
+
+Responses carry RateLimit-Limit, RateLimit-Remaining and RateLimit-Reset
+(IETF draft rate limit headers), plus Retry-After on 429.
+"""
+
+import asyncio
+import collections
+import hashlib
+import ipaddress
+import logging
+import math
+import time
+from typing import Callable, Iterable, NamedTuple
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import (
+    RATE_LIMIT_API_KEY_HEADER,
+    RATE_LIMIT_API_KEYS,
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_REDIS_SYNC,
+    RATE_LIMIT_ROUTES,
+    RATE_LIMIT_SYNC_INTERVAL,
+    RATE_LIMIT_TRUSTED_PROXIES,
+    RATE_LIMIT_WINDOW,
+)
+from api.error_response import response_error_handler
+from api.resources.redis import redis_client as cache_redis_client
+from api.resources.route_matching import RouteMatcher
+
+logger = logging.getLogger("rate_limit")
+
+RATE_LIMITED = Counter(
+    "rate_limited", "Requests refused with a 429", ["route", "reason"]
+)
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is full again (or the client is unblocked)
+    reset: int
+    # Seconds until the next token, when refused
+    retry_after: int = 0
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(self.retry_after, 1))
+        return headers
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated", "unsynced", "synced", "blocked_until")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        # Requests not yet added to the Redis window counter
+        self.unsynced = 0
+        self.synced = float("-inf")
+        self.blocked_until = 0.0
+
+
+def parse_rate_limits(values: Iterable[str]) -> dict[str, tuple[float, int]]:
+    """Parse "route=rate/burst" items; burst defaults to the rate."""
+    rate_limits = {}
+    for value in values:
+        route_name, _, limits = value.strip().partition("=")
+        rate, _, burst = limits.partition("/")
+        rate_limits[route_name.strip()] = (
+            float(rate),
+            int(burst) if burst else max(math.ceil(float(rate)), 1),
+        )
+    return rate_limits
+
+
+class RateLimiter:
+    """
+    Token buckets of the clients of one route.
+
+    Args:
+        route_name: Used in the Redis keys and metrics.
+        rate: Tokens (requests) per second.
+        burst: Bucket size.
+        redis_client: Client to sync window counters with; None to keep the
+            limit per worker.
+        max_clients: Buckets kept; the least recently used are dropped.
+        clock: Seconds, monotonic for the buckets.
+    """
+
+    def __init__(
+        self,
+        route_name: str,
+        rate: float,
+        burst: int,
+        redis_client=None,
+        sync_interval: float = RATE_LIMIT_SYNC_INTERVAL,
+        window: int = RATE_LIMIT_WINDOW,
+        max_clients: int = RATE_LIMIT_MAX_CLIENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.route_name = route_name
+        self.rate = rate
+        self.burst = burst
+        self.redis_client = redis_client
+        self.sync_interval = sync_interval
+        self.window = window
+        self.window_allowance = burst + rate * window
+        self.max_clients = max_clients
+        self.clock = clock
+        self.buckets: collections.OrderedDict[str, TokenBucket] = (
+            collections.OrderedDict()
+        )
+        self._sync_tasks: set[asyncio.Task] = set()
+
+    def _bucket(self, client: str, now: float) -> TokenBucket:
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            bucket = self.buckets[client] = TokenBucket(self.burst, now)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client)
+            elapsed = now - bucket.updated
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate)
+            bucket.updated = now
+        return bucket
+
+    def hit(self, client: str) -> RateLimitDecision:
+        """Take a token from the client's bucket, if it has one."""
+        now = self.clock()
+        bucket = self._bucket(client, now)
+
+        if bucket.blocked_until > now:
+            RATE_LIMITED.labels(self.route_name, "cluster").inc()
+            reset = math.ceil(bucket.blocked_until - now)
+            return RateLimitDecision(False, self.burst, 0, reset, reset)
+
+        allowed = bucket.tokens >= 1
+        if allowed:
+            bucket.tokens -= 1
+            bucket.unsynced += 1
+            if self.redis_client is not None:
+                self._schedule_sync(client, bucket, now)
+        else:
+            RATE_LIMITED.labels(self.route_name, "local").inc()
+        reset = math.ceil((self.burst - bucket.tokens) / self.rate)
+        retry_after = 0 if allowed else math.ceil((1 - bucket.tokens) / self.rate)
+        return RateLimitDecision(
+            allowed, self.burst, int(bucket.tokens), reset, retry_after
+        )
+
+    def _schedule_sync(self, client: str, bucket: TokenBucket, now: float):
+        if now - bucket.synced < self.sync_interval:
+            return
+        bucket.synced = now
+        count, bucket.unsynced = bucket.unsynced, 0
+        # In the background: the request does not wait for Redis
+        task = asyncio.get_running_loop().create_task(self._sync(client, bucket, count))
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_tasks.discard)
+
+    async def _sync(self, client: str, bucket: TokenBucket, count: int):
+        wall_time = time.time()
+        window_index = int(wall_time // self.window)
+        key = f"rate_limit:{self.route_name}:{client}:{window_index}"
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.incrby(key, count)
+                pipe.expire(key, self.window * 2)
+                total, _ = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Rate limit sync failed for '{key}': {e}")
+            return
+        if total > self.window_allowance:
+            window_left = (window_index + 1) * self.window - wall_time
+            bucket.blocked_until = self.clock() + window_left
+
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+def parse_networks(values: Iterable[str]) -> list[Network]:
+    """Parse addresses and CIDR ranges, e.g. "10.0.0.0/8"."""
+    return [
+        ipaddress.ip_network(value.strip(), strict=False)
+        for value in values
+        if value.strip()
+    ]
+
+
+def is_trusted(address: str, trusted_proxies: list[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_ip(scope: Scope, headers: Headers, trusted_proxies: list[Network]) -> str:
+    """
+    The peer address of a request or, when the peer is a trusted proxy, the
+    rightmost X-Forwarded-For address that is not a trusted proxy. Each proxy
+    appends the address it received the request from; anything left of the
+    first untrusted one comes from the client and is ignored.
+    """
+    client = scope.get("client")
+    address = client[0] if client else "unknown"
+    if not is_trusted(address, trusted_proxies):
+        return address
+    hops = [
+        hop.strip()
+        for value in headers.getlist("x-forwarded-for")
+        for hop in value.split(",")
+    ]
+    for hop in reversed(hops):
+        address = hop
+        if not is_trusted(hop, trusted_proxies):
+            break
+    return address
+
+
+def client_id(
+    scope: Scope,
+    headers: Headers,
+    api_keys: frozenset[str] = frozenset(),
+    trusted_proxies: list[Network] | None = None,
+) -> str:
+    """
+    The API key of a request if it is one of api_keys, its client IP
+    otherwise: a key nobody issued must not buy a fresh bucket.
+    """
+    api_key = headers.get(RATE_LIMIT_API_KEY_HEADER)
+    if api_key and api_key in api_keys:
+        # Not the key itself in bucket and Redis key names
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return "ip:" + client_ip(scope, headers, trusted_proxies or [])
+
+
+class RateLimitMiddleware:
+    """
+    Applies a RateLimiter per client to the GET requests of the given routes
+    listed in rate_limits, answering 429 Too Many Requests when the client's
+    bucket is empty.
+
+    Args:
+        routes: The routes, matched on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+        rate_limits: {route name: (rate, burst)}; defaults to RATE_LIMIT_ROUTES.
+        redis_client: Set to sync the limits across workers; defaults to the
+            redis_cache client with RATE_LIMIT_REDIS_SYNC.
+        api_keys: Keys identifying a client; defaults to RATE_LIMIT_API_KEYS.
+        trusted_proxies: Addresses or CIDR ranges of the proxies whose
+            X-Forwarded-For is read; defaults to RATE_LIMIT_TRUSTED_PROXIES.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Iterable[BaseRoute],
+        prefix: str = "",
+        rate_limits: dict[str, tuple[float, int]] | None = None,
+        redis_client=None,
+        api_keys: Iterable[str] | None = None,
+        trusted_proxies: Iterable[str] | None = None,
+    ):
+        self.app = app
+        self.route_matcher = RouteMatcher(routes, prefix)
+        self.api_keys = frozenset(
+            key.strip()
+            for key in (RATE_LIMIT_API_KEYS if api_keys is None else api_keys)
+            if key.strip()
+        )
+        self.trusted_proxies = parse_networks(
+            RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+        )
+        if rate_limits is None:
+            rate_limits = parse_rate_limits(RATE_LIMIT_ROUTES)
+        if redis_client is None and RATE_LIMIT_REDIS_SYNC:
+            redis_client = cache_redis_client
+        self.limiters = {
+            route_name: RateLimiter(route_name, rate, burst, redis_client)
+            for route_name, (rate, burst) in rate_limits.items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limiter = None
+        if scope["type"] == "http":
+            route_name = self.route_matcher.route_name(scope["path"])
+            limiter = self.limiters.get(route_name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_id(
+            scope, Headers(scope=scope), self.api_keys, self.trusted_proxies
+        )
+        decision = limiter.hit(client)
+        if not decision.allowed:
+            response = response_error_handler(
+                {
+                    "status": 429,
+                    "details": f"Rate limit exceeded for {limiter.route_name}",
+                    "headers": decision.headers(),
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(decision.headers())
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -17,15 +17,36 @@ limitations under the License.
 
 import redis.asyncio as redis
 
-import ujson as json
+import asyncio
 import logging
 from functools import wraps
 from fastapi.responses import JSONResponse
+from time import perf_counter
 from typing import Callable, Awaitable, Any, Optional
 
+from prometheus_client import Counter, Gauge, Histogram
 from redis.asyncio import ConnectionPool
+from starlette.concurrency import run_in_threadpool
 
-from api.config import REDIS_HOST, REDIS_PORT, ENABLE_REDIS_CACHE, REDIS_MAX_CONNECTION
+from api.config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    ENABLE_REDIS_CACHE,
+    REDIS_MAX_CONNECTION,
+    ENABLE_COMPRESSION,
+    COMPRESSION_MIN_SIZE,
+)
+from api.request_phases import phase
+from api.tracing import set_span_attributes, span
+from api.resources.admission import call_admitted
+from api.resources.compression import (
+    compress,
+    encoding_headers,
+    negotiate,
+    variant_key,
+)
+from api.resources.json_responses import PrerenderedJSONResponse, wants_ndjson
+from api.resources.response_bundle import get_bundled_response
 
 logger = logging.getLogger("redis_cache")
 logger.setLevel(logging.INFO)
@@ -34,13 +55,138 @@ logger.setLevel(logging.INFO)
 redis_pool = ConnectionPool.from_url(
     f"redis://{REDIS_HOST}:{REDIS_PORT}",
     max_connections=int(REDIS_MAX_CONNECTION),
-    decode_responses=True,
+    # Cached values are response bodies (JSON or compressed) sent as is
+    decode_responses=False,
 )
 
 redis_client = redis.Redis(connection_pool=redis_pool)
 
+CACHE_HITS = Counter(
+    "redis_cache_hits", "Responses served from cache", ["key_prefix", "source"]
+)
+CACHE_MISSES = Counter("redis_cache_misses", "Cache lookups missed", ["key_prefix"])
+CACHE_SETS = Counter("redis_cache_sets", "Responses cached", ["key_prefix"])
+CACHE_ERRORS = Counter(
+    "redis_cache_errors", "Failed Redis commands", ["key_prefix", "operation"]
+)
+CACHE_BYPASSES = Counter(
+    "redis_cache_bypasses", "Calls not looked up in cache", ["key_prefix", "reason"]
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_cache_command_seconds",
+    "Latency of the Redis commands of redis_cache",
+    ["command", "key_prefix"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+PAYLOAD_BYTES = Histogram(
+    "redis_cache_payload_bytes",
+    "Size of the cached bodies, by content coding",
+    ["key_prefix", "encoding"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+
+def pool_connections(attribute: str) -> int:
+    """Count the connections redis_pool keeps in one of its private collections.
+
+    redis-py does not expose pool usage publicly, so a release that renames
+    these attributes reads as 0 instead of failing the /metrics scrape.
+    """
+    return len(getattr(redis_pool, attribute, ()))
+
+
+POOL_IN_USE = Gauge("redis_pool_in_use_connections", "Redis connections in use")
+POOL_IN_USE.set_function(lambda: pool_connections("_in_use_connections"))
+POOL_IDLE = Gauge("redis_pool_idle_connections", "Redis connections available")
+POOL_IDLE.set_function(lambda: pool_connections("_available_connections"))
+POOL_MAX = Gauge("redis_pool_max_connections", "Redis connection pool size")
+POOL_MAX.set(redis_pool.max_connections)
+
+
+def cache_key(key_prefix: str, arg_keys: Optional[list[str]], kwargs: dict) -> str:
+    """Build the cache key of a route call: prefix + arg values (if any)"""
+    values = [str(kwargs.get(k, "null")) for k in arg_keys or []]
+    if not values:
+        return key_prefix
+    separator = "\x00"
+    return key_prefix + separator + separator.join(values)
+
+
+async def timed_command(command: str, key_prefix: str, awaitable: Awaitable[Any]):
+    start = perf_counter()
+    try:
+        return await awaitable
+    finally:
+        REDIS_COMMAND_SECONDS.labels(command, key_prefix).observe(
+            perf_counter() - start
+        )
+
+
+async def cache_response(
+    key_prefix: str, key: str, ttl: int, body: bytes, encoding: str | None = None
+):
+    """
+    Cache body under key with, when the request accepted one, its `encoding`
+    compressed variant, in a single round trip. The variants in the other
+    codings are compressed on their first HIT instead (fill_variant).
+    """
+    variants = {"identity": (key, body)}
+    # Compress once here rather than on every HIT
+    if encoding is not None and len(body) >= COMPRESSION_MIN_SIZE:
+        variants[encoding] = (
+            variant_key(key, encoding),
+            compress(body, encoding, cached=True),
+        )
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for variant, variant_body in variants.values():
+            pipe.setex(variant, ttl, variant_body)
+        await timed_command("setex", key_prefix, pipe.execute())
+    for encoding, (_, variant_body) in variants.items():
+        PAYLOAD_BYTES.labels(key_prefix, encoding).observe(len(variant_body))
+    CACHE_SETS.labels(key_prefix).inc()
+
+
+# Background fills of compressed variants, by variant key
+_fill_tasks: dict[str, asyncio.Task] = {}
+
 
-def redis_cache(key_prefix: str, arg_keys: Optional[list[str]] = None, ttl: int = 300):
+async def fill_variant(key_prefix: str, key: str, encoding: str, body: bytes):
+    """
+    Cache the `encoding` variant of the body cached under key, until the
+    body expires. Runs after the HIT was served, and compresses in a thread.
+    """
+    try:
+        variant_body = await run_in_threadpool(compress, body, encoding, True)
+        ttl = await timed_command("pttl", key_prefix, redis_client.pttl(key))
+        # The body expired (-2) or has no TTL (-1, not set by cache_response)
+        if ttl > 0:
+            await timed_command(
+                "psetex",
+                key_prefix,
+                redis_client.psetex(variant_key(key, encoding), ttl, variant_body),
+            )
+            PAYLOAD_BYTES.labels(key_prefix, encoding).observe(len(variant_body))
+    except Exception as e:
+        CACHE_ERRORS.labels(key_prefix, "fill").inc()
+        logger.error(f"Redis cache error for key '{key}' ({encoding}): {e}")
+
+
+def schedule_fill_variant(key_prefix: str, key: str, encoding: str, body: bytes):
+    fill_key = variant_key(key, encoding)
+    if fill_key in _fill_tasks:
+        return
+    task = asyncio.get_running_loop().create_task(
+        fill_variant(key_prefix, key, encoding, body)
+    )
+    _fill_tasks[fill_key] = task
+    task.add_done_callback(lambda _: _fill_tasks.pop(fill_key, None))
+
+
+def redis_cache(
+    key_prefix: str,
+    arg_keys: Optional[list[str]] = None,
+    ttl: int = 300,
+):
     """
     A decorator to cache the output of a FastAPI route handler using Redis,
     with dynamic key generation based on route args.
@@ -60,49 +206,121 @@ def redis_cache(key_prefix: str, arg_keys: Optional[list[str]] = None, ttl: int
     """
 
     def decorator(func: Callable[..., Awaitable[Any]]):
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            # Build dynamic key: prefix + arg values (if any)
-            if arg_keys:
-                separator = "\x00"
-                arg_values = [str(kwargs.get(k, "null")) for k in arg_keys]
-                full_key = key_prefix + separator + separator.join(arg_values)
-            else:
-                full_key = key_prefix
+        async def cached_call(*args, **kwargs):
+            # Streamed NDJSON responses are neither cached nor served from cache
+            request = kwargs.get("request")
+            if request is not None and wants_ndjson(request):
+                CACHE_BYPASSES.labels(key_prefix, "ndjson").inc()
+                set_span_attributes({"cache.hit": False, "cache.bypass": "ndjson"})
+                return await call_admitted(func, *args, **kwargs)
+
+            full_key = cache_key(key_prefix, arg_keys, kwargs)
+            # decode full_key for debugging purposes
+            safe_key = full_key.replace("\x00", ":")
+            set_span_attributes({"cache.key": safe_key})
+
+            # Compressed variants are served when the client accepts one
+            encoding = None
+            if ENABLE_COMPRESSION and request is not None:
+                encoding = negotiate(request.headers.get("accept-encoding", ""))
+
+            # Responses exported to the static bundle need neither Redis nor the DB
+            with phase("cache"):
+                bundled_variant = None
+                if encoding is not None:
+                    bundled_variant = get_bundled_response(
+                        variant_key(full_key, encoding)
+                    )
+                bundled_response = (
+                    get_bundled_response(full_key) if bundled_variant is None else None
+                )
+            if bundled_variant is not None or bundled_response is not None:
+                CACHE_HITS.labels(key_prefix, "bundle").inc()
+                set_span_attributes({"cache.hit": True, "cache.source": "bundle"})
+            if bundled_variant is not None:
+                return PrerenderedJSONResponse(
+                    bundled_variant, headers=encoding_headers(encoding)
+                )
+            if bundled_response is not None:
+                return PrerenderedJSONResponse(bundled_response)
 
             if not ENABLE_REDIS_CACHE:
+                CACHE_BYPASSES.labels(key_prefix, "disabled").inc()
+                set_span_attributes({"cache.hit": False, "cache.bypass": "disabled"})
                 logger.debug("Caching DISABLED — calling %s directly.", func.__name__)
-                return await func(*args, **kwargs)
+                return await call_admitted(func, *args, **kwargs)
 
             try:
-                # decode full_key for debugging purposes
-                safe_key = full_key.replace("\x00", ":")
-
-                # Attempt to retrieve cached response
-                cached_value = await redis_client.get(full_key)
+                # Attempt to retrieve cached response, and its compressed
+                # variant when the client accepts one.
+                cached_variant = None
+                with phase("cache"):
+                    if encoding is None:
+                        cached_value = await timed_command(
+                            "get", key_prefix, redis_client.get(full_key)
+                        )
+                    else:
+                        cached_variant, cached_value = await timed_command(
+                            "mget",
+                            key_prefix,
+                            redis_client.mget(
+                                variant_key(full_key, encoding), full_key
+                            ),
+                        )
+                if cached_variant is not None or cached_value is not None:
+                    CACHE_HITS.labels(key_prefix, "redis").inc()
+                    set_span_attributes({"cache.hit": True, "cache.source": "redis"})
+                if cached_variant is not None:
+                    logger.debug("Cache HIT for key: %s (%s)", safe_key, encoding)
+                    return PrerenderedJSONResponse(
+                        cached_variant, headers=encoding_headers(encoding)
+                    )
                 if cached_value is not None:
                     logger.debug("Cache HIT for key: %s", safe_key)
-                    return JSONResponse(content=json.loads(cached_value))
+                    if encoding is not None and len(cached_value) >= (
+                        COMPRESSION_MIN_SIZE
+                    ):
+                        schedule_fill_variant(
+                            key_prefix, full_key, encoding, cached_value
+                        )
+                    # The cached value is the body rendered on the MISS below;
+                    # send it as is rather than decoding and re-encoding it.
+                    return PrerenderedJSONResponse(cached_value)
 
-                logger.debug("Cache MISS for key: %s", safe_key)
-                result = await func(*args, **kwargs)
+            # /!\ Fallback to normal execution in case there is an issue connecting to redis
+            except Exception as e:
+                CACHE_ERRORS.labels(key_prefix, "get").inc()
+                set_span_attributes({"cache.hit": False, "cache.error": str(e)})
+                logger.error(f"Redis cache error for key '{full_key}': {e}")
+                return await call_admitted(func, *args, **kwargs)
 
-                if isinstance(result, JSONResponse):
-                    content = (
-                        result.body.decode()
-                        if hasattr(result.body, "decode")
-                        else result.body
-                    )
-                    await redis_client.setex(full_key, ttl, content)
+            CACHE_MISSES.labels(key_prefix).inc()
+            set_span_attributes({"cache.hit": False})
+            logger.debug("Cache MISS for key: %s", safe_key)
+            result = await call_admitted(func, *args, **kwargs)
+
+            if isinstance(result, JSONResponse):
+                try:
+                    with phase("cache"):
+                        await cache_response(
+                            key_prefix, full_key, ttl, result.body, encoding
+                        )
                     logger.debug("Cache SET for key: %s (TTL: %s s)", safe_key, ttl)
+                except Exception as e:
+                    # The response is served anyway; only caching it failed
+                    CACHE_ERRORS.labels(key_prefix, "set").inc()
+                    logger.error(f"Redis cache error for key '{full_key}': {e}")
 
-                return result
+            return result
 
-            # /!\ Fallback to normal execution in case there is an issue connecting to redis
-            except Exception as e:
-                logger.error(f"Redis cache error for key '{full_key}': {e}")
-                return await func(*args, **kwargs)
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(f"redis_cache {key_prefix}"):
+                return await cached_call(*args, **kwargs)
 
+        # Used by api.tools.export_response_bundle to rebuild the keys
+        wrapper.cache_key_prefix = key_prefix
+        wrapper.cache_arg_keys = arg_keys
         return wrapper
 
     return decorator
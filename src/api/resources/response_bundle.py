@@ -0,0 +1,164 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Read-only bundle of prerendered responses, written by
+`python -m api.tools.export_response_bundle` and served by `redis_cache`
+before Redis and the DB are consulted.
+
+File layout:
+
+    MAGIC (8 bytes) | index offset (8 bytes, little endian) | bodies | index
+
+The index is JSON: {"metadata": {...}, "entries": {cache key: [offset, length]}}.
+Bodies are content addressed: identical responses are stored once and the
+offsets are relative to the start of the bodies section. The file is memory
+mapped, so workers share the pages and only the responses requested are read.
+
+The metadata holds the data generation (api.resources.http_cache) of the DB
+the responses were rendered from; a bundle of another generation is not
+loaded, so a bundle left behind by a DB swap is never served.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from typing import Iterable
+
+logger = logging.getLogger("response_bundle")
+
+MAGIC = b"EWMRB002"
+_HEADER = struct.Struct("<8sQ")
+
+
+class ResponseBundle:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as bundle_file:
+            self._mmap = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a response bundle")
+        index = json.loads(self._mmap[index_offset:])
+        self.metadata = index["metadata"]
+        self._entries = index["entries"]
+        self._data_start = _HEADER.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> bytes | None:
+        """The stored response body for a cache key, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return self._mmap[start : start + length]
+
+    def close(self):
+        self._mmap.close()
+
+
+def write_response_bundle(
+    path: str, responses: Iterable[tuple[str, bytes]], metadata: dict | None = None
+) -> int:
+    """
+    Write (cache key, response body) pairs to a bundle file, atomically
+    replacing any existing file. Returns the number of keys written.
+
+    Each body is written as it is produced: only the index (keys, offsets
+    and body digests) is held in memory.
+    """
+    entries = {}
+    offsets_by_digest = {}
+    data_length = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as bundle_file:
+        # The index offset is only known once the bodies are written
+        bundle_file.write(_HEADER.pack(MAGIC, 0))
+        for key, body in responses:
+            digest = hashlib.sha256(body).digest()
+            if digest not in offsets_by_digest:
+                offsets_by_digest[digest] = data_length
+                bundle_file.write(body)
+                data_length += len(body)
+            entries[key] = [offsets_by_digest[digest], len(body)]
+
+        bundle_file.write(
+            json.dumps(
+                {"metadata": metadata or {}, "entries": entries},
+                separators=(",", ":"),
+            ).encode("utf-8")
+        )
+        bundle_file.seek(0)
+        bundle_file.write(_HEADER.pack(MAGIC, _HEADER.size + data_length))
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+_response_bundle: ResponseBundle | None = None
+
+
+def open_response_bundle(path: str, data_generation: str | None):
+    """
+    Open the bundle served to requests, if it was rendered from the
+    data_generation currently served. A missing/invalid/stale file is logged.
+    """
+    global _response_bundle
+    close_response_bundle()
+    try:
+        bundle = ResponseBundle(path)
+    except (OSError, ValueError) as ex:
+        logger.warning("Response bundle %s not loaded: %s", path, ex)
+        return
+    bundle_generation = bundle.metadata.get("data_generation")
+    if bundle_generation != data_generation:
+        bundle.close()
+        logger.warning(
+            "Response bundle %s not loaded: rendered from data generation %s, "
+            "serving %s; export it again",
+            path,
+            bundle_generation,
+            data_generation,
+        )
+        return
+    _response_bundle = bundle
+    logger.info(
+        "Response bundle %s loaded: %d responses %s",
+        path,
+        len(_response_bundle),
+        _response_bundle.metadata,
+    )
+
+
+def close_response_bundle():
+    global _response_bundle
+    if _response_bundle is not None:
+        _response_bundle.close()
+    _response_bundle = None
+
+
+def get_bundled_response(key: str) -> bytes | None:
+    if _response_bundle is None:
+        return None
+    return _response_bundle.get(key)
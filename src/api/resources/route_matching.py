@@ -0,0 +1,53 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Iterable
+
+from starlette.routing import BaseRoute
+
+
+class RouteMatcher:
+    """
+    Finds the GET route a request path is for, before the request is routed,
+    so that middleware can apply per-route policies without running the
+    application.
+
+    Args:
+        routes: The routes to match, on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+    """
+
+    def __init__(self, routes: Iterable[BaseRoute], prefix: str = ""):
+        self.routes = [
+            route
+            for route in routes
+            if hasattr(route, "path_regex") and "GET" in getattr(route, "methods", ())
+        ]
+        self.prefix = prefix
+
+    def match(self, path: str) -> BaseRoute | None:
+        if not path.startswith(self.prefix):
+            return None
+        route_path = path[len(self.prefix) :]
+        for route in self.routes:
+            if route.path_regex.match(route_path):
+                return route
+        return None
+
+    def route_name(self, path: str) -> str | None:
+        route = self.match(path)
+        return route.name if route is not None else None
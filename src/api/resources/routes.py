@@ -15,6 +15,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import itertools
 import logging
 
 from typing import Annotated, Any
@@ -23,26 +24,31 @@ from fastapi import Request, responses, Query, Path, Depends
 
 from pydantic import ValidationError
 
+from api.config import GENOME_STATS_FROM_SQL, TRUSTED_HOSTS
 from api.error_response import response_error_handler
+from api.schemas import serializers
 from api.schemas.checksums import Checksum
-from api.schemas.ftplinks import FTPLinks
 from api.schemas.genome import (
-    BriefGenomeDetails,
-    GenomeDetails,
-    DatasetAttributes,
     GenomeByKeyword,
-    Release,
-    GenomeGroupsResponse,
-    GenomesInGroupResponse,
     GenomeCountsResponse,
     GenomeGroupCategoriesResponse,
 )
-from api.schemas.karyotype import Karyotype
-from api.schemas.popular_species import PopularSpeciesGroup
+from api.schemas.popular_species import popular_species_group
 from api.schemas.region_validation import RegionValidation
-from api.schemas.statistics import GenomeStatistics, ExampleObjectList
+from api.schemas.statistics import (
+    ExampleObjectList,
+    genome_stats_document,
+    genome_stats_document_from_values,
+)
 from api.schemas.vep import VepFilePaths
 
+from api.resources.json_responses import (
+    APIJSONResponse,
+    NDJSONResponse,
+    PrerenderedJSONResponse,
+    wants_ndjson,
+)
+from api.resources.hosts import normalise_host
 from api.resources.redis import redis_cache
 from api.dependencies import Dependencies
 
@@ -56,9 +62,19 @@ ReleaseAdaptorDep = Annotated[ReleaseAdaptor, Depends(Dependencies.get_release_a
 MetaAdaptorDep = Annotated[MetaAdaptor, Depends(Dependencies.get_meta_adaptor)]
 
 
+def request_host(request: Request) -> str | None:
+    """The request host if well formed and in TRUSTED_HOSTS, otherwise None."""
+    return normalise_host(request.headers.get("host"), TRUSTED_HOSTS)
+
+
+HostDep = Annotated[str | None, Depends(request_host)]
+
+
 from fastapi import APIRouter
 
-router = APIRouter(tags=["metadata"], prefix="/metadata")
+router = APIRouter(
+    tags=["metadata"], prefix="/metadata", default_response_class=APIJSONResponse
+)
 
 logger = logging.getLogger("routes")
 logger.info("Starting up")
@@ -87,13 +103,25 @@ from api.models.logic import (
 @router.get("/genome/{genome_uuid}/stats", name="statistics")
 @redis_cache("stats", arg_keys=["genome_uuid"])
 async def get_metadata_statistics(
-    adaptor: GenomeAdaptorDep, request: Request, genome_uuid: str
+    adaptor: GenomeAdaptorDep,
+    meta_adaptor: MetaAdaptorDep,
+    request: Request,
+    genome_uuid: str,
 ):
     try:
-        top_level_stats = get_top_level_statistics_by_uuid(adaptor, genome_uuid)
-        genome_stats = GenomeStatistics(_raw_data=top_level_stats)
-        logger.debug(genome_stats.model_dump())
-        return responses.JSONResponse({"genome_stats": genome_stats.model_dump()})
+        # Point lookup in the table built by api.tools.build_genome_stats
+        prebuilt_document = meta_adaptor.fetch_genome_stats_document(genome_uuid)
+        if prebuilt_document is not None:
+            return PrerenderedJSONResponse(prebuilt_document)
+
+        if GENOME_STATS_FROM_SQL:
+            statistic_values = meta_adaptor.fetch_genome_statistics(genome_uuid)
+            stats_document = genome_stats_document_from_values(statistic_values)
+        else:
+            top_level_stats = get_top_level_statistics_by_uuid(adaptor, genome_uuid)
+            stats_document = genome_stats_document(top_level_stats)
+        logger.debug(stats_document)
+        return APIJSONResponse(stats_document)
     except Exception as e:
         logger.error(e)
         return response_error_handler({"status": 500})
@@ -102,18 +130,20 @@ async def get_metadata_statistics(
 @router.get("/genome/{genome_uuid}/karyotype", name="karyotype")
 @redis_cache("karyotype", arg_keys=["genome_uuid"])
 async def get_genome_karyotype(
-    adaptor: GenomeAdaptorDep, request: Request, genome_uuid: str
+    adaptor: GenomeAdaptorDep,
+    meta_adaptor: MetaAdaptorDep,
+    request: Request,
+    genome_uuid: str,
 ):
     try:
-        top_level_regions = get_top_level_regions(adaptor, genome_uuid)
+        top_level_regions = get_top_level_regions(adaptor, genome_uuid, meta_adaptor)
 
         # Temporary hack for e.coli and remov when the correct schema/data is available in metadata-database
         if genome_uuid == "a73351f7-93e7-11ec-a39d-005056b38ce3":
             for tlr in top_level_regions:
                 tlr["is_circular"] = True
-        karyotype_response = Karyotype(top_level_regions=top_level_regions)
-        return responses.JSONResponse(
-            karyotype_response.model_dump()["top_level_regions"]
+        return APIJSONResponse(
+            [serializers.region(region) for region in top_level_regions]
         )
     except Exception as e:
         logger.error(e)
@@ -124,30 +154,32 @@ async def get_genome_karyotype(
 @redis_cache("top_regions", arg_keys=["genome_uuid"])
 async def get_genome_top_regions(
     adaptor: GenomeAdaptorDep,
+    meta_adaptor: MetaAdaptorDep,
     request: Request,
     genome_uuid: str,
 ):
     try:
-        top_regions = get_top_regions(adaptor, genome_uuid)
-        top_regions_response = Karyotype(top_level_regions=top_regions)
-        return responses.JSONResponse(
-            top_regions_response.model_dump()["top_level_regions"]
-        )
+        top_regions = get_top_regions(adaptor, genome_uuid, meta_adaptor=meta_adaptor)
+        return APIJSONResponse([serializers.region(region) for region in top_regions])
     except Exception as e:
         logger.error(e)
         return response_error_handler({"status": 500})
 
 
 @router.get("/popular_species", name="popular_species")
-@redis_cache(key_prefix="popular_species")  # TTL defaults is 5 minutes
-async def get_popular_species(adaptor: GenomeAdaptorDep, request: Request):
+# Image URLs are built on the request host, so cache one payload per host.
+# The host is validated first: the key and the URLs only see allowed hosts.
+@redis_cache(key_prefix="popular_species", arg_keys=["host"])
+async def get_popular_species(
+    adaptor: GenomeAdaptorDep, request: Request, host: HostDep
+):
+    if host is None:
+        return response_error_handler({"status": 400, "details": "Invalid host"})
     try:
         popular_species_dict = get_organisms_group_count(adaptor, None)
         popular_species = popular_species_dict["organisms_group_count"]
-        popular_species_response = PopularSpeciesGroup(
-            _base_url=request.headers["host"], popular_species=popular_species
-        )
-        return responses.JSONResponse(popular_species_response.model_dump())
+        popular_species_response = popular_species_group(host, popular_species)
+        return APIJSONResponse(popular_species_response.model_dump())
     except Exception as e:
         logging.error(e)
         return response_error_handler({"status": 500})
@@ -160,7 +192,7 @@ def validate_region(
     try:
         rgv = RegionValidation(genome_uuid=genome_id, location_input=location)
         rgv.validate_region(adaptor)
-        return responses.JSONResponse(rgv.model_dump())
+        return APIJSONResponse(rgv.model_dump())
     except Exception as e:
         logger.error(e)
         return response_error_handler({"status": 500})
@@ -173,7 +205,7 @@ async def example_objects(adaptor: GenomeAdaptorDep, request: Request, genome_id
         attributes_info = get_attributes_by_genome_uuid(adaptor, genome_id, None)
         if attributes_info:
             genome_attributes_info = ExampleObjectList(**attributes_info)
-            response_data = responses.JSONResponse(
+            response_data = APIJSONResponse(
                 genome_attributes_info.model_dump()["example_objects"]
             )
         else:
@@ -198,13 +230,8 @@ async def get_genome_details(
         genome_details_dict = get_genome_by_uuid(adaptor, genome_uuid, None)
 
         if genome_details_dict:
-            genome_details = GenomeDetails(**genome_details_dict)
-            response_data = responses.JSONResponse(
-                genome_details.model_dump(
-                    exclude={
-                        "release": {"is_current"},
-                    }
-                )
+            response_data = APIJSONResponse(
+                serializers.genome_details(genome_details_dict)
             )
         else:
             return response_error_handler(
@@ -235,8 +262,7 @@ async def get_genome_ftplinks(
             if link["dataset_type"] != "regulation"
         ]
 
-        ftplinks = FTPLinks(**ftplinks_no_regulation)
-        return responses.JSONResponse(ftplinks.model_dump().get("links", []))
+        return APIJSONResponse(serializers.ftp_links(ftplinks_no_regulation))
     except Exception as ex:
         logger.error(ex)
         return response_error_handler({"status": 500})
@@ -252,38 +278,8 @@ async def explain_genome(
             adaptor, genome_id_or_accession, None
         )
         if genome_details_dict:
-            genome_details = BriefGenomeDetails(**genome_details_dict)
-            response_dict = genome_details.model_dump(
-                include={
-                    "genome_id": True,
-                    "genome_tag": True,
-                    "scientific_name": True,
-                    "species_taxonomy_id": True,
-                    "common_name": True,
-                    "is_reference": True,
-                    "assembly": {"name", "accession_id"},
-                    "release": {"name", "type"},
-                    "type": True,
-                    "is_suppressed": True,
-                    "suppression_details": True,
-                    "latest_genome": {
-                        "genome_id": True,
-                        "genome_tag": True,
-                        "scientific_name": True,
-                        "species_taxonomy_id": True,
-                        "common_name": True,
-                        "is_reference": True,
-                        "assembly": {"name", "accession_id"},
-                        "release": {"name", "type"},
-                        "type": True,
-                        "is_suppressed": True,
-                        "suppression_details": True,
-                    },
-                }
-            )
-            if response_dict.get("latest_genome") is None:
-                response_dict.pop("latest_genome", None)
-            response_data = responses.JSONResponse(response_dict, status_code=200)
+            response_dict = serializers.explain_genome(genome_details_dict)
+            response_data = APIJSONResponse(response_dict, status_code=200)
         else:
             return response_error_handler(
                 {"status": 404, "details": f"Could not explain {genome_id_or_accession}"}
@@ -330,15 +326,14 @@ async def get_genome_dataset_attributes(
             adaptor, genome_uuid, dataset_type, attribute_names
         )
         if not dataset_attributes or len(dataset_attributes.get("attributes", [])) == 0:
-            return responses.JSONResponse(
+            return APIJSONResponse(
                 {
                     "message": f"Could not find details for genome {genome_uuid} and dataset {dataset_type}."
                 },
                 status_code=404,
             )
-        dataset_attributes_object = DatasetAttributes(**dataset_attributes)
-        response_data = responses.JSONResponse(
-            dataset_attributes_object.model_dump(), status_code=200
+        response_data = APIJSONResponse(
+            serializers.dataset_attributes(dataset_attributes), status_code=200
         )
         return response_data
 
@@ -373,7 +368,7 @@ async def get_genome_by_keyword(
             ):
                 best_genome_by_keyword_object = genome_by_keyword_object
         if best_genome_by_keyword_object.genome_uuid:
-            return responses.JSONResponse(best_genome_by_keyword_object.model_dump())
+            return APIJSONResponse(best_genome_by_keyword_object.model_dump())
         else:
             logger.error(f"Assembly accession id {assembly_accession_id} not found")
             return response_error_handler({"status": 404})
@@ -392,13 +387,13 @@ async def get_vep_file_paths(
     try:
         vep_file_paths = get_vep_paths_by_uuid(adaptor, genome_uuid)
         if not vep_file_paths:
-            return responses.JSONResponse(
+            return APIJSONResponse(
                 {"message": f"Could not find VEP file paths for genome {genome_uuid}."},
                 status_code=404,
             )
 
         vep_file_paths_object = VepFilePaths(**vep_file_paths)
-        return responses.JSONResponse(
+        return APIJSONResponse(
             vep_file_paths_object.model_dump(), status_code=200
         )
 
@@ -423,24 +418,22 @@ async def get_releases(
             current_only=current_only,
         )
 
-        releases_list = []
-        for release_msg in releases_stream:
-            release = Release(**release_msg)
-            releases_list.append(release)
-
-        if releases_list:
-            # Serialize each release into the desired format
-            response_list = []
-            for release in releases_list:
-                response_dict = release.model_dump(
-                    include={
-                        "name": True,
-                        "type": True,
-                        "is_current": True,
-                    }
+        if wants_ndjson(request):
+            first_release = next(releases_stream, None)
+            if first_release is None:
+                return response_error_handler(
+                    {"status": 404, "details": "No releases found matching criteria"}
                 )
-                response_list.append(response_dict)
-            response_data = responses.JSONResponse(response_list, status_code=200)
+            return NDJSONResponse(
+                serializers.release(release_msg)
+                for release_msg in itertools.chain([first_release], releases_stream)
+            )
+
+        response_list = [
+            serializers.release(release_msg) for release_msg in releases_stream
+        ]
+        if response_list:
+            response_data = APIJSONResponse(response_list, status_code=200)
         else:
             return response_error_handler(
                 {"status": 404, "details": "No releases found matching criteria"}
@@ -448,7 +441,7 @@ async def get_releases(
     except Exception as e:
         logger.error(e)
         error_response = {"message": f"An error occurred: {str(e)}"}
-        response_data = responses.JSONResponse(error_response, status_code=500)
+        response_data = APIJSONResponse(error_response, status_code=500)
 
     return response_data
 
@@ -467,9 +460,13 @@ async def get_genome_groups(
             adaptor, group_type, release
         )
         logger.debug(f"genome_groups_dict: {genome_groups_dict}")
-        genome_groups = GenomeGroupsResponse(**genome_groups_dict)
-        response_dict = genome_groups.model_dump()
-        return responses.JSONResponse(response_dict, status_code=200)
+        response_dict = {
+            "genome_groups": [
+                serializers.genome_group(group)
+                for group in genome_groups_dict["genome_groups"]
+            ]
+        }
+        return APIJSONResponse(response_dict, status_code=200)
     except ValueError as ex:
         logger.warning("Invalid request in get_genome_groups: %s", ex)
         return response_error_handler({"status": 400, "details": str(ex)})
@@ -482,6 +479,7 @@ async def get_genome_groups(
 @redis_cache("genomes_in_group", arg_keys=["group_id", "release"])
 async def get_genomes_in_group(
     adaptor: GenomeAdaptorDep,
+    request: Request,
     group_id: str = Path(..., description="Group ID, e.g. 'grch38-group'"),
     release: str | None = Query(
         None, description="Optional release label, e.g. '2025-02'"
@@ -495,9 +493,13 @@ async def get_genomes_in_group(
                 {"status": 404, "details": "No genomes found in specified group"}
             )
 
-        genomes_in_group = GenomesInGroupResponse(**genomes_in_group_dict)
-        response_dict = genomes_in_group.model_dump()
-        return responses.JSONResponse(response_dict, status_code=200)
+        response_dict = {
+            "genomes": [
+                serializers.base_genome_details(genome)
+                for genome in genomes_in_group_dict["genomes"]
+            ]
+        }
+        return APIJSONResponse(response_dict, status_code=200)
     except Exception as ex:
         logger.exception("Error in get_genomes_in_group")
         return response_error_handler({"status": 500})
@@ -514,7 +516,7 @@ async def get_genome_counts(
     try:
         genome_counts_dict = data_get_genome_counts(adaptor, release)
         genome_counts = GenomeCountsResponse(**genome_counts_dict)
-        response_data = responses.JSONResponse(
+        response_data = APIJSONResponse(
             genome_counts.model_dump(), status_code=200
         )
         return response_data
@@ -532,7 +534,7 @@ async def get_genome_group_categories(
         group_dict = data_genome_group_categories(adaptor)
         logger.debug(f"group_dict: {group_dict}")
         genome_group_categories = GenomeGroupCategoriesResponse(**group_dict)
-        response_data = responses.JSONResponse(
+        response_data = APIJSONResponse(
             genome_group_categories.model_dump(), status_code=200
         )
         return response_data
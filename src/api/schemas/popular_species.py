@@ -12,12 +12,17 @@
    limitations under the License.
 """
 
-from pydantic import BaseModel, Field, AliasChoices, validator
-from typing import ClassVar
+from pydantic import (
+    AliasChoices,
+    BaseModel,
+    Field,
+    ValidationInfo,
+    field_validator,
+    validator,
+)
 
 
 class PopularSpecies(BaseModel):
-    _base_url: str = ClassVar[str]
     species_taxonomy_id: str = Field(alias="species_taxonomy_id")
     name: str = Field(
         alias="commonName",
@@ -26,9 +31,13 @@ class PopularSpecies(BaseModel):
     image: str = Field(alias="species_taxonomy_id")
     genomes_count: int = Field(alias="count")
 
-    @validator("image", pre=True)
-    def generate_image_url(cls, v) -> str:
-        return "//{}/static/genome_images/{}.svg".format(cls._base_url, v)
+    @field_validator("image", mode="before")
+    @classmethod
+    def generate_image_url(cls, v, info: ValidationInfo) -> str:
+        # The host is passed in the validation context (see
+        # popular_species_group), never stored on the class, so concurrent
+        # requests for different hosts cannot see each other's host.
+        return "//{}/static/genome_images/{}.svg".format(info.context["base_url"], v)
 
     @validator("species_taxonomy_id", pre=True)
     def concert_int_to_str(cls, value):
@@ -36,9 +45,11 @@ class PopularSpecies(BaseModel):
 
 
 class PopularSpeciesGroup(BaseModel):
-    _base_url: str
     popular_species: list[PopularSpecies]
 
-    def __init__(self, **data):
-        PopularSpecies._base_url = data["_base_url"]
-        super().__init__(**data)
+
+def popular_species_group(base_url: str, popular_species: list) -> PopularSpeciesGroup:
+    """Popular species with image URLs on base_url (the request host)."""
+    return PopularSpeciesGroup.model_validate(
+        {"popular_species": popular_species}, context={"base_url": base_url}
+    )
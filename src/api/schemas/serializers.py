@@ -0,0 +1,258 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Response serializers for the dicts built by api.models.logic.
+
+The logic functions build these dicts from DB rows themselves, so validating
+them again through the Pydantic schemas (alias paths, before-validators,
+custom __init__ hooks) only costs CPU. Each function below maps a trusted
+dict straight to the payload the matching schema would dump, field for field
+and in the same order.
+
+The schemas remain the reference: with VALIDATE_RESPONSES set every function
+goes through its schema instead, and each function's `validated` attribute
+is the schema path, which the tests compare against.
+"""
+
+import functools
+from typing import Any, Callable
+
+from api.config import ASSEMBLY_URLS, FTP_BASE_URL, VALIDATE_RESPONSES
+from api.request_phases import timed
+from api.schemas.ftplinks import FTPLinks
+from api.schemas.genome import (
+    AlignmentViewerGenomeGroup,
+    BaseGenomeDetails,
+    BriefGenomeDetails,
+    DatasetAttribute,
+    DatasetAttributes,
+    GenomeDetails,
+    Release,
+)
+from api.schemas.karyotype import Region
+
+EXPLAIN_FIELDS = {
+    "genome_id": True,
+    "genome_tag": True,
+    "scientific_name": True,
+    "species_taxonomy_id": True,
+    "common_name": True,
+    "is_reference": True,
+    "assembly": {"name", "accession_id"},
+    "release": {"name", "type"},
+    "type": True,
+    "is_suppressed": True,
+    "suppression_details": True,
+}
+
+
+def validated_by(validate: Callable[[Any], Any]):
+    """
+    Use validate (the schema path) instead of the decorated serializer when
+    VALIDATE_RESPONSES is set, and expose it as the serializer's `validated`.
+    """
+
+    def decorator(serialize):
+        @functools.wraps(serialize)
+        @timed("validation")
+        def wrapper(data):
+            if VALIDATE_RESPONSES:
+                return validate(data)
+            return serialize(data)
+
+        wrapper.validated = validate
+        return wrapper
+
+    return decorator
+
+
+@validated_by(lambda data: Region(**data).model_dump())
+def region(data: dict) -> dict:
+    return {
+        "name": data["name"],
+        "type": data.get("type", "chromosome"),
+        "length": int(data["length"]),
+        "is_circular": bool(data.get("is_circular", False)),
+    }
+
+
+def _assembly_url(accession: str | None) -> str | None:
+    if accession is None:
+        return None
+    if accession.startswith("GCA"):
+        return ASSEMBLY_URLS["GCA"] + accession
+    if accession.startswith("GCF"):
+        return ASSEMBLY_URLS["GCF"] + accession
+    return None
+
+
+def _genome_type(data: dict, organism: dict) -> dict | None:
+    if "type" in data:
+        genome_type = data["type"]
+    else:
+        strain_type = organism.get("strain_type")
+        strain = organism.get("strain")
+        if strain_type is None or strain is None:
+            return None
+        genome_type = {"kind": strain_type, "value": strain}
+    if genome_type is None:
+        return None
+    return {"kind": genome_type["kind"], "value": genome_type["value"] or None}
+
+
+def _base_genome_details(data: dict) -> dict:
+    organism = data.get("organism") or {}
+    assembly = data["assembly"]
+    release = data["release"]
+    if "genome_tag" in data:
+        genome_tag = data["genome_tag"]
+    elif release.get("release_type") == "partial":
+        genome_tag = None
+    else:
+        genome_tag = assembly.get("accession")
+    return {
+        "genome_id": data["genome_uuid"],
+        "genome_tag": genome_tag,
+        "common_name": organism.get("common_name"),
+        "scientific_name": organism["scientific_name"],
+        "species_taxonomy_id": str(organism["species_taxonomy_id"]),
+        "type": _genome_type(data, organism),
+        "is_reference": bool(assembly.get("is_reference", False)),
+        "is_suppressed": bool(data.get("is_suppressed", False)),
+        "suppression_details": data.get("suppression_details"),
+        "assembly": {
+            "accession_id": assembly["accession"],
+            "name": assembly["name"],
+            "url": _assembly_url(assembly["accession"]),
+        },
+        "release": {
+            "name": release["release_label"],
+            "type": release["release_type"],
+            "is_current": bool(release.get("is_current", False)),
+        },
+    }
+
+
+@validated_by(lambda data: BaseGenomeDetails(**data).model_dump())
+def base_genome_details(data: dict) -> dict:
+    return _base_genome_details(data)
+
+
+def _provider(attributes_info: dict, prefix: str) -> dict | None:
+    name = attributes_info.get(f"{prefix}_provider_name")
+    if not name:
+        return None
+    return {"name": name, "url": attributes_info.get(f"{prefix}_provider_url") or None}
+
+
+@validated_by(
+    lambda data: GenomeDetails(**data).model_dump(exclude={"release": {"is_current"}})
+)
+def genome_details(data: dict) -> dict:
+    """Payload of /genome/{uuid}/details."""
+    attributes_info = data.get("attributes_info", {})
+    genome = _base_genome_details(data)
+    del genome["release"]["is_current"]
+    if "genebuild_provider_version" in attributes_info:
+        annotation_version = attributes_info["genebuild_provider_version"]
+    else:
+        annotation_version = attributes_info.get("genebuild_version")
+    genome.update(
+        {
+            "taxonomy_id": str(data["organism"]["taxonomy_id"]),
+            "assembly_provider": _provider(attributes_info, "assembly"),
+            "assembly_level": attributes_info["assembly_level"],
+            "assembly_date": attributes_info.get("assembly_date"),
+            "annotation_provider": _provider(attributes_info, "genebuild"),
+            "annotation_method": attributes_info.get("genebuild_method_display"),
+            "annotation_version": annotation_version,
+            "annotation_date": attributes_info.get("genebuild_last_geneset_update"),
+            "number_of_genomes_in_group": int(data.get("related_assemblies_count", 1)),
+        }
+    )
+    return genome
+
+
+def _validated_explain(data: dict) -> dict:
+    response_dict = BriefGenomeDetails(**data).model_dump(
+        include={**EXPLAIN_FIELDS, "latest_genome": EXPLAIN_FIELDS}
+    )
+    if response_dict.get("latest_genome") is None:
+        response_dict.pop("latest_genome", None)
+    return response_dict
+
+
+def _explained(data: dict) -> dict:
+    genome = _base_genome_details(data)
+    del genome["assembly"]["url"]
+    del genome["release"]["is_current"]
+    return genome
+
+
+@validated_by(_validated_explain)
+def explain_genome(data: dict) -> dict:
+    """Payload of /genome/{id}/explain; latest_genome only when there is one."""
+    genome = _explained(data)
+    if data.get("latest_genome") is not None:
+        genome["latest_genome"] = _explained(data["latest_genome"])
+    return genome
+
+
+@validated_by(
+    lambda data: Release(**data).model_dump(
+        include={"name": True, "type": True, "is_current": True}
+    )
+)
+def release(data: dict) -> dict:
+    return {
+        "name": data["release_label"],
+        "type": data["release_type"],
+        "is_current": bool(data.get("is_current", False)),
+    }
+
+
+@validated_by(lambda data: DatasetAttribute(**data).model_dump())
+def dataset_attribute(data: dict) -> dict:
+    return {
+        "name": data["attribute_name"],
+        "value": data.get("attribute_value"),
+        "version": data["dataset_version"],
+        "uuid": data["dataset_uuid"],
+        "type": data["dataset_type"],
+    }
+
+
+@validated_by(lambda data: DatasetAttributes(**data).model_dump())
+def dataset_attributes(data: dict) -> dict:
+    return {
+        "attributes": [dataset_attribute(item) for item in data["attributes"]],
+        "release_version": float(data["release_version"]),
+    }
+
+
+@validated_by(lambda data: FTPLinks(**data).model_dump()["links"])
+def ftp_links(data: dict) -> list[dict]:
+    return [
+        {"dataset": link["dataset_type"], "url": f"{FTP_BASE_URL}{link['path']}"}
+        for link in data["links"]
+    ]
+
+
+@validated_by(lambda data: AlignmentViewerGenomeGroup(**data).model_dump())
+def genome_group(data: dict) -> dict:
+    return {
+        "id": data["group_id"],
+        "type": data["group_type"],
+        "name": data.get("group_name"),
+        "reference_genome": base_genome_details(data["reference_genome"]),
+    }
@@ -487,20 +487,24 @@ class GenomeStatistics(BaseModel):
     regulation_stats: Regulation
 
     def __init__(self, **data):
-        data["_compiled_data"] = {}
-        try:
-            for stats_item in data["_raw_data"]:
-                try:
-                    data["_compiled_data"][stats_item["name"]] = stats_item.get(
-                        "statistic_value", None
-                    )
-                except KeyError as ke:
-                    logging.error(
-                        "Statistic is missing a required field: %s",
-                        ke,
-                    )
-        except Exception as ex:
-            logging.error("Failed to compile statistics: %s", ex)
+        # _compiled_data ({statistic name: value}) can be passed directly when
+        # the statistics were already aggregated, e.g. by
+        # MetaAdaptor.fetch_genome_statistics.
+        if data.get("_compiled_data") is None:
+            data["_compiled_data"] = {}
+            try:
+                for stats_item in data["_raw_data"]:
+                    try:
+                        data["_compiled_data"][stats_item["name"]] = stats_item.get(
+                            "statistic_value", None
+                        )
+                    except KeyError as ke:
+                        logging.error(
+                            "Statistic is missing a required field: %s",
+                            ke,
+                        )
+            except Exception as ex:
+                logging.error("Failed to compile statistics: %s", ex)
         data["assembly_stats"] = data["_compiled_data"]
         data["coding_stats"] = data["_compiled_data"]
         data["variation_stats"] = data["_compiled_data"]
@@ -512,6 +516,25 @@ class GenomeStatistics(BaseModel):
         super().__init__(**data)
 
 
+def genome_stats_document(top_level_stats: list | None) -> dict:
+    """
+    Build the /genome/{uuid}/stats payload from the statistics returned by
+    api.models.logic.get_top_level_statistics_by_uuid. Shared by the endpoint
+    and the offline genome_stats_document build so both produce the same JSON.
+    """
+    genome_stats = GenomeStatistics(_raw_data=top_level_stats)
+    return {"genome_stats": genome_stats.model_dump()}
+
+
+def genome_stats_document_from_values(statistic_values: dict) -> dict:
+    """
+    Same as genome_stats_document, from statistic values already keyed by
+    name (MetaAdaptor.fetch_genome_statistics).
+    """
+    genome_stats = GenomeStatistics(_compiled_data=statistic_values)
+    return {"genome_stats": genome_stats.model_dump()}
+
+
 class ExampleObject(BaseModel):
     type: str
     id: str
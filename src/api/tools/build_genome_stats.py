@@ -0,0 +1,173 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Build (or verify) the genome_stats_document table, which holds the final
+/genome/{uuid}/stats response of every genome so the endpoint becomes a
+point lookup.
+
+The documents are rendered by the same code as the live endpoint. Run after
+loading a new metadata DB, on a writable copy:
+
+    python -m api.tools.build_genome_stats --db-url duckdb:///./data/duck_meta.db
+    python -m api.tools.build_genome_stats --db-url duckdb:///./data/duck_meta.db --verify
+"""
+
+import argparse
+import logging
+import sys
+
+from ensembl.production.metadata.api.adaptors import GenomeAdaptor
+from ensembl.utils.database import DBConnection
+from sqlalchemy import bindparam, text
+
+from api.config import DB_URL
+from api.models.logic import get_top_level_statistics_by_uuid
+from api.models.meta_adaptor import GenomeStatsDocument
+from api.resources.json_responses import render_json
+from api.schemas.statistics import genome_stats_document
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = GenomeStatsDocument.__tablename__
+
+
+def render_genome_stats(genome_adaptor, genome_uuid: str) -> str:
+    """Render the /stats response body of a genome through the live code path."""
+    top_level_stats = get_top_level_statistics_by_uuid(genome_adaptor, genome_uuid)
+    return render_json(genome_stats_document(top_level_stats)).decode("utf-8")
+
+
+def fetch_genome_uuids(db_conn: DBConnection) -> list[str]:
+    with db_conn.connect() as conn:
+        return list(
+            conn.execute(text("SELECT genome_uuid FROM genome ORDER BY genome_uuid"))
+            .scalars()
+            .all()
+        )
+
+
+def build(
+    db_conn: DBConnection,
+    genome_adaptor,
+    genome_uuids: list[str],
+    prune: bool = False,
+) -> int:
+    """Store one document per given genome, replacing their previous ones.
+
+    The table is created if missing; documents of other genomes are kept
+    unless prune is set, which deletes every row not in genome_uuids (for a
+    full build). Returns the number of documents written.
+    """
+    rows = []
+    for genome_uuid in genome_uuids:
+        rows.append(
+            {
+                "genome_uuid": genome_uuid,
+                "document": render_genome_stats(genome_adaptor, genome_uuid),
+            }
+        )
+
+    with db_conn.begin() as conn:
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} "
+                "(genome_uuid VARCHAR PRIMARY KEY, document VARCHAR NOT NULL)"
+            )
+        )
+        if prune:
+            conn.execute(text(f"DELETE FROM {TABLE_NAME}"))
+        elif genome_uuids:
+            conn.execute(
+                text(
+                    f"DELETE FROM {TABLE_NAME} WHERE genome_uuid IN :genome_uuids"
+                ).bindparams(bindparam("genome_uuids", expanding=True)),
+                {"genome_uuids": list(genome_uuids)},
+            )
+        if rows:
+            conn.execute(
+                text(
+                    f"INSERT INTO {TABLE_NAME} (genome_uuid, document) "
+                    "VALUES (:genome_uuid, :document)"
+                ),
+                rows,
+            )
+    return len(rows)
+
+
+def verify(db_conn: DBConnection, genome_adaptor) -> list[str]:
+    """Compare the stored documents with the live code path.
+
+    Returns the UUIDs of genomes whose stored document differs, of current
+    genomes with no stored document, and of stored documents whose genome is
+    gone.
+    """
+    with db_conn.connect() as conn:
+        stored = dict(
+            conn.execute(text(f"SELECT genome_uuid, document FROM {TABLE_NAME}")).all()
+        )
+
+    mismatches = []
+    for genome_uuid in fetch_genome_uuids(db_conn):
+        document = stored.pop(genome_uuid, None)
+        if document is None:
+            logger.error("No stored stats document for %s", genome_uuid)
+            mismatches.append(genome_uuid)
+        elif render_genome_stats(genome_adaptor, genome_uuid) != document:
+            logger.error("Stored stats document differs for %s", genome_uuid)
+            mismatches.append(genome_uuid)
+    for genome_uuid in sorted(stored):
+        logger.error("Stored stats document for unknown genome %s", genome_uuid)
+        mismatches.append(genome_uuid)
+    return mismatches
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[-2])
+    parser.add_argument("--db-url", default=DB_URL, help="Writable metadata DB URL")
+    parser.add_argument(
+        "--genome",
+        action="append",
+        dest="genome_uuids",
+        help="Only rebuild this genome, keeping the other documents (repeatable)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the stored documents against the live code path",
+    )
+    args = parser.parse_args(argv)
+
+    db_conn = DBConnection(args.db_url, reflect=False, lazy_reflect=True)
+    genome_adaptor = GenomeAdaptor(db_conn, db_conn)
+    try:
+        if args.verify:
+            mismatches = verify(db_conn, genome_adaptor)
+            logger.info("%d stats documents differ", len(mismatches))
+            return 1 if mismatches else 0
+
+        if args.genome_uuids:
+            count = build(db_conn, genome_adaptor, args.genome_uuids)
+        else:
+            genome_uuids = fetch_genome_uuids(db_conn)
+            count = build(db_conn, genome_adaptor, genome_uuids, prune=True)
+        logger.info("Stored %d stats documents in %s", count, TABLE_NAME)
+        return 0
+    finally:
+        db_conn.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Compare a run of the route benchmarks (see benchmarks/README.md) with a
+recorded baseline, and fail when a benchmark got slower than the threshold
+allows. Both files are pytest-benchmark JSON outputs:
+
+    python -m api.tools.compare_benchmarks benchmarks/baselines/ci.json current.json
+    python -m api.tools.compare_benchmarks baseline.json current.json --threshold 0.25
+
+Exits with 1 on regressions, and with 2 when the runs used different
+fixture DBs (their timings are not comparable).
+"""
+
+import argparse
+import json
+import sys
+from typing import NamedTuple
+
+STATS = ("min", "median", "mean", "max")
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        """Relative change of the current timing, e.g. 0.1 for 10% slower."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+def load_run(path: str) -> dict:
+    with open(path, encoding="utf-8") as run_file:
+        return json.load(run_file)
+
+
+def timings(run: dict, stat: str) -> dict[str, float]:
+    """Seconds per benchmark name, for the given statistic."""
+    return {bench["name"]: bench["stats"][stat] for bench in run["benchmarks"]}
+
+
+def compare(
+    baseline: dict[str, float],
+    current: dict[str, float],
+    threshold: float = 0.1,
+    min_delta: float = 0.0,
+) -> list[Comparison]:
+    """
+    Compare the benchmarks found in both runs. A benchmark regressed when it
+    is more than `threshold` slower, relatively, and `min_delta` seconds
+    slower: a 50% change of a 20µs cache hit is usually noise.
+    """
+    comparisons = []
+    for name in sorted(baseline.keys() & current.keys()):
+        delta = current[name] - baseline[name]
+        regressed = delta > min_delta and delta > baseline[name] * threshold
+        comparisons.append(Comparison(name, baseline[name], current[name], regressed))
+    return comparisons
+
+
+def fixture_id(run: dict) -> str | None:
+    """The checksum of the fixture DB file, or the synthetic DB parameters."""
+    return (run.get("fixture_db") or {}).get("id")
+
+
+def format_report(comparisons: list[Comparison], stat: str) -> str:
+    width = max((len(c.name) for c in comparisons), default=10)
+    lines = [f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  change"]
+    for c in comparisons:
+        lines.append(
+            f"{c.name:<{width}}  {c.baseline * 1000:>8.3f}ms  "
+            f"{c.current * 1000:>8.3f}ms  {c.change:+7.1%}"
+            + ("  REGRESSION" if c.regressed else "")
+        )
+    lines.append(f"({stat} per benchmark)")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare route benchmark runs")
+    parser.add_argument("baseline", help="Baseline pytest-benchmark JSON")
+    parser.add_argument("current", help="pytest-benchmark JSON to check")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown tolerated (default: 0.1, i.e. 10%%)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.0005,
+        help="Slowdown in seconds below which nothing regresses (default: 0.0005)",
+    )
+    parser.add_argument("--stat", choices=STATS, default="median")
+    parser.add_argument(
+        "--ignore-fixture",
+        action="store_true",
+        help="Compare even if the runs used different fixture DBs",
+    )
+    args = parser.parse_args(argv)
+
+    baseline_run = load_run(args.baseline)
+    current_run = load_run(args.current)
+    if not args.ignore_fixture and fixture_id(baseline_run) != fixture_id(current_run):
+        print(
+            "The runs used different fixture DBs; re-record the baseline "
+            "or pass --ignore-fixture",
+            file=sys.stderr,
+        )
+        return 2
+
+    baseline = timings(baseline_run, args.stat)
+    current = timings(current_run, args.stat)
+    comparisons = compare(baseline, current, args.threshold, args.min_delta)
+    print(format_report(comparisons, args.stat))
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"Missing from current run: {name}")
+    for name in sorted(current.keys() - baseline.keys()):
+        print(f"Not in baseline: {name}")
+
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(
+            f"{len(regressions)} of {len(comparisons)} benchmarks regressed "
+            f"by more than {args.threshold:.0%}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Render every cacheable response for every current genome, plus the global
+endpoints, into a response bundle (see api.resources.response_bundle).
+
+The responses are produced by the application itself with the Redis cache
+disabled, so the bundle holds exactly what the live API returns for the
+metadata DB in DB_URL. With ENABLE_COMPRESSION, like redis_cache, the bundle
+also holds a compressed variant of each large enough body per available
+coding, so bundle hits are not compressed again. The bodies are written to the file as they are
+rendered.
+
+The bundle records the data generation of the DB file (its size and mtime,
+and the API version), and the API only loads a bundle of the generation it
+serves: export it from the DB file the API will open, again whenever the DB
+is replaced or the API upgraded,
+
+    python -m api.tools.export_response_bundle --output /data/responses.bundle
+
+and point RESPONSE_BUNDLE_PATH at it.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+import api.resources.redis as redis_resource
+from api.config import COMPRESSION_MIN_SIZE, DB_URL, ENABLE_COMPRESSION, VERSION
+from api.dependencies import Dependencies
+from api.main import app
+from api.resources.compression import ENCODERS, compress, variant_key
+from api.resources.http_cache import data_generation_tag
+from api.resources.redis import cache_key
+from api.resources.response_bundle import write_response_bundle
+from api.resources.routes import router
+
+logger = logging.getLogger(__name__)
+
+# Cached routes with one response per current genome, and the name of their
+# genome path parameter.
+GENOME_ROUTES = {
+    "statistics": "genome_uuid",
+    "karyotype": "genome_uuid",
+    "top_regions": "genome_uuid",
+    "example_objects": "genome_id",
+    "genome_details": "genome_uuid",
+    "genome_ftplinks": "genome_uuid",
+    "genome_explain": "genome_id_or_accession",
+}
+
+# popular_species is not exported: its image URLs are built from the request
+# host, so one stored body cannot serve every host.
+
+
+def global_requests(meta_adaptor) -> list[tuple[str, dict]]:
+    """(route name, handler kwargs) of the responses shared by all genomes."""
+    requests = [
+        ("get_releases", {"release_name": None, "current_only": False}),
+        ("get_releases", {"release_name": None, "current_only": True}),
+        ("genome_counts", {"release": None}),
+        ("genome_group_categories", {}),
+        ("genome_groups", {"group_type": "structural_variant", "release": None}),
+    ]
+    for group in meta_adaptor.fetch_genome_groups():
+        requests.append(
+            (
+                "genomes_in_group",
+                {"group_id": str(group["genome_group_id"]), "release": None},
+            )
+        )
+    return requests
+
+
+def genome_requests(genome_uuids: list[str]) -> list[tuple[str, dict]]:
+    return [
+        (route_name, {param: genome_uuid})
+        for genome_uuid in genome_uuids
+        for route_name, param in GENOME_ROUTES.items()
+    ]
+
+
+def request_url(route: APIRoute, kwargs: dict) -> str:
+    path_param_names = {param.name for param in route.dependant.path_params}
+    path_params = {k: v for k, v in kwargs.items() if k in path_param_names}
+    query_params = {
+        k: str(v).lower() if isinstance(v, bool) else v
+        for k, v in kwargs.items()
+        if k not in path_param_names and v is not None
+    }
+    url = app.url_path_for(route.name, **path_params)
+    if query_params:
+        url += "?" + urlencode(query_params, doseq=True)
+    return url
+
+
+def render_responses(client: TestClient, requests: list[tuple[str, dict]]):
+    """Yield (cache key, body) for every request answered with a 200."""
+    routes = {
+        route.name: route for route in router.routes if isinstance(route, APIRoute)
+    }
+    for route_name, kwargs in requests:
+        route = routes[route_name]
+        url = request_url(route, kwargs)
+        response = client.get(url)
+        if response.status_code != 200:
+            logger.warning("Skipping %s: HTTP %d", url, response.status_code)
+            continue
+        endpoint = route.endpoint
+        yield cache_key(
+            endpoint.cache_key_prefix, endpoint.cache_arg_keys, kwargs
+        ), response.content
+
+
+def with_compressed_variants(responses):
+    """
+    Yield the (cache key, body) pairs followed, for bodies of at least
+    COMPRESSION_MIN_SIZE bytes, by their compressed variants as redis_cache
+    stores them.
+    """
+    for key, body in responses:
+        yield key, body
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            for encoding in ENCODERS:
+                yield variant_key(key, encoding), compress(body, encoding, cached=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export a response bundle")
+    parser.add_argument("--output", required=True, help="Bundle file to write")
+    parser.add_argument(
+        "--genome",
+        action="append",
+        dest="genome_uuids",
+        help="Only export this genome (repeatable). Default: all current genomes",
+    )
+    args = parser.parse_args(argv)
+
+    # Render from the DB, never from a possibly stale Redis entry.
+    redis_resource.ENABLE_REDIS_CACHE = False
+
+    start = time.perf_counter()
+    meta_adaptor = Dependencies.get_meta_adaptor()
+    genome_uuids = args.genome_uuids or meta_adaptor.fetch_current_genome_uuids()
+    requests = global_requests(meta_adaptor) + genome_requests(genome_uuids)
+
+    client = TestClient(app)
+    metadata = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "db_url": DB_URL,
+        "data_generation": data_generation_tag(),
+        "version": VERSION,
+        "genomes": len(genome_uuids),
+        "encodings": list(ENCODERS) if ENABLE_COMPRESSION else [],
+    }
+    responses = render_responses(client, requests)
+    if ENABLE_COMPRESSION:
+        responses = with_compressed_variants(responses)
+    count = write_response_bundle(args.output, responses, metadata)
+    logger.info(
+        "Wrote %d entries for %d requests to %s in %.1fs",
+        count,
+        len(requests),
+        args.output,
+        time.perf_counter() - start,
+    )
+    Dependencies.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,812 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Write a synthetic metadata DuckDB, at a chosen scale, for scaling tests and
+the route benchmarks (benchmarks/README.md):
+
+    python -m api.tools.generate_metadata_db --output data/synthetic.db --scale large
+    python -m api.tools.generate_metadata_db --output data/synthetic.db --genomes 50000 --max-sequences-per-assembly 500000
+
+The tables are created from the ensembl-metadata-api models, so the schema
+is that of the installed version, plus the tables the API adds (genome
+groups, genome_taxonomy_counts, NCBI taxonomy). The rows are generated in
+DuckDB from the scale and the seed only, so two runs write the same data.
+
+Every genome is released with datasets of the first `datasets_per_genome`
+types (assembly, genebuild, variation...), each with all the attributes the
+API reads plus synthetic ones up to `attributes_per_dataset`. Assemblies
+have `sequences_per_assembly` sequences (up to 24 of them chromosomes),
+and one in a hundred, genome 1 included, has `max_sequences_per_assembly`.
+sample_ids() gives the identifiers of genome 1, to build requests with.
+
+The karyotype, top regions and stats tables are not generated: the API
+computes those responses from the rows above, unless sql/020 and
+api.tools.build_genome_stats are run on the output.
+"""
+
+import argparse
+import hashlib
+import inspect
+import logging
+import os
+import sys
+import time
+from typing import NamedTuple
+
+from ensembl.production.metadata.api.models import Genome, ReleaseStatus
+from ensembl.utils.database import DBConnection
+from pydantic import AliasChoices, BaseModel
+from sqlalchemy import BigInteger, Column, Integer, MetaData, String, literal, text
+from sqlalchemy.orm import DeclarativeBase
+
+import api.schemas.statistics as statistics
+from api.models.meta_adaptor import GenomeGroup, GenomeGroupMember, GenomeTaxonomyCounts
+
+logger = logging.getLogger(__name__)
+
+# Part of the fixture id of the benchmarks: bump when the generated data change
+GENERATOR_VERSION = 1
+
+
+class Scale(NamedTuple):
+    genomes: int
+    datasets_per_genome: int
+    attributes_per_dataset: int
+    sequences_per_assembly: int
+    max_sequences_per_assembly: int
+    releases: int
+    groups: int
+    genomes_per_group: int
+
+
+SCALES = {
+    # A few seconds to generate, for tests
+    "small": Scale(200, 4, 10, 30, 300, 3, 4, 20),
+    # Roughly the current metadata DB
+    "current": Scale(4500, 5, 20, 150, 20000, 6, 20, 200),
+    "large": Scale(50000, 6, 30, 400, 500000, 12, 200, 1000),
+}
+
+DATASET_TYPES = [
+    "assembly",
+    "genebuild",
+    "variation",
+    "regulatory_features",
+    "homologies",
+    "vep",
+]
+
+# Prefix of the attribute names read from the datasets of each type
+ATTRIBUTE_PREFIXES = {
+    "assembly": "assembly",
+    "genebuild": "genebuild",
+    "variation": "variation",
+    "regulatory_features": "regulation",
+    "homologies": "compara",
+    "vep": "vep",
+}
+
+# Attributes with a value format; the others are integers
+FIXED_VALUES = {
+    "assembly.level": "chromosome",
+    "assembly.date": "2013-12",
+    "assembly.provider_name": "Synthetic Genome Consortium",
+    "assembly.provider_url": "https://www.ncbi.nlm.nih.gov/assembly",
+    "genebuild.last_geneset_update": "2024-11",
+    "genebuild.method": "full_genebuild",
+    "genebuild.method_display": "Ensembl Genebuild",
+    "genebuild.provider_name": "Ensembl",
+    "genebuild.provider_url": "https://www.ensembl.org",
+    "genebuild.provider_version": "ENS01",
+    "genebuild.sample_gene": "SYNG00000000001",
+    "genebuild.sample_location": "1:100000-200000",
+    "variation.sample_variant": "1:150000:rs1",
+    "compara.homology_reference_species": "synthetica_1",
+    "vep.faa_location": "Synthetica/vep/genome/softmasked.fa.bgz",
+    "vep.gff_location": "Synthetica/vep/ensembl/geneset/2024_11/genes.gff3.bgz",
+}
+
+# (taxon_id, name, display name, display order), as in sql/010
+DOMAINS = [
+    (33208, "metazoa", "Animals", 1),
+    (2157, "archaea", "Archaea", 2),
+    (2, "bacteria", "Bacteria", 3),
+    (4751, "fungi", "Fungi", 4),
+    (33090, "viridiplantae", "Green Plants", 5),
+    (1, "root", "Others", 6),
+]
+
+# Genomes per species
+GENOMES_PER_SPECIES = 3
+MAX_CHROMOSOMES = 24
+POPULAR_SPECIES = 30
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# The NCBI taxonomy tables, created when the models do not declare them
+class NCBITaxaNode(Base):
+    __tablename__ = "ncbi_taxa_node"
+    taxon_id = Column(Integer, primary_key=True)
+    parent_id = Column(Integer)
+    rank = Column(String)
+    genbank_hidden_flag = Column(Integer)
+    left_index = Column(BigInteger)
+    right_index = Column(BigInteger)
+    root_id = Column(Integer)
+
+
+class NCBITaxaName(Base):
+    __tablename__ = "ncbi_taxa_name"
+    taxon_id = Column(Integer, primary_key=True)
+    name = Column(String, primary_key=True)
+    name_class = Column(String, primary_key=True)
+
+
+def synthetic_uuid(kind: str, number: int, seed: int) -> str:
+    """The UUID given to the `number`th row of a kind; matches uuid_sql()."""
+    digest = hashlib.md5(f"{kind}-{seed}-{number}".encode()).hexdigest()
+    return "-".join(
+        [digest[:8], digest[8:12], digest[12:16], digest[16:20], digest[20:]]
+    )
+
+
+def uuid_sql(kind: str, number: str) -> str:
+    digest = f"md5('{kind}-' || :seed || '-' || {number})"
+    return " || '-' || ".join(
+        f"substr({digest}, {start}, {length})"
+        for start, length in [(1, 8), (9, 4), (13, 4), (17, 4), (21, 12)]
+    )
+
+
+def accession_sql(genome: str) -> str:
+    return f"'GCA_' || lpad(CAST({genome} AS VARCHAR), 9, '0') || '.1'"
+
+
+def number_sql(*terms: str, modulo: int) -> str:
+    """A deterministic pseudo-random number in [0, modulo) from the terms."""
+    mixed = " + ".join(
+        f"({term}) * {factor}"
+        for term, factor in zip(terms, (2654435761, 40503, 104729, 7919))
+    )
+    return f"(({mixed} + :seed * 97) % 4294967291 % {modulo})"
+
+
+def sample_ids(seed: int = 0) -> dict[str, str]:
+    """
+    Identifiers of genome 1, which is released and has every dataset type
+    (the VEP one at scales with 6 datasets per genome).
+    """
+    genome_uuid = synthetic_uuid("genome", 1, seed)
+    return {
+        "genome_uuid": genome_uuid,
+        "vep_genome_uuid": genome_uuid,
+        "assembly_accession": "GCA_000000001.1",
+        "region_name": "1",
+        "location": "1:100000-200000",
+        "dataset_type": "genebuild",
+    }
+
+
+def fixture_id(scale: Scale, seed: int) -> str:
+    values = ",".join(f"{field}={value}" for field, value in scale._asdict().items())
+    return f"synthetic-v{GENERATOR_VERSION}:{values},seed={seed}"
+
+
+def parse_scale(
+    name: str = "small", overrides: dict[str, int | None] | None = None
+) -> Scale:
+    """A preset of SCALES, with some values replaced (None keeps the preset's)."""
+    if name not in SCALES:
+        raise ValueError(f"Unknown scale: {name} (one of {', '.join(SCALES)})")
+    values = {k: v for k, v in (overrides or {}).items() if v is not None}
+    scale = SCALES[name]._replace(**values)
+    if scale.genomes < 1 or scale.releases < 1 or scale.datasets_per_genome < 2:
+        raise ValueError("Needs a genome, a release and assembly+genebuild datasets")
+    return scale
+
+
+def statistics_attributes() -> list[str]:
+    """The dataset attribute names read by the statistics schemas."""
+    names = set()
+    for schema in vars(statistics).values():
+        if not (
+            inspect.isclass(schema)
+            and issubclass(schema, BaseModel)
+            and schema.__module__ == statistics.__name__
+        ):
+            continue
+        for field in schema.model_fields.values():
+            if isinstance(field.validation_alias, AliasChoices):
+                names.update(
+                    choice
+                    for choice in field.validation_alias.choices
+                    if isinstance(choice, str)
+                    and "." in choice
+                    and ".stats." not in choice
+                )
+    return sorted(names)
+
+
+def dataset_types(scale: Scale) -> list[str]:
+    extra = range(len(DATASET_TYPES) + 1, scale.datasets_per_genome + 1)
+    return (DATASET_TYPES + [f"synthetic_{k}" for k in extra])[
+        : scale.datasets_per_genome
+    ]
+
+
+def attribute_rows(scale: Scale) -> list[tuple[int, int, str, str | None]]:
+    """(attribute_id, dataset type number, name, fixed value) of the attributes."""
+    known = sorted(set(statistics_attributes()) | FIXED_VALUES.keys())
+    rows = []
+    for type_number, type_name in enumerate(dataset_types(scale), start=1):
+        prefix = ATTRIBUTE_PREFIXES.get(type_name, type_name)
+        names = [name for name in known if name.split(".")[0] == prefix]
+        names += [
+            f"{prefix}.synthetic_{k}"
+            for k in range(1, scale.attributes_per_dataset - len(names) + 1)
+        ]
+        for name in names:
+            rows.append((len(rows) + 1, type_number, name, FIXED_VALUES.get(name)))
+    return rows
+
+
+def values_sql(rows: list[tuple], alias: str, columns: list[str]) -> str:
+    def literal(value):
+        if value is None:
+            return "NULL"
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return str(value)
+
+    values = ", ".join(
+        "(" + ", ".join(literal(value) for value in row) + ")" for row in rows
+    )
+    return f"(VALUES {values}) AS {alias}({', '.join(columns)})"
+
+
+class Generator:
+    """Fills the empty tables of `metadata` in a DB; see generate()."""
+
+    def __init__(
+        self, db_conn: DBConnection, metadata: MetaData, scale: Scale, seed: int
+    ):
+        self.db_conn = db_conn
+        self.scale = scale
+        self.seed = seed
+        self.dialect = db_conn._engine.dialect
+        # The model types, e.g. Enum columns storing member names
+        self.tables = metadata.tables
+
+    def db_value(self, table: str, column: str, value) -> str | None:
+        """
+        `value` as stored by the models (e.g. the name of an Enum member), as
+        an SQL literal. None if the models have no such column.
+        """
+        if table not in self.tables or column not in self.tables[table].c:
+            return None
+        column_type = self.tables[table].c[column].type
+        enum_class = getattr(column_type, "enum_class", None)
+        if enum_class is not None:
+            value = next(m for m in enum_class if value in (m, m.value, m.name))
+        return str(
+            literal(value, column_type).compile(
+                dialect=self.dialect, compile_kwargs={"literal_binds": True}
+            )
+        )
+
+    def insert(self, conn, table_name: str, values: dict[str, str], source: str):
+        """
+        INSERT INTO table SELECT values FROM source, for the columns the table
+        has. Missing NOT NULL columns get a placeholder of their type.
+        """
+        table = self.tables.get(table_name)
+        if table is None:
+            logger.warning("No %s table in the models, skipped", table_name)
+            return
+        names, expressions = [], []
+        for column in table.columns:
+            expression = values.get(column.name)
+            if expression is None:
+                if column.nullable or column.server_default is not None:
+                    continue
+                expression = self.placeholder(column)
+            names.append(f'"{column.name}"')
+            expressions.append(expression)
+        start = time.perf_counter()
+        conn.execute(
+            text(
+                f'INSERT INTO "{table_name}" ({", ".join(names)}) '
+                f"SELECT {', '.join(expressions)} FROM {source}"
+            ),
+            {"seed": self.seed},
+        )
+        logger.info("%s: %.1fs", table_name, time.perf_counter() - start)
+
+    @staticmethod
+    def placeholder(column) -> str:
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return "NULL"
+        if python_type is str:
+            return "''"
+        if python_type is bool:
+            return "false"
+        if python_type.__name__ in ("datetime", "date"):
+            return "TIMESTAMP '2023-01-01'"
+        return "0"
+
+    def generate(self):
+        scale = self.scale
+        genomes = f"range(1, {scale.genomes + 1}) AS t(g)"
+        releases = scale.releases
+        integrated = releases
+        # Genomes of the partial releases, and those of the integrated one
+        partial_release = (
+            f"(1 + g % {releases - 1})" if releases > 1 else str(integrated)
+        )
+        in_integrated = "g % 10 <> 0" if releases > 1 else "true"
+        species = f"(1000000 + (g - 1) // {GENOMES_PER_SPECIES})"
+        domain = f"(((g - 1) // {GENOMES_PER_SPECIES}) % {len(DOMAINS)})"
+        chromosomes = f"(CASE WHEN g % 3 = 0 THEN 0 ELSE {MAX_CHROMOSOMES} END)"
+        sequences = (
+            f"(CASE WHEN g % 100 = 1 THEN {scale.max_sequences_per_assembly} "
+            f"ELSE {scale.sequences_per_assembly} END)"
+        )
+        released = self.db_value("ensembl_release", "status", ReleaseStatus.RELEASED)
+        types = dataset_types(scale)
+        types_source = values_sql(
+            list(enumerate(types, start=1)), "dt", ["t", "type_name"]
+        )
+        attributes = attribute_rows(scale)
+        attributes_source = values_sql(
+            attributes, "a", ["attribute_id", "t", "name", "fixed_value"]
+        )
+        domains_source = values_sql(
+            [(i, *domain_row) for i, domain_row in enumerate(DOMAINS)],
+            "d",
+            ["domain", "taxon_id", "name", "display_name", "ord"],
+        )
+
+        with self.db_conn.begin() as conn:
+            self.insert(
+                conn,
+                "ensembl_site",
+                {
+                    "site_id": "1",
+                    "name": "'Ensembl'",
+                    "label": "'Synthetic Ensembl'",
+                    "uri": "'https://beta.ensembl.org'",
+                },
+                "range(1)",
+            )
+            release_date = "(DATE '2023-01-01' + CAST(r - 1 AS INTEGER) * 60)"
+            label = (
+                f"CASE WHEN r = {integrated} THEN strftime({release_date}, '%Y-%m') "
+                f"ELSE strftime({release_date}, '%Y-%m-%d') END"
+            )
+            self.insert(
+                conn,
+                "ensembl_release",
+                {
+                    "release_id": "r",
+                    "version": "100 + r",
+                    "release_date": release_date,
+                    "label": label,
+                    "name": label,
+                    "release_type": (
+                        f"CASE WHEN r = {integrated} THEN 'integrated' "
+                        "ELSE 'partial' END"
+                    ),
+                    # The integrated release and the latest partial one
+                    "is_current": f"CASE WHEN r >= {integrated - 1} THEN 1 ELSE 0 END",
+                    "status": released,
+                    "site_id": "1",
+                },
+                f"range(1, {releases + 1}) AS t(r)",
+            )
+            self.insert(
+                conn,
+                "organism",
+                {
+                    "organism_id": "g",
+                    "organism_uuid": uuid_sql("organism", "g"),
+                    "taxonomy_id": species,
+                    "species_taxonomy_id": species,
+                    "common_name": f"'Synthetic species ' || {species}",
+                    "scientific_name": f"'Synthetica ' || {species}",
+                    "scientific_parlance_name": f"'Synthetic species ' || {species}",
+                    "biosample_id": "'SAMN' || lpad(CAST(g AS VARCHAR), 8, '0')",
+                    "strain": f"CASE WHEN g % {GENOMES_PER_SPECIES} = 0 "
+                    "THEN 'strain ' || g END",
+                    "strain_type": f"CASE WHEN g % {GENOMES_PER_SPECIES} = 0 "
+                    "THEN 'strain' END",
+                },
+                genomes,
+            )
+            self.insert(
+                conn,
+                "assembly",
+                {
+                    "assembly_id": "g",
+                    "assembly_uuid": uuid_sql("assembly", "g"),
+                    "accession": accession_sql("g"),
+                    "name": "'SYN' || g || '.1'",
+                    "ensembl_name": "'SYN' || g || '.1'",
+                    "level": (
+                        f"CASE WHEN {chromosomes} > 0 THEN 'chromosome' "
+                        "ELSE 'scaffold' END"
+                    ),
+                    "is_reference": "CASE WHEN g = 1 THEN 1 ELSE 0 END",
+                    "accession_body": "'INSDC'",
+                    "created": "TIMESTAMP '2023-01-01'",
+                },
+                genomes,
+            )
+            # Chromosomes first, then scaffolds of pseudo-random lengths
+            is_chromosome = f"j < least(n, {chromosomes})"
+            self.insert(
+                conn,
+                "assembly_sequence",
+                {
+                    "assembly_sequence_id": "row_number() OVER (ORDER BY g, j)",
+                    "assembly_id": "g",
+                    "name": (
+                        f"CASE WHEN {is_chromosome} THEN CAST(j + 1 AS VARCHAR) "
+                        "ELSE 'scaffold_' || (j + 1) END"
+                    ),
+                    "accession": "'SYN' || g || '_' || (j + 1)",
+                    "chromosomal": f"CASE WHEN {is_chromosome} THEN 1 ELSE 0 END",
+                    "chromosome_rank": f"CASE WHEN {is_chromosome} THEN j + 1 END",
+                    "type": (
+                        f"CASE WHEN {is_chromosome} THEN 'chromosome' "
+                        "ELSE 'scaffold' END"
+                    ),
+                    "length": (
+                        f"CASE WHEN {is_chromosome} THEN 250000000 - j * 8000000 "
+                        f"ELSE 1000 + {number_sql('g', 'j', modulo=2000000)} END"
+                    ),
+                    "md5": "md5('sequence-' || :seed || '-' || g || '-' || j)",
+                    "sha512t24u": (
+                        "substr(md5('sha512t24u-' || :seed || '-' || g || '-' || j), "
+                        "1, 32)"
+                    ),
+                    "is_circular": "0",
+                    "sequence_location": "'SO:0000738'",
+                },
+                f"(SELECT g, n, unnest(range(n)) AS j "
+                f"FROM (SELECT g, {sequences} AS n FROM {genomes}))",
+            )
+            self.insert(
+                conn,
+                "genome",
+                {
+                    "genome_id": "g",
+                    "genome_uuid": uuid_sql("genome", "g"),
+                    "assembly_id": "g",
+                    "organism_id": "g",
+                    "created": "TIMESTAMP '2023-06-01 12:00:00' + to_days(CAST(g % 365 AS INTEGER))",
+                    "production_name": "'synthetica_' || g",
+                    "url_name": accession_sql("g"),
+                    "suppressed": "false",
+                    "is_best": "1",
+                    "genebuild_version": "'ENS01'",
+                    "genebuild_date": "'2024-11'",
+                    "annotation_source": "'Ensembl'",
+                },
+                genomes,
+            )
+            self.insert(
+                conn,
+                "genome_release",
+                {
+                    "genome_release_id": "g",
+                    "genome_id": "g",
+                    "release_id": str(integrated),
+                    "is_current": "1",
+                },
+                f"{genomes} WHERE {in_integrated}",
+            )
+            if releases > 1:
+                self.insert(
+                    conn,
+                    "genome_release",
+                    {
+                        "genome_release_id": f"{scale.genomes} + g",
+                        "genome_id": "g",
+                        "release_id": partial_release,
+                        "is_current": "1",
+                    },
+                    genomes,
+                )
+
+            self.insert(
+                conn,
+                "dataset_type",
+                {
+                    "dataset_type_id": "t",
+                    "name": "type_name",
+                    "label": "type_name",
+                    "topic": "type_name",
+                    "description": "'Synthetic ' || type_name",
+                },
+                types_source,
+            )
+            self.insert(
+                conn,
+                "dataset_source",
+                {
+                    "dataset_source_id": "g",
+                    "type": "'core'",
+                    "name": "'synthetica_' || g || '_core_1'",
+                },
+                genomes,
+            )
+            dataset_id = f"((g - 1) * {len(types)} + t)"
+            genome_datasets = f"{genomes} CROSS JOIN {types_source}"
+            self.insert(
+                conn,
+                "dataset",
+                {
+                    "dataset_id": dataset_id,
+                    "dataset_uuid": uuid_sql("dataset", dataset_id),
+                    "dataset_type_id": "t",
+                    "dataset_source_id": "g",
+                    "name": "type_name",
+                    "label": "type_name",
+                    "version": "'1.0'",
+                    "created": "TIMESTAMP '2023-06-01'",
+                    "status": self.db_value("dataset", "status", "Released"),
+                },
+                genome_datasets,
+            )
+            self.insert(
+                conn,
+                "genome_dataset",
+                {
+                    "genome_dataset_id": dataset_id,
+                    "dataset_id": dataset_id,
+                    "genome_id": "g",
+                    "release_id": partial_release,
+                    "is_current": "1",
+                },
+                genome_datasets,
+            )
+            self.insert(
+                conn,
+                "attribute",
+                {
+                    "attribute_id": "attribute_id",
+                    "name": "name",
+                    "label": "name",
+                    "description": "'Synthetic ' || name",
+                    "type": (
+                        "CASE WHEN fixed_value IS NULL THEN 'integer' "
+                        "ELSE 'string' END"
+                    ),
+                },
+                attributes_source,
+            )
+            self.insert(
+                conn,
+                "dataset_attribute",
+                {
+                    "dataset_attribute_id": (
+                        f"row_number() OVER (ORDER BY {dataset_id}, attribute_id)"
+                    ),
+                    "dataset_id": dataset_id,
+                    "attribute_id": "attribute_id",
+                    "value": (
+                        "coalesce(fixed_value, CAST("
+                        f"{number_sql('g', 'attribute_id', modulo=100000)} "
+                        "AS VARCHAR))"
+                    ),
+                },
+                f"{genomes} CROSS JOIN {attributes_source}",
+            )
+
+            # Popular species (organism groups) and genome groups
+            self.insert(
+                conn,
+                "organism_group",
+                {
+                    "organism_group_id": "1",
+                    "type": "'Popular'",
+                    "name": "'Popular species'",
+                    "code": "'popular'",
+                },
+                "range(1)",
+            )
+            self.insert(
+                conn,
+                "organism_group_member",
+                {
+                    "organism_group_member_id": "g",
+                    "organism_group_id": "1",
+                    "organism_id": "g",
+                    "is_reference": "CASE WHEN g = 1 THEN 1 ELSE 0 END",
+                    "order": "g",
+                },
+                f"{genomes} WHERE g <= {POPULAR_SPECIES}",
+            )
+            groups = f"range(1, {scale.groups + 1}) AS t(i)"
+            self.insert(
+                conn,
+                "genome_group",
+                {
+                    "genome_group_id": "i",
+                    "type": "CASE WHEN i % 2 = 1 THEN 'collection' ELSE 'project' END",
+                    "name": "'synthetic-group-' || i",
+                    "label": "'Synthetic group ' || i",
+                    "description": "'Synthetic genome group ' || i",
+                },
+                groups,
+            )
+            members = min(scale.genomes_per_group, scale.genomes)
+            self.insert(
+                conn,
+                "genome_group_member",
+                {
+                    "genome_group_member_id": f"(i - 1) * {members} + k + 1",
+                    "genome_group_id": "i",
+                    "genome_id": f"1 + ((i - 1) * {members} + k) % {scale.genomes}",
+                    "is_current": "1",
+                },
+                f"{groups} CROSS JOIN range({members}) AS m(k)",
+            )
+
+            # Taxonomy: species under the domains of sql/010, under root
+            self.insert(
+                conn,
+                "ncbi_taxa_node",
+                {
+                    "taxon_id": "taxon_id",
+                    "parent_id": "1",
+                    "rank": "CASE WHEN taxon_id = 1 THEN 'no rank' ELSE 'kingdom' END",
+                    "root_id": "1",
+                },
+                domains_source,
+            )
+            self.insert(
+                conn,
+                "ncbi_taxa_node",
+                {
+                    "taxon_id": species,
+                    "parent_id": "d.taxon_id",
+                    "rank": "'species'",
+                    "root_id": "1",
+                },
+                f"(SELECT DISTINCT g, {domain} AS domain FROM {genomes} "
+                f"WHERE g % {GENOMES_PER_SPECIES} = 1 "
+                f"OR {GENOMES_PER_SPECIES} = 1) AS s "
+                f"JOIN {domains_source} USING (domain)",
+            )
+            for name_class, name in [
+                ("scientific name", "'Synthetica ' || taxon"),
+                ("common name", "'Synthetic species ' || taxon"),
+            ]:
+                self.insert(
+                    conn,
+                    "ncbi_taxa_name",
+                    {
+                        "taxon_id": "taxon",
+                        "name": name,
+                        "name_class": f"'{name_class}'",
+                    },
+                    f"(SELECT DISTINCT {species} AS taxon FROM {genomes})",
+                )
+            self.insert(
+                conn,
+                "ncbi_taxa_name",
+                {
+                    "taxon_id": "taxon_id",
+                    "name": "name",
+                    "name_class": "'scientific name'",
+                },
+                domains_source,
+            )
+
+            # Done by sql/010 from the taxonomy on real DBs
+            counts = (
+                f"count(*) AS n FROM {genomes} JOIN {domains_source} "
+                f"ON d.domain = {domain}"
+            )
+            self.insert(
+                conn,
+                "genome_taxonomy_counts",
+                {
+                    "release_id": "release_id",
+                    "label": "label",
+                    "taxon_id": "taxon_id",
+                    "ensembl_taxon_name": "display_name",
+                    "count": "n",
+                    "ord": "ord",
+                },
+                f"(SELECT 0 AS release_id, '' AS label, taxon_id, display_name, ord, "
+                f"{counts} GROUP BY ALL "
+                f"UNION ALL SELECT er.release_id, er.label, taxon_id, display_name, "
+                f"ord, {counts} JOIN ensembl_release er "
+                f"ON er.release_id = {partial_release} GROUP BY ALL)",
+            )
+
+
+def schema() -> MetaData:
+    """
+    The tables of the models, then those of the API and the NCBI taxonomy
+    the models do not have. Copies, with the generated ids: DuckDB has no
+    SERIAL type for autoincrement keys.
+    """
+    metadata = MetaData()
+    tables = [
+        *Genome.metadata.sorted_tables,
+        GenomeGroup.__table__,
+        GenomeGroupMember.__table__,
+        GenomeTaxonomyCounts.__table__,
+        *Base.metadata.sorted_tables,
+    ]
+    for table in tables:
+        if table.name not in metadata.tables:
+            copy = table.to_metadata(metadata)
+            for column in copy.primary_key.columns:
+                column.autoincrement = False
+    return metadata
+
+
+def generate(path: str, scale: Scale, seed: int = 0) -> DBConnection:
+    """Write the synthetic DB at `path`, which must not exist."""
+    if os.path.exists(path):
+        raise FileExistsError(path)
+    db_conn = DBConnection(f"duckdb:///{path}", reflect=False)
+    metadata = schema()
+    db_conn.create_all_tables(metadata)
+    Generator(db_conn, metadata, scale, seed).generate()
+    with db_conn.connect() as conn:
+        conn.execute(text("CHECKPOINT"))
+    return db_conn
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write a synthetic metadata DB")
+    parser.add_argument("--output", required=True, help="DuckDB file to write")
+    parser.add_argument(
+        "--scale", choices=SCALES, default="small", help="Preset (default: small)"
+    )
+    for field in Scale._fields:
+        parser.add_argument(
+            f"--{field.replace('_', '-')}", type=int, help="Overrides the preset"
+        )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--force", action="store_true", help="Replace the output if it exists"
+    )
+    args = parser.parse_args(argv)
+
+    scale = parse_scale(args.scale, {f: getattr(args, f) for f in Scale._fields})
+    if args.force and os.path.exists(args.output):
+        os.remove(args.output)
+    start = time.perf_counter()
+    logger.info("Generating %s", fixture_id(scale, args.seed))
+    db_conn = generate(args.output, scale, args.seed)
+    db_conn.dispose()
+    logger.info("Wrote %s in %.1fs", args.output, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,553 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Load test: start the API in a local uvicorn, with Redis replaced by
+fakeredis, and replay a mix of traffic on it from concurrent clients:
+
+    uv run python -m api.tools.load_test --duration 60 --concurrency 32
+    uv run python -m api.tools.load_test --mix crawler=1,genome_details=3 --json run.json
+    python -m api.tools.load_test --redis-host localhost --workers 4
+
+The genomes are those of the current releases in --db-url, chosen with a
+Zipf distribution: a few genomes get most of the traffic, as on the site.
+Besides one scenario per route, the mix has bursts of validate_location
+calls (a user typing or dragging a location) and crawlers requesting
+unique random UUIDs, which always miss the cache. See DEFAULT_MIX.
+
+The report gives the throughput, the p50/p95/p99 latencies per scenario
+and overall, the HTTP statuses, and the redis_cache hit rate read from the
+server's /metrics. The server reads the other settings (ENABLE_COMPRESSION,
+the admission control, REDIS_MAX_CONNECTION...) from the environment as
+usual: run the same mix with different settings to compare them. With
+fakeredis, each worker has its own cache, and /metrics reports one worker;
+use --workers 1, or a real Redis, to compare hit rates.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Callable, NamedTuple
+
+import httpx
+from ensembl.utils.database import DBConnection
+from prometheus_client.parser import text_string_to_metric_families
+
+from api.config import API_PREFIX, DB_URL
+from api.models.meta_adaptor import MetaAdaptor
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+# Routes answered for any genome, and the global ones, by route name
+GENOME_ROUTE_URLS = {
+    "genome_details": "/genome/{genome_uuid}/details",
+    "statistics": "/genome/{genome_uuid}/stats",
+    "karyotype": "/genome/{genome_uuid}/karyotype",
+    "top_regions": "/genome/{genome_uuid}/top-regions",
+    "example_objects": "/genome/{genome_uuid}/example_objects",
+    "genome_ftplinks": "/genome/{genome_uuid}/ftplinks",
+    "genome_explain": "/genome/{genome_uuid}/explain",
+}
+GLOBAL_ROUTE_URLS = {
+    "popular_species": "/popular_species",
+    "genome_counts": "/genome_counts",
+    "get_releases": "/releases",
+    "genome_group_categories": "/genome_group_categories",
+}
+
+# Relative weights of the scenarios (see SCENARIOS)
+DEFAULT_MIX = {
+    "genome_details": 20,
+    "statistics": 6,
+    "karyotype": 8,
+    "top_regions": 4,
+    "example_objects": 8,
+    "genome_ftplinks": 3,
+    "genome_explain": 3,
+    "popular_species": 10,
+    "genome_counts": 3,
+    "get_releases": 3,
+    "genome_group_categories": 2,
+    "validate_location_burst": 20,
+    "crawler": 10,
+}
+
+
+class Sample(NamedTuple):
+    scenario: str
+    status: int  # 0 when the request failed
+    seconds: float
+
+
+class Traffic:
+    """What the virtual users request: the genomes, and the scenarios."""
+
+    def __init__(
+        self,
+        genome_uuids: list[str],
+        mix: dict[str, float],
+        zipf_exponent: float = 1.1,
+        burst_size: int = 10,
+        seed: int = 0,
+    ):
+        if not genome_uuids:
+            raise ValueError("No genomes to request")
+        # Popularity does not follow the UUID order
+        self.genomes = sorted(genome_uuids)
+        random.Random(seed).shuffle(self.genomes)
+        self.genome_weights = cumulative(
+            1 / rank**zipf_exponent for rank in range(1, len(self.genomes) + 1)
+        )
+        self.scenarios = list(mix)
+        self.scenario_weights = cumulative(mix.values())
+        self.burst_size = burst_size
+
+    def scenario(self, rng: random.Random) -> str:
+        return rng.choices(self.scenarios, cum_weights=self.scenario_weights)[0]
+
+    def genome(self, rng: random.Random) -> str:
+        return rng.choices(self.genomes, cum_weights=self.genome_weights)[0]
+
+
+def cumulative(weights) -> list[float]:
+    total, sums = 0.0, []
+    for weight in weights:
+        total += weight
+        sums.append(total)
+    return sums
+
+
+def validate_location_burst(traffic: Traffic, rng: random.Random):
+    """Consecutive locations on a region, as sent while typing or dragging."""
+    genome_uuid = traffic.genome(rng)
+    width = rng.choice((10_000, 100_000, 1_000_000))
+    start = rng.randrange(1, 50_000_000)
+    for _ in range(traffic.burst_size):
+        start = max(1, start + rng.randint(-width // 4, width // 4))
+        location = f"1:{start}-{start + width}"
+        yield f"/validate_location?genome_id={genome_uuid}&location={location}"
+
+
+def crawler(traffic: Traffic, rng: random.Random):
+    """A genome route for a UUID nobody asked for before (HTTP 404)."""
+    url = rng.choice(list(GENOME_ROUTE_URLS.values()))
+    genome_uuid = uuid.UUID(int=rng.getrandbits(128), version=4)
+    yield url.format(genome_uuid=genome_uuid)
+
+
+def route_scenario(route: str) -> Callable:
+    def requests(traffic: Traffic, rng: random.Random):
+        if route in GLOBAL_ROUTE_URLS:
+            yield GLOBAL_ROUTE_URLS[route]
+        else:
+            genome_uuid = traffic.genome(rng)
+            yield GENOME_ROUTE_URLS[route].format(genome_uuid=genome_uuid)
+
+    return requests
+
+
+# Scenario name -> function(traffic, rng) yielding the URLs a client
+# requests one after the other. The mix weighs scenarios, not requests: a
+# burst is one draw.
+SCENARIOS = {
+    **{route: route_scenario(route) for route in GENOME_ROUTE_URLS},
+    **{route: route_scenario(route) for route in GLOBAL_ROUTE_URLS},
+    "validate_location_burst": validate_location_burst,
+    "crawler": crawler,
+}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """name=weight,... e.g. "genome_details=3,crawler=1"."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown scenario: {name} (one of {', '.join(SCENARIOS)})"
+            )
+        mix[name] = float(weight) if weight else 1.0
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError(
+            "The mix needs a scenario with a positive weight"
+        )
+    return mix
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    traffic: Traffic,
+    rng: random.Random,
+    deadline: float,
+    samples: list[Sample],
+):
+    while time.perf_counter() < deadline:
+        scenario = traffic.scenario(rng)
+        for url in SCENARIOS[scenario](traffic, rng):
+            start = time.perf_counter()
+            try:
+                response = await client.get(API_PREFIX + "/metadata" + url)
+                status = response.status_code
+            except httpx.HTTPError as ex:
+                logger.debug("%s failed: %s", url, ex)
+                status = 0
+            samples.append(Sample(scenario, status, time.perf_counter() - start))
+
+
+async def run_load(
+    base_url: str, traffic: Traffic, concurrency: int, duration: float, seed: int
+) -> list[Sample]:
+    samples = []
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(
+                virtual_user(
+                    client, traffic, random.Random(f"{seed}-{user}"), deadline, samples
+                )
+                for user in range(concurrency)
+            )
+        )
+    return samples
+
+
+def percentiles(seconds: list[float]) -> dict[str, float | None]:
+    """Nearest-rank percentiles, in milliseconds."""
+    ordered = sorted(seconds)
+    return {
+        f"p{p}": (
+            ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000
+            if ordered
+            else None
+        )
+        for p in PERCENTILES
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    by_scenario = defaultdict(list)
+    for sample in samples:
+        by_scenario[sample.scenario].append(sample)
+
+    def stats(scenario_samples: list[Sample]) -> dict:
+        return {
+            "requests": len(scenario_samples),
+            "throughput": len(scenario_samples) / elapsed if elapsed else 0.0,
+            **percentiles([s.seconds for s in scenario_samples]),
+            "statuses": dict(
+                sorted(Counter(s.status for s in scenario_samples).items())
+            ),
+        }
+
+    return {
+        "elapsed": elapsed,
+        **stats(samples),
+        "scenarios": {name: stats(by_scenario[name]) for name in sorted(by_scenario)},
+    }
+
+
+def cache_counts(metrics_text: str) -> dict[str, dict[str, float]]:
+    """redis_cache hits and misses per key prefix, from a /metrics page."""
+    counts = defaultdict(lambda: {"hits": 0.0, "misses": 0.0})
+    for family in text_string_to_metric_families(metrics_text):
+        kind = {"redis_cache_hits": "hits", "redis_cache_misses": "misses"}.get(
+            family.name
+        )
+        if kind is None:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_total"):
+                counts[sample.labels["key_prefix"]][kind] += sample.value
+    return dict(counts)
+
+
+def cache_hit_rates(
+    before: dict[str, dict[str, float]], after: dict[str, dict[str, float]]
+) -> dict:
+    """Hits, misses and hit rate between two cache_counts(), overall and per prefix."""
+
+    def rate(hits: float, misses: float) -> dict:
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else None,
+        }
+
+    empty = {"hits": 0.0, "misses": 0.0}
+    prefixes = {}
+    for prefix in sorted(after):
+        hits = after[prefix]["hits"] - before.get(prefix, empty)["hits"]
+        misses = after[prefix]["misses"] - before.get(prefix, empty)["misses"]
+        if hits or misses:
+            prefixes[prefix] = rate(hits, misses)
+    return {
+        **rate(
+            sum(p["hits"] for p in prefixes.values()),
+            sum(p["misses"] for p in prefixes.values()),
+        ),
+        "prefixes": prefixes,
+    }
+
+
+def format_report(summary: dict, cache: dict | None) -> str:
+    def ms(value):
+        return f"{value:>8.1f}" if value is not None else f"{'-':>8}"
+
+    def line(name: str, stats: dict) -> str:
+        statuses = " ".join(f"{k}:{v}" for k, v in stats["statuses"].items())
+        return (
+            f"{name:<{width}}  {stats['requests']:>8}  {stats['throughput']:>8.1f}  "
+            + "  ".join(ms(stats[f"p{p}"]) for p in PERCENTILES)
+            + f"  {statuses}"
+        )
+
+    width = max([len(name) for name in summary["scenarios"]] + [8])
+    lines = [
+        f"{'scenario':<{width}}  {'requests':>8}  {'req/s':>8}  "
+        + "  ".join(f"{f'p{p} ms':>8}" for p in PERCENTILES)
+        + "  statuses"
+    ]
+    lines += [line(name, stats) for name, stats in summary["scenarios"].items()]
+    lines.append(line("all", summary))
+    if cache is None:
+        lines.append("Cache hit rate: not measured")
+    else:
+        for name, counts in [("all", cache), *cache["prefixes"].items()]:
+            hit_rate = counts["hit_rate"]
+            lines.append(
+                f"Cache hit rate ({name}): "
+                + (f"{hit_rate:.1%}" if hit_rate is not None else "-")
+                + f" ({counts['hits']:.0f} hits, {counts['misses']:.0f} misses)"
+            )
+    return "\n".join(lines)
+
+
+def create_app():
+    """uvicorn factory of the API with Redis replaced by an in-process fakeredis."""
+    try:
+        from fakeredis import FakeServer
+        from fakeredis.aioredis import FakeConnection
+    except ImportError:
+        raise RuntimeError(
+            "fakeredis is not installed: install the dev dependencies (uv sync), "
+            "or pass --redis-host"
+        )
+    from api.resources.redis import redis_pool
+
+    # Every client of the pool (cache, health, rate limits) gets the stand-in
+    redis_pool.connection_class = FakeConnection
+    redis_pool.connection_kwargs["server"] = FakeServer()
+    redis_pool.reset()
+
+    from api.main import app
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DB_URL": args.db_url,
+        "ENABLE_REDIS_CACHE": "false" if args.no_cache else "true",
+        # The mix hits the same routes far beyond the client rate limits
+        "ENABLE_RATE_LIMIT": "false",
+    }
+    # Bundled responses would answer most cached routes
+    env.setdefault("RESPONSE_BUNDLE_PATH", "")
+    if args.redis_host:
+        app = ["api.main:app"]
+        env["REDIS_HOST"] = args.redis_host
+        env["REDIS_PORT"] = str(args.redis_port)
+    else:
+        app = ["api.tools.load_test:create_app", "--factory"]
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        *app,
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(args.workers),
+        "--no-access-log",
+        "--log-level",
+        "warning",
+    ]
+    return subprocess.Popen(command, env=env)
+
+
+def wait_until_ready(server: subprocess.Popen, base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with code {server.returncode}")
+        try:
+            if httpx.get(base_url + "/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"The server was not ready after {timeout}s")
+
+
+def scrape_cache_counts(base_url: str) -> dict[str, dict[str, float]]:
+    return cache_counts(httpx.get(base_url + "/metrics", timeout=10).text)
+
+
+def fetch_genomes(db_url: str) -> list[str]:
+    # Read before the server opens the DB: DuckDB allows a single writer
+    db_conn = DBConnection(db_url, reflect=False)
+    try:
+        return list(MetaAdaptor(db_conn).fetch_current_genome_uuids())
+    finally:
+        db_conn.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API locally")
+    parser.add_argument("--db-url", default=DB_URL, help="Metadata DB URL")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Scenario weights, e.g. genome_details=3,crawler=1 "
+        f"(scenarios: {', '.join(SCENARIOS)})",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="Measured seconds (default: 30)"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=5,
+        help="Seconds of traffic before measuring (default: 5)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Virtual users, each sending one request at a time (default: 16)",
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=1.1,
+        help="Exponent of the genome popularity distribution (default: 1.1)",
+    )
+    parser.add_argument(
+        "--burst-size",
+        type=int,
+        default=10,
+        help="validate_location calls per burst (default: 10)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument(
+        "--redis-host", help="Use this Redis instead of an in-process fakeredis"
+    )
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the response cache"
+    )
+    parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=120,
+        help="Seconds to wait for the server to be ready (default: 120)",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    genome_uuids = fetch_genomes(args.db_url)
+    logger.info("%d current genomes in %s", len(genome_uuids), args.db_url)
+    traffic = Traffic(genome_uuids, args.mix, args.zipf, args.burst_size, args.seed)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(args, port)
+    try:
+        wait_until_ready(server, base_url, args.startup_timeout)
+        if args.warmup > 0:
+            asyncio.run(
+                run_load(base_url, traffic, args.concurrency, args.warmup, args.seed)
+            )
+        before = scrape_cache_counts(base_url)
+        start = time.perf_counter()
+        # Another seed, not to replay the warm-up requests
+        samples = asyncio.run(
+            run_load(base_url, traffic, args.concurrency, args.duration, args.seed + 1)
+        )
+        elapsed = time.perf_counter() - start
+        after = scrape_cache_counts(base_url)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    summary = summarize(samples, elapsed)
+    cache = None if args.no_cache else cache_hit_rates(before, after)
+    print(format_report(summary, cache))
+    if args.json:
+        results = {
+            "config": {
+                "db_url": args.db_url,
+                "mix": args.mix,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "zipf": args.zipf,
+                "burst_size": args.burst_size,
+                "seed": args.seed,
+                "workers": args.workers,
+                "redis": args.redis_host or "fakeredis",
+            },
+            **summary,
+            "cache": cache,
+        }
+        with open(args.json, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+See the NOTICE file distributed with this work for additional information
+regarding copyright ownership.
+
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Optional OpenTelemetry tracing.
+
+With ENABLE_TRACING and the opentelemetry-sdk package installed, each
+metadata request is traced as:
+
+    GET /api/metadata/genome/{genome_uuid}/details   TracingMiddleware
+      redis_cache details                            cache.key, cache.hit
+        logic get_genome_by_uuid                     request_phases.timed
+          adaptor GenomeAdaptor.fetch_genomes
+            SQL SELECT                               db.statement
+        validation genome_details
+        json dumps
+
+TRACING_EXPORTER selects where the spans go: "otlp" for an OpenTelemetry
+collector, configured with the standard OTEL_EXPORTER_OTLP_* variables
+(needs opentelemetry-exporter-otlp-proto-http), "file" for JSON lines in
+TRACING_FILE (tests, local debugging), or "console".
+
+Log records emitted within a span carry its trace.id and span.id (see
+api.logconfig). When tracing is off, the hooks cost a global lookup.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.config import (
+    SERVICE_NAME,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+    TRACING_SAMPLE_RATIO,
+)
+from api.resources.route_matching import RouteMatcher
+
+try:
+    from opentelemetry import propagate, trace
+except ImportError:
+    propagate = trace = None
+
+logger = logging.getLogger("tracing")
+
+# Longer statements are truncated in the db.statement attribute
+MAX_STATEMENT_LENGTH = 4096
+
+# Set by setup_tracing()
+tracer = None
+_provider = None
+_trace_file = None
+
+
+def setup_tracing(
+    exporter: str = TRACING_EXPORTER,
+    path: str = TRACING_FILE,
+    sample_ratio: float = TRACING_SAMPLE_RATIO,
+    service_name: str = SERVICE_NAME,
+) -> bool:
+    """Start tracing to the given exporter; False if it is not available."""
+    global tracer, _provider, _trace_file
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+            SimpleSpanProcessor,
+        )
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("Tracing disabled: opentelemetry-sdk is not installed")
+        return False
+
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning(
+                "Tracing disabled: opentelemetry-exporter-otlp-proto-http "
+                "is not installed"
+            )
+            return False
+        processor = BatchSpanProcessor(OTLPSpanExporter())
+    elif exporter == "file":
+        _trace_file = open(path, "a", encoding="utf-8")
+        processor = SimpleSpanProcessor(
+            ConsoleSpanExporter(
+                out=_trace_file,
+                formatter=lambda span: span.to_json(indent=None) + "\n",
+            )
+        )
+    elif exporter == "console":
+        processor = SimpleSpanProcessor(ConsoleSpanExporter())
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {exporter}")
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    _provider.add_span_processor(processor)
+    tracer = _provider.get_tracer("api")
+    event.listen(Engine, "before_cursor_execute", _start_sql_span)
+    event.listen(Engine, "after_cursor_execute", _end_sql_span)
+    event.listen(Engine, "handle_error", _fail_sql_span)
+    logger.info("Tracing to %s", exporter)
+    return True
+
+
+def shutdown_tracing():
+    """Flush the spans not exported yet and stop tracing."""
+    global tracer, _provider, _trace_file
+    if _provider is None:
+        return
+    event.remove(Engine, "before_cursor_execute", _start_sql_span)
+    event.remove(Engine, "after_cursor_execute", _end_sql_span)
+    event.remove(Engine, "handle_error", _fail_sql_span)
+    _provider.shutdown()
+    if _trace_file is not None:
+        _trace_file.close()
+    tracer = _provider = _trace_file = None
+
+
+@contextmanager
+def span(name: str, attributes: dict[str, Any] | None = None):
+    """A child span of the current one, made current within the block."""
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def set_span_attributes(attributes: dict[str, Any]):
+    """Set attributes on the current span."""
+    if tracer is not None:
+        trace.get_current_span().set_attributes(attributes)
+
+
+_SQL_SPANS = "tracing_sql_spans"
+
+
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    sql_span = None
+    # Only the queries of traced requests, not e.g. the startup warm-up
+    if trace.get_current_span().is_recording():
+        operation = statement.split(None, 1)[0].upper() if statement else ""
+        sql_span = tracer.start_span(
+            f"SQL {operation}".rstrip(),
+            kind=trace.SpanKind.CLIENT,
+            attributes={
+                "db.system": conn.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            },
+        )
+    conn.info.setdefault(_SQL_SPANS, []).append(sql_span)
+
+
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get(_SQL_SPANS)
+    sql_span = spans.pop() if spans else None
+    if sql_span is not None:
+        sql_span.end()
+
+
+def _fail_sql_span(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get(_SQL_SPANS) if conn is not None else None
+    sql_span = spans.pop() if spans else None
+    if sql_span is not None:
+        sql_span.record_exception(exception_context.original_exception)
+        sql_span.set_status(trace.StatusCode.ERROR)
+        sql_span.end()
+
+
+class TracingMiddleware:
+    """
+    Opens the server span of the requests of the given routes, continuing
+    the trace of the client when the request has a traceparent header.
+
+    Args:
+        routes: The routes traced, matched on their path_regex.
+        prefix: Path prefix the routes are mounted under (e.g. API_PREFIX).
+    """
+
+    def __init__(self, app: ASGIApp, routes: Iterable[BaseRoute], prefix: str = ""):
+        self.app = app
+        self.route_matcher = RouteMatcher(routes, prefix)
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route = None
+        if tracer is not None and scope["type"] == "http":
+            route = self.route_matcher.match(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        http_route = self.prefix + route.path
+        status_code = None
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(
+            f"{scope['method']} {http_route}",
+            context=propagate.extract(Headers(scope=scope)),
+            kind=trace.SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "http.route": http_route,
+                "url.path": scope["path"],
+                "url.query": scope.get("query_string", b"").decode("latin-1"),
+            },
+        ) as server_span:
+            await self.app(scope, receive, send_with_status)
+            if status_code is not None:
+                server_span.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    server_span.set_status(trace.StatusCode.ERROR)
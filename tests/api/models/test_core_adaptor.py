@@ -0,0 +1,85 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import os
+
+from ensembl.production.metadata.api.adaptors import GenomeAdaptor, ReleaseAdaptor
+from ensembl.utils.database import DBConnection
+
+from api.config import DB_URL
+from api.models.core_adaptor import CoreGenomeAdaptor, CoreReleaseAdaptor
+from api.models.logic import (
+    assembly_region_iterator,
+    get_brief_genome_details_by_uuid,
+    get_genome_by_uuid,
+    release_iterator,
+)
+from api.tools.generate_metadata_db import sample_ids
+
+meta_conn = DBConnection(
+    DB_URL, connect_args={"read_only": True, "config": {"memory_limit": "1GB"}}
+)
+genome_adaptor = GenomeAdaptor(meta_conn, meta_conn)
+release_adaptor = ReleaseAdaptor(meta_conn)
+core_genome_adaptor = CoreGenomeAdaptor(genome_adaptor)
+core_release_adaptor = CoreReleaseAdaptor(release_adaptor)
+
+GENOME_UUID = "a7335667-93e7-11ec-a39d-005056b38ce3"
+ASSEMBLY_ACCESSION = "GCA_000001405.29"
+# CI runs these on a synthetic DB (.github/workflows/core-adaptor-parity.yml)
+if "PARITY_SYNTHETIC_SEED" in os.environ:
+    _ids = sample_ids(int(os.environ["PARITY_SYNTHETIC_SEED"]))
+    GENOME_UUID, ASSEMBLY_ACCESSION = _ids["genome_uuid"], _ids["assembly_accession"]
+
+
+def test_explain_matches_orm_adaptor():
+    for genome_id in (GENOME_UUID, ASSEMBLY_ACCESSION):
+        assert get_brief_genome_details_by_uuid(
+            core_genome_adaptor, genome_id, None
+        ) == get_brief_genome_details_by_uuid(genome_adaptor, genome_id, None)
+
+
+def test_details_match_orm_adaptor():
+    assert get_genome_by_uuid(
+        core_genome_adaptor, GENOME_UUID, None
+    ) == get_genome_by_uuid(genome_adaptor, GENOME_UUID, None)
+
+
+def test_karyotype_sequences_match_orm_adaptor():
+    def sequences(adaptor):
+        return sorted(
+            assembly_region_iterator(adaptor, GENOME_UUID, True),
+            key=lambda region: region["name"],
+        )
+
+    assert sequences(core_genome_adaptor) == sequences(genome_adaptor)
+
+
+def test_releases_match_orm_adaptor():
+    for current_only in (False, True):
+        assert list(
+            release_iterator(core_release_adaptor, None, None, current_only)
+        ) == list(release_iterator(release_adaptor, None, None, current_only))
+
+
+def test_unsupported_lookups_are_delegated():
+    rows = core_genome_adaptor.fetch_genomes(genome_uuid=GENOME_UUID, current_only=True)
+
+    assert [row.Genome.genome_uuid for row in rows] == [
+        row.Genome.genome_uuid
+        for row in genome_adaptor.fetch_genomes(
+            genome_uuid=GENOME_UUID, current_only=True
+        )
+    ]
@@ -1,6 +1,10 @@
 from types import SimpleNamespace
 
-from api.models.logic import get_brief_genome_details_by_uuid
+from api.models.logic import (
+    get_brief_genome_details_by_uuid,
+    get_top_level_regions,
+    get_top_regions,
+)
 
 GENOME_UUID = "4273b9f0-c927-4215-87bf-828ef65de980"
 LATEST_GENOME_UUID = "be73075e-0633-471d-b7c8-4f8ca7752a04"
@@ -264,3 +268,48 @@ def test_brief_genome_details_omits_latest_genome_for_accession():
 
     assert result["genome_uuid"] == LATEST_GENOME_UUID
     assert result["latest_genome"] is None
+
+
+class FakeMetaAdaptor:
+    def __init__(self, karyotype=None, top_regions=None):
+        self.karyotype = karyotype
+        self.top_regions = top_regions
+
+    def fetch_karyotype(self, genome_uuid):
+        return self.karyotype
+
+    def fetch_top_regions(self, genome_uuid):
+        return self.top_regions
+
+
+class FailingSequenceAdaptor:
+    def fetch_sequences(self, **kwargs):
+        raise AssertionError("precomputed regions should be used")
+
+
+def test_top_level_regions_use_precomputed_karyotype():
+    karyotype = [
+        {"name": "1", "type": "chromosome", "length": 300, "is_circular": False},
+        {"name": "MT", "type": "chromosome", "length": 16, "is_circular": True},
+    ]
+    meta_adaptor = FakeMetaAdaptor(karyotype=karyotype)
+
+    regions = get_top_level_regions(FailingSequenceAdaptor(), GENOME_UUID, meta_adaptor)
+
+    assert regions == karyotype
+
+
+def test_top_regions_fall_back_when_tables_are_not_built(monkeypatch):
+    import api.models.logic as logic
+
+    monkeypatch.setattr(
+        logic,
+        "assembly_region_iterator",
+        lambda *_: iter([{"name": "1", "chromosomal": 1, "length": "100", "rank": 1}]),
+    )
+
+    regions = get_top_regions(None, GENOME_UUID, meta_adaptor=FakeMetaAdaptor())
+
+    assert regions == [
+        {"name": "1", "type": "chromosome", "length": 100, "is_circular": False}
+    ]
@@ -14,7 +14,15 @@
 #    limitations under the License.
 #
 import unittest
+import pytest
+from sqlalchemy import text
+from ensembl.production.metadata.api.adaptors import GenomeAdaptor
+from api.models.logic import get_top_level_statistics_by_uuid
 from api.models.meta_adaptor import MetaAdaptor
+from api.schemas.statistics import (
+    genome_stats_document,
+    genome_stats_document_from_values,
+)
 from api.config import DB_URL
 from ensembl.utils.database import DBConnection
 import logging
@@ -79,6 +87,80 @@ def test_get_genome_groups():
     ]
 
 
+def test_get_genome_groups_statement_is_cached(benchmark):
+    # Warm the lambda statement cache, then measure the steady-state cost.
+    first = adaptor.fetch_genome_groups()
+    assert benchmark(adaptor.fetch_genome_groups) == first
+
+
+def genome_with_unpublished_dataset():
+    # A genome with attributes from a dataset that is not released yet, or
+    # linked to a release that is not
+    with meta_conn.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT g.genome_uuid FROM genome g "
+                "JOIN genome_dataset gd ON gd.genome_id = g.genome_id "
+                "JOIN dataset d ON d.dataset_id = gd.dataset_id "
+                "JOIN ensembl_release r ON r.release_id = gd.release_id "
+                "JOIN dataset_attribute da ON da.dataset_id = d.dataset_id "
+                "WHERE d.status <> 'Released' OR r.status <> 'Released' "
+                "ORDER BY g.genome_uuid LIMIT 1"
+            )
+        ).scalar()
+
+
+@pytest.mark.parametrize(
+    "genome_uuid",
+    ["a7335667-93e7-11ec-a39d-005056b38ce3", "unpublished dataset"],
+)
+def test_get_genome_statistics_matches_genome_adaptor(genome_uuid):
+    if genome_uuid == "unpublished dataset":
+        genome_uuid = genome_with_unpublished_dataset()
+        if genome_uuid is None:
+            pytest.skip("No genome with an unpublished dataset in the test DB")
+    genome_adaptor = GenomeAdaptor(meta_conn, meta_conn)
+
+    statistic_values = adaptor.fetch_genome_statistics(genome_uuid)
+
+    assert statistic_values
+    assert genome_stats_document_from_values(statistic_values) == genome_stats_document(
+        get_top_level_statistics_by_uuid(genome_adaptor, genome_uuid)
+    )
+
+
+def test_get_genome_statistics_breaks_ties_within_a_release(tmp_path):
+    # The same attribute twice in one release: the row with the highest
+    # dataset_attribute_id wins, whatever the storage order
+    db_conn = DBConnection(f"duckdb:///{tmp_path / 'ties.db'}", reflect=False)
+    with db_conn.begin() as conn:
+        for statement in (
+            "CREATE TABLE genome (genome_id INTEGER, genome_uuid VARCHAR)",
+            "CREATE TABLE genome_dataset (genome_dataset_id INTEGER, "
+            "genome_id INTEGER, dataset_id INTEGER, release_id INTEGER)",
+            "CREATE TABLE ensembl_release (release_id INTEGER, version DECIMAL, "
+            "status VARCHAR)",
+            "CREATE TABLE dataset (dataset_id INTEGER, status VARCHAR)",
+            "CREATE TABLE dataset_attribute (dataset_attribute_id INTEGER, "
+            "dataset_id INTEGER, attribute_id INTEGER, value VARCHAR)",
+            "CREATE TABLE attribute (attribute_id INTEGER, name VARCHAR)",
+            "INSERT INTO genome VALUES (1, 'genome-1')",
+            "INSERT INTO genome_dataset VALUES (1, 1, 1, 1), (2, 1, 2, 1)",
+            "INSERT INTO ensembl_release VALUES (1, 110, 'Released')",
+            "INSERT INTO dataset VALUES (1, 'Released'), (2, 'Released')",
+            "INSERT INTO dataset_attribute VALUES (2, 2, 1, 'newer'), "
+            "(1, 1, 1, 'older')",
+            "INSERT INTO attribute VALUES (1, 'coding_genes')",
+        ):
+            conn.execute(text(statement))
+
+    for _ in range(5):
+        assert MetaAdaptor(db_conn).fetch_genome_statistics("genome-1") == {
+            "coding_genes": "newer"
+        }
+    db_conn.dispose()
+
+
 def test_get_genome_group_members():
 
     data = adaptor.fetch_genome_group_members(13)
@@ -0,0 +1,92 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import duckdb
+
+from api.models.regions import create_assembly_region, sort_top_level_regions
+
+GENOME_REGIONS_SQL = Path(__file__).parents[3] / "sql" / "020_create_genome_regions.sql"
+
+# name, chromosome_rank, md5, length, sha512t24u, chromosomal, type, is_circular
+SEQUENCES = {
+    1: [
+        ("2", 2, "md5-2", 2000, "sha-2", 1, "primary_assembly", 0),
+        ("1", 1, "md5-1", 3000, "sha-1", 1, "chromosome", 0),
+        ("MT", None, "md5-mt", 16, "sha-mt", 1, "chromosome", 1),
+        ("Y", None, "md5-y", 500, "sha-y", 1, "chromosome", None),
+        ("KI270728.1", None, "md5-ki", 1872759, "sha-ki", 0, "scaffold", 0),
+    ],
+    2: [
+        ("Pt", 2, "md5-pt", 154478, "sha-pt", 1, "chloroplast", 1),
+        ("III", 1, "md5-iii", 23459830, "sha-iii", 1, "chromosome", None),
+    ],
+}
+GENOMES = {"genome-1": 1, "genome-2": 2, "genome-3": 1}
+
+
+def build_genome_regions(path):
+    conn = duckdb.connect(str(path))
+    conn.execute("create table genome (genome_uuid varchar, assembly_id integer)")
+    conn.execute(
+        "create table assembly_sequence (assembly_id integer, name varchar, "
+        "chromosome_rank integer, md5 varchar, length bigint, sha512t24u varchar, "
+        "chromosomal tinyint, type varchar, is_circular tinyint)"
+    )
+    conn.executemany("insert into genome values (?, ?)", list(GENOMES.items()))
+    conn.executemany(
+        "insert into assembly_sequence values (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (assembly_id, *row)
+            for assembly_id in SEQUENCES
+            for row in SEQUENCES[assembly_id]
+        ],
+    )
+    # The script is written for the duckdb CLI: drop its comments and dot
+    # commands
+    script = "\n".join(
+        line
+        for line in GENOME_REGIONS_SQL.read_text().splitlines()
+        if not line.startswith(("#", "."))
+    )
+    for statement in script.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+    return conn
+
+
+def records(conn, sql, *parameters):
+    cursor = conn.execute(sql, parameters)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def test_karyotype_table_matches_the_live_regions(tmp_path):
+    conn = build_genome_regions(tmp_path / "regions.db")
+
+    for genome_uuid, assembly_id in GENOMES.items():
+        # As fetch_sequences(chromosomal_only=True) and get_top_level_regions
+        sequences = records(
+            conn,
+            "select * exclude (assembly_id) from assembly_sequence "
+            "where assembly_id = ? and chromosomal = 1 order by name",
+            assembly_id,
+        )
+        live = [
+            create_assembly_region(
+                SimpleNamespace(AssemblySequence=SimpleNamespace(**sequence))
+            )
+            for sequence in sequences
+        ]
+        sort_top_level_regions(live)
+        # As MetaAdaptor.fetch_karyotype
+        precomputed = records(
+            conn,
+            "select name, chromosome_rank as rank, md5, length, sha512t24u, "
+            "chromosomal, type as sequence_type, is_circular "
+            "from genome_karyotype where genome_uuid = ? order by region_order",
+            genome_uuid,
+        )
+
+        assert precomputed == live
+    assert [region["name"] for region in live] == ["1", "2", "MT", "Y"]
+    conn.close()
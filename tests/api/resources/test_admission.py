@@ -0,0 +1,153 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+
+import httpx
+from fastapi import APIRouter, FastAPI, Request
+
+import api.resources.redis as redis_resource
+from api.resources.admission import (
+    AdmissionControlMiddleware,
+    RouteLimiter,
+    parse_route_limits,
+)
+from api.resources.redis import redis_cache
+
+router = APIRouter(prefix="/metadata")
+# Set by each test: the routes wait on it, to hold their slot
+release_requests: asyncio.Event
+
+
+@router.get("/genome/{genome_uuid}/details", name="genome_details")
+async def genome_details(genome_uuid: str):
+    await release_requests.wait()
+    return {"genome_id": genome_uuid}
+
+
+@router.get("/releases", name="get_releases")
+@redis_cache(key_prefix="releases")
+async def releases(request: Request):
+    await release_requests.wait()
+    return []
+
+
+def make_app(route_limits):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        routes=router.routes,
+        prefix="/api",
+        route_limits=route_limits,
+    )
+    return app
+
+
+async def get_all(app, urls):
+    """GET urls concurrently, letting the routes finish once all have arrived."""
+    global release_requests
+    release_requests = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        requests = [asyncio.create_task(client.get(url)) for url in urls]
+        await asyncio.sleep(0.05)
+        release_requests.set()
+        return await asyncio.gather(*requests)
+
+
+DETAILS_URL = "/api/metadata/genome/a7335667/details"
+
+
+def test_parse_route_limits():
+    assert parse_route_limits(["genome_details=4/8", " releases = 2"]) == {
+        "genome_details": (4, 8),
+        "releases": (2, 32),
+    }
+
+
+def test_limiter_hands_slots_over_to_queued_requests():
+    async def scenario():
+        limiter = RouteLimiter("test_route", concurrency=1, queue_size=1)
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # The queue is full
+        assert not await limiter.acquire()
+        limiter.release()
+        assert await queued
+        assert limiter.active == 1
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_limiter_rejects_after_queue_timeout():
+    async def scenario():
+        limiter = RouteLimiter(
+            "test_route", concurrency=1, queue_size=1, queue_timeout=0.01
+        )
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        limiter.release()
+        assert limiter.active == 0
+        assert await limiter.acquire()
+
+    asyncio.run(scenario())
+
+
+def test_requests_beyond_concurrency_and_queue_are_shed():
+    app = make_app({"genome_details": (1, 1)})
+
+    responses = asyncio.run(get_all(app, [DETAILS_URL] * 3))
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 503]
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert rejected.headers["retry-after"] == "1"
+
+
+def test_routes_have_separate_limits():
+    app = make_app({"genome_details": (1, 0)})
+
+    responses = asyncio.run(
+        get_all(app, [DETAILS_URL, DETAILS_URL, "/api/metadata/releases"])
+    )
+
+    assert [response.status_code for response in responses] == [200, 503, 200]
+
+
+def test_cached_responses_are_always_admitted(monkeypatch):
+    async def get_cached_value(key):
+        return b"[]"
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(redis_resource, "ENABLE_COMPRESSION", False)
+    monkeypatch.setattr(redis_resource.redis_client, "get", get_cached_value)
+    app = make_app({"get_releases": (1, 0)})
+
+    responses = asyncio.run(get_all(app, ["/api/metadata/releases"] * 3))
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+
+
+def test_cache_misses_over_the_limit_are_shed():
+    app = make_app({"get_releases": (1, 0)})
+
+    responses = asyncio.run(get_all(app, ["/api/metadata/releases"] * 2))
+
+    assert [response.status_code for response in responses] == [200, 503]
@@ -0,0 +1,135 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.resources.compression import (
+    ENCODERS,
+    CompressionMiddleware,
+    compress,
+    encoding_headers,
+    negotiate,
+)
+from api.resources.json_responses import dumps
+from tests.api.resources.test_json_responses import GENOME_DETAILS, STATS_DOCUMENT
+
+LARGE = {
+    "genomes": [
+        {
+            **GENOME_DETAILS,
+            "genome_id": f"a7335667-93e7-11ec-a39d-{index:012d}",
+            "related_assemblies_count": index,
+        }
+        for index in range(20)
+    ]
+}
+
+app = FastAPI()
+
+
+@app.get("/large")
+async def large():
+    return JSONResponse(LARGE, headers={"etag": '"abc"'})
+
+
+@app.get("/small")
+async def small():
+    return JSONResponse({"status": "ok"})
+
+
+@app.get("/stream")
+async def stream():
+    return StreamingResponse(
+        (dumps(genome) + b"\n" for genome in LARGE["genomes"]),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get("/precompressed")
+async def precompressed():
+    return PlainTextResponse(
+        gzip.compress(b"x" * 2048),
+        headers={**encoding_headers("gzip"), "etag": '"abc"'},
+        media_type="application/json",
+    )
+
+
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+client = TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip, deflate", "gzip"),
+        ("GZIP;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", next(iter(ENCODERS))),
+        ("*;q=0.1, gzip;q=0.9", "gzip"),
+        ("deflate;q=1, gzip;q=oops", None),
+    ],
+)
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding) == expected
+
+
+def test_large_json_is_compressed():
+    response = client.get("/large", headers={"accept-encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.headers["etag"] == 'W/"abc"'
+    assert int(response.headers["content-length"]) < len(dumps(LARGE))
+    assert response.json() == LARGE
+
+
+def test_uncompressed_responses():
+    small_response = client.get("/small", headers={"accept-encoding": "gzip"})
+    no_gzip = client.get("/large", headers={"accept-encoding": "identity"})
+    stream_response = client.get("/stream", headers={"accept-encoding": "gzip"})
+
+    assert "content-encoding" not in small_response.headers
+    assert "content-encoding" not in no_gzip.headers
+    assert no_gzip.headers["etag"] == '"abc"'
+    assert "content-encoding" not in stream_response.headers
+    assert len(stream_response.text.splitlines()) == len(LARGE["genomes"])
+
+
+def test_precompressed_response_is_passed_through():
+    response = client.get("/precompressed", headers={"accept-encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.content == b"x" * 2048
+
+
+@pytest.mark.parametrize("encoding", list(ENCODERS))
+@pytest.mark.parametrize("cached", [False, True], ids=["on_the_fly", "cached"])
+@pytest.mark.parametrize(
+    "document", [STATS_DOCUMENT, LARGE], ids=["stats", "genomes_list"]
+)
+@pytest.mark.benchmark(group="compression")
+def test_compression_benchmark(benchmark, encoding, cached, document):
+    body = dumps(document)
+    compressed = benchmark(compress, body, encoding, cached)
+    benchmark.extra_info["size"] = len(body)
+    benchmark.extra_info["ratio"] = round(len(compressed) / len(body), 3)
@@ -0,0 +1,69 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from fastapi.testclient import TestClient
+
+from api.dependencies import Dependencies
+from api.main import app
+
+import api.resources.health as health_resource
+
+client = TestClient(app)
+
+
+def test_liveness():
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_when_database_is_warm(monkeypatch):
+    monkeypatch.setattr(health_resource, "ENABLE_REDIS_CACHE", False)
+    Dependencies.startup()
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "ready",
+        "database": {"connected": True, "warmed": True, "error": None},
+        "redis": {"enabled": False, "reachable": None, "latency_ms": None},
+    }
+
+
+def test_readiness_before_startup(monkeypatch):
+    monkeypatch.setattr(health_resource, "ENABLE_REDIS_CACHE", False)
+    Dependencies.shutdown()
+
+    response = client.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+    assert response.json()["database"]["connected"] is False
+
+
+def test_readiness_reports_redis_latency(monkeypatch):
+    async def ping():
+        return True
+
+    monkeypatch.setattr(health_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(health_resource.redis_client, "ping", ping)
+    Dependencies.startup()
+
+    redis_status = client.get("/health/ready").json()["redis"]
+
+    assert redis_status["enabled"] is True
+    assert redis_status["reachable"] is True
+    assert redis_status["latency_ms"] >= 0
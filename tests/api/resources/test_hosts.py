@@ -0,0 +1,53 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import pytest
+
+from api.resources.hosts import normalise_host
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("beta.ensembl.org", "beta.ensembl.org"),
+        ("BETA.Ensembl.org.", "beta.ensembl.org"),
+        ("localhost:8000", "localhost:8000"),
+        ("[::1]:8000", "[::1]:8000"),
+        ("beta.ensembl.org/static", None),
+        ('beta.ensembl.org"><script>', None),
+        ("beta..ensembl.org", None),
+        ("beta.ensembl.org:123456", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_normalise_host(host, expected):
+    assert normalise_host(host, ["*"]) == expected
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("beta.ensembl.org", "beta.ensembl.org"),
+        ("ensembl.org", None),
+        ("localhost:8000", "localhost:8000"),
+        ("localhost:9000", None),
+        ("testserver", "testserver"),
+        ("evil.example.com", None),
+    ],
+)
+def test_normalise_host_checks_allowed_hosts(host, expected):
+    allowed_hosts = ["*.ensembl.org", "http://localhost:8000", "testserver"]
+    assert normalise_host(host, allowed_hosts) == expected
@@ -0,0 +1,153 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import os
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from api.resources.http_cache import ConditionalRequestMiddleware, DataGeneration
+
+calls = []
+
+router = APIRouter(prefix="/metadata")
+
+
+@router.get("/genome/{genome_uuid}/details", name="genome_details")
+async def genome_details(genome_uuid: str):
+    calls.append(genome_uuid)
+    if genome_uuid == "missing":
+        return JSONResponse({"detail": "not found"}, status_code=404)
+    return {"genome_id": genome_uuid}
+
+
+@router.get("/releases", name="get_releases")
+async def releases():
+    calls.append("releases")
+    return []
+
+
+def make_client(generation_tag="1"):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    generation = DataGeneration(
+        generation_tag, datetime(2025, 2, 1, 12, 0, tzinfo=timezone.utc)
+    )
+    app.add_middleware(
+        ConditionalRequestMiddleware,
+        routes=router.routes,
+        prefix="/api",
+        generation=generation,
+    )
+    return TestClient(app)
+
+
+DETAILS_URL = "/api/metadata/genome/a7335667/details"
+
+
+def test_responses_get_validators_and_route_cache_control():
+    client = make_client()
+
+    details = client.get(DETAILS_URL)
+    releases = client.get("/api/metadata/releases")
+
+    assert details.status_code == 200
+    assert details.headers["etag"].startswith('"')
+    assert details.headers["last-modified"] == "Sat, 01 Feb 2025 12:00:00 GMT"
+    assert details.headers["cache-control"] == "public, max-age=3600"
+    assert releases.headers["cache-control"] == "public, max-age=300"
+    assert releases.headers["etag"] != details.headers["etag"]
+
+
+def test_if_none_match_is_answered_without_calling_the_route():
+    client = make_client()
+    response_etag = client.get(DETAILS_URL).headers["etag"]
+    calls.clear()
+
+    response = client.get(DETAILS_URL, headers={"if-none-match": response_etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == response_etag
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert calls == []
+
+
+def test_if_none_match_uses_weak_comparison():
+    client = make_client()
+    response_etag = client.get(DETAILS_URL).headers["etag"]
+
+    response = client.get(
+        DETAILS_URL, headers={"if-none-match": f'"other", W/{response_etag}'}
+    )
+
+    assert response.status_code == 304
+
+
+def test_etag_depends_on_params_representation_and_generation():
+    client = make_client()
+    response_etag = client.get(DETAILS_URL).headers["etag"]
+
+    assert client.get(DETAILS_URL + "?x=1").headers["etag"] != response_etag
+    assert (
+        client.get(DETAILS_URL, headers={"accept": "application/x-ndjson"}).headers[
+            "etag"
+        ]
+        != response_etag
+    )
+    stale = make_client(generation_tag="2").get(
+        DETAILS_URL, headers={"if-none-match": response_etag}
+    )
+    assert stale.status_code == 200
+    assert stale.headers["etag"] != response_etag
+
+
+def test_if_modified_since():
+    client = make_client()
+
+    not_modified = client.get(
+        DETAILS_URL, headers={"if-modified-since": "Sat, 01 Feb 2025 12:00:00 GMT"}
+    )
+    modified = client.get(
+        DETAILS_URL, headers={"if-modified-since": "Fri, 31 Jan 2025 12:00:00 GMT"}
+    )
+
+    assert not_modified.status_code == 304
+    assert modified.status_code == 200
+
+
+def test_errors_get_no_validators():
+    response = make_client().get("/api/metadata/genome/missing/details")
+
+    assert response.status_code == 404
+    assert "etag" not in response.headers
+    assert "cache-control" not in response.headers
+
+
+def test_data_generation_follows_the_db_file(tmp_path):
+    db_file = tmp_path / "duck_meta.db"
+    db_file.write_bytes(b"generation 1")
+    first = DataGeneration.from_db_url(f"duckdb:///{db_file}")
+
+    mtime_ns = os.stat(db_file).st_mtime_ns
+    db_file.write_bytes(b"generation 2!")
+    os.utime(db_file, ns=(mtime_ns, mtime_ns + 1_000_000_000))
+    second = DataGeneration.from_db_url(f"duckdb:///{db_file}")
+
+    assert first.tag != second.tag
+    assert DataGeneration.from_db_url("duckdb:///:memory:") is None
+    assert DataGeneration.from_db_url(f"duckdb:///{tmp_path / 'missing.db'}") is None
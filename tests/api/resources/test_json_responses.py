@@ -0,0 +1,110 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+from fastapi.responses import JSONResponse
+
+import api.resources.json_responses as json_responses
+from api.resources.json_responses import APIJSONResponse, dumps
+from api.schemas.statistics import GenomeStatistics, genome_stats_document_from_values
+
+STATS_DOCUMENT = genome_stats_document_from_values(
+    {
+        name: str(value)
+        for value, name in enumerate(
+            alias
+            for model in GenomeStatistics.model_fields.values()
+            for field in model.annotation.model_fields.values()
+            for alias in field.validation_alias.choices[:1]
+        )
+    }
+)
+
+GENOME_DETAILS = {
+    "genome_id": "a7335667-93e7-11ec-a39d-005056b38ce3",
+    "created": "2023-09-22 15:04:45",
+    "assembly": {
+        "accession": "GCA_000001405.29",
+        "name": "GRCh38.p14",
+        "ucsc_name": "hg38",
+        "level": "chromosome",
+        "ensembl_name": "GRCh38.p14",
+        "is_reference": True,
+        "url": "https://identifiers.org/insdc.gca/GCA_000001405.29",
+    },
+    "taxonomy_id": "9606",
+    "scientific_name": "Homo sapiens",
+    "common_name": "Human",
+    "alternative_names": ["human", "man", "Homo sapiens Linnaeus, 1758"],
+    "release": {"name": "2025-02", "type": "integrated", "version": 113.2},
+    "attributes_info": {
+        "genebuild_method": "import",
+        "genebuild_provider_name": "Ensembl – EMBL-EBI",
+        "assembly_provider_url": "https://www.ncbi.nlm.nih.gov/assembly/",
+    },
+    "related_assemblies_count": 42,
+    "available_datasets": ["assembly", "genebuild", "homologies", "variation"],
+}
+
+
+def test_dumps_matches_stdlib_encoding(monkeypatch):
+    content = {
+        **GENOME_DETAILS,
+        "uuid": uuid.UUID(GENOME_DETAILS["genome_id"]),
+        "date": datetime.datetime(2025, 2, 1, 12, 30),
+    }
+    rendered = dumps(content)
+
+    monkeypatch.setattr(json_responses, "orjson", None)
+
+    assert dumps(content) == rendered
+    assert dumps(STATS_DOCUMENT) == JSONResponse(STATS_DOCUMENT).body
+    assert json.loads(rendered)["uuid"] == GENOME_DETAILS["genome_id"]
+    assert json.loads(rendered)["date"] == "2025-02-01T12:30:00"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_writes_nan_and_infinities_as_null(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(json_responses, "orjson", None)
+    content = {
+        "gc_percentage": float("nan"),
+        "values": [1.5, float("inf"), (float("-inf"),)],
+        "ratio": decimal.Decimal("NaN"),
+    }
+
+    assert (
+        dumps(content)
+        == b'{"gc_percentage":null,"values":[1.5,null,[null]],"ratio":null}'
+    )
+
+
+@pytest.mark.parametrize("response_class", [JSONResponse, APIJSONResponse])
+@pytest.mark.benchmark(group="render stats")
+def test_render_stats_document(benchmark, response_class):
+    assert benchmark(response_class, STATS_DOCUMENT).body == dumps(STATS_DOCUMENT)
+
+
+@pytest.mark.parametrize("response_class", [JSONResponse, APIJSONResponse])
+@pytest.mark.benchmark(group="render details")
+def test_render_genome_details(benchmark, response_class):
+    assert benchmark(response_class, GENOME_DETAILS).body == dumps(GENOME_DETAILS)
@@ -0,0 +1,132 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+import marshal
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from starlette.datastructures import Secret
+
+import api.resources.profiling as profiling
+from api.resources.profiling import ProfilingMiddleware, router as profiling_router
+
+router = APIRouter(prefix="/metadata")
+
+
+def busy_lookup():
+    deadline = time.perf_counter() + 0.02
+    while time.perf_counter() < deadline:
+        pass
+
+
+@router.get("/releases", name="get_releases")
+async def releases():
+    busy_lookup()
+    return []
+
+
+AUTHORIZED = {"authorization": "Bearer s3cret"}
+
+
+@pytest.fixture(autouse=True)
+def profiling_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", Secret("s3cret"))
+
+
+def get(url, headers=None):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.include_router(profiling_router)
+    app.add_middleware(ProfilingMiddleware)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.get(url, headers=headers)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{}, {"authorization": "Bearer wrong"}, {"authorization": "Basic s3cret"}],
+)
+def test_profiles_need_the_token(headers):
+    assert get("/debug/profile?seconds=0.1", headers).status_code == 403
+    response = get("/api/metadata/releases", {"x-profile": "text", **headers})
+    assert response.status_code == 403
+
+
+def test_profiling_is_off_without_a_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", Secret(""))
+    assert get("/debug/profile?seconds=0.1", AUTHORIZED).status_code == 403
+
+
+def test_wall_profile_in_speedscope_format():
+    response = get("/debug/profile?seconds=0.2", AUTHORIZED)
+    assert response.status_code == 200
+    profile = response.json()
+    assert profile["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    frames = profile["shared"]["frames"]
+    assert profile["profiles"]
+    for thread_profile in profile["profiles"]:
+        assert len(thread_profile["samples"]) == len(thread_profile["weights"])
+        assert all(0 <= i < len(frames) for s in thread_profile["samples"] for i in s)
+
+
+def test_wall_profile_as_collapsed_stacks():
+    response = get("/debug/profile?seconds=0.2&format=collapsed", AUTHORIZED)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+def test_profile_duration_is_bounded():
+    seconds = profiling.PROFILING_MAX_SECONDS + 1
+    assert get(f"/debug/profile?seconds={seconds}", AUTHORIZED).status_code == 422
+
+
+def test_cpu_profile_is_a_pstats_dump():
+    response = get("/debug/profile?seconds=0.1&mode=cpu", AUTHORIZED)
+    assert response.status_code == 200
+    assert "profile.pstats" in response.headers["content-disposition"]
+    assert isinstance(marshal.loads(response.content), dict)
+
+
+def test_request_profile_replaces_the_response():
+    response = get("/api/metadata/releases", {"x-profile": "text", **AUTHORIZED})
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "200"
+    assert "busy_lookup" in response.text
+
+
+def test_request_profile_as_pstats():
+    response = get("/api/metadata/releases", {"x-profile": "pstats", **AUTHORIZED})
+    stats = marshal.loads(response.content)
+    assert any(function == "busy_lookup" for _, _, function in stats)
+
+
+def test_requests_without_the_header_are_not_profiled():
+    response = get("/api/metadata/releases", AUTHORIZED)
+    assert response.json() == []
+    assert "x-profiled-status" not in response.headers
@@ -0,0 +1,220 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from api.resources.rate_limit import (
+    RateLimitMiddleware,
+    RateLimiter,
+    client_id,
+    parse_networks,
+    parse_rate_limits,
+)
+
+router = APIRouter(prefix="/metadata")
+
+
+@router.get("/validate_location", name="validate_location")
+async def validate_location(location: str):
+    return {"location": location}
+
+
+@router.get("/releases", name="get_releases")
+async def releases():
+    return []
+
+
+def make_client(rate_limits, api_keys=()):
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes=router.routes,
+        prefix="/api",
+        rate_limits=rate_limits,
+        api_keys=api_keys,
+        trusted_proxies=(),
+    )
+    return TestClient(app)
+
+
+VALIDATE_URL = "/api/metadata/validate_location?location=1:1-10"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """The pipelined INCRBY and EXPIRE of RateLimiter._sync."""
+
+    def __init__(self):
+        self.counters = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incrby(self, key, amount):
+        self.commands.append((key, amount))
+
+    def expire(self, key, seconds):
+        self.commands.append(None)
+
+    async def execute(self):
+        results = []
+        for command in self.commands:
+            if command is None:
+                results.append(True)
+            else:
+                key, amount = command
+                counters = self.redis_client.counters
+                counters[key] = counters.get(key, 0) + amount
+                results.append(counters[key])
+        return results
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits(["validate_location=10/40", " genomeid = 2.5"]) == {
+        "validate_location": (10.0, 40),
+        "genomeid": (2.5, 3),
+    }
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    clock = Clock()
+    limiter = RateLimiter("test_route", rate=2, burst=3, clock=clock)
+
+    decisions = [limiter.hit("ip:1.2.3.4") for _ in range(4)]
+
+    assert [decision.allowed for decision in decisions] == [True, True, True, False]
+    assert decisions[2].remaining == 0
+    assert decisions[3].reset == 2
+    assert decisions[3].retry_after == 1
+    # Other clients have their own bucket
+    assert limiter.hit("ip:5.6.7.8").allowed
+    clock.now = 0.5
+    assert limiter.hit("ip:1.2.3.4").allowed
+    assert not limiter.hit("ip:1.2.3.4").allowed
+
+
+def test_least_recently_used_buckets_are_dropped():
+    limiter = RateLimiter("test_route", rate=1, burst=1, max_clients=2, clock=Clock())
+    for client in ("a", "b", "c"):
+        limiter.hit(client)
+
+    assert list(limiter.buckets) == ["b", "c"]
+
+
+def test_requests_over_the_limit_get_429_and_rate_limit_headers():
+    client = make_client({"validate_location": (1, 2)})
+
+    responses = [client.get(VALIDATE_URL) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[0].headers["ratelimit-limit"] == "2"
+    assert responses[0].headers["ratelimit-remaining"] == "1"
+    assert responses[2].headers["retry-after"] == "1"
+    assert "retry-after" not in responses[0].headers
+
+
+def test_routes_without_limit_and_api_keys_are_limited_apart():
+    client = make_client({"validate_location": (1, 1)}, api_keys=["ensembl"])
+
+    assert client.get(VALIDATE_URL).status_code == 200
+    assert client.get(VALIDATE_URL).status_code == 429
+    keyed = client.get(VALIDATE_URL, headers={"x-api-key": "ensembl"})
+    assert keyed.status_code == 200
+    # A key nobody issued does not get a bucket of its own
+    unknown = client.get(VALIDATE_URL, headers={"x-api-key": "made-up"})
+    assert unknown.status_code == 429
+    releases = client.get("/api/metadata/releases")
+    assert releases.status_code == 200
+    assert "ratelimit-limit" not in releases.headers
+
+
+def test_clients_over_the_cluster_allowance_are_refused():
+    redis_client = FakeRedis()
+
+    async def scenario():
+        limiter = RateLimiter(
+            "test_route", rate=1, burst=5, redis_client=redis_client, window=3600
+        )
+        assert limiter.hit("ip:1.2.3.4").allowed
+        await asyncio.gather(*limiter._sync_tasks)
+        # Other workers used up the window's allowance (5 + 1 * 3600)
+        (key,) = redis_client.counters
+        redis_client.counters[key] += 3605
+        limiter.buckets["ip:1.2.3.4"].synced = float("-inf")
+        assert limiter.hit("ip:1.2.3.4").allowed
+        await asyncio.gather(*limiter._sync_tasks)
+        return limiter.hit("ip:1.2.3.4")
+
+    decision = asyncio.run(scenario())
+
+    assert not decision.allowed
+    assert decision.remaining == 0
+
+
+def request_scope(peer, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return {"type": "http", "client": (peer, 50000), "headers": headers}
+
+
+def test_client_ip_is_the_rightmost_untrusted_forwarded_for_address():
+    trusted = parse_networks(["10.0.0.0/8", "192.168.1.1"])
+
+    def client(peer, forwarded_for=None):
+        scope = request_scope(peer, forwarded_for)
+        return client_id(scope, Headers(scope=scope), trusted_proxies=trusted)
+
+    # The client prepends what it likes; the ingress appends the real peer
+    assert client("10.1.2.3", "6.6.6.6, 1.2.3.4") == "ip:1.2.3.4"
+    assert client("10.1.2.3", "6.6.6.6, 1.2.3.4, 192.168.1.1") == "ip:1.2.3.4"
+    assert client("10.1.2.3") == "ip:10.1.2.3"
+    # Untrusted peers cannot choose their address
+    assert client("1.2.3.4", "5.6.7.8") == "ip:1.2.3.4"
+    assert client("1.2.3.4", "5.6.7.8") == client("1.2.3.4")
+    scope = request_scope("10.1.2.3", "1.2.3.4")
+    assert client_id(scope, Headers(scope=scope)) == "ip:10.1.2.3"
+
+
+def test_only_issued_api_keys_identify_clients():
+    scope = request_scope("1.2.3.4")
+    scope["headers"].append((b"x-api-key", b"ensembl"))
+    headers = Headers(scope=scope)
+
+    keyed = client_id(scope, headers, api_keys=frozenset(["ensembl"]))
+    assert keyed.startswith("key:") and "ensembl" not in keyed
+    assert client_id(scope, headers) == "ip:1.2.3.4"
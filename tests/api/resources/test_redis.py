@@ -0,0 +1,202 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+import gzip
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from prometheus_client import REGISTRY
+
+import api.resources.redis as redis_resource
+from api.config import REDIS_MAX_CONNECTION
+from api.resources.redis import redis_cache
+
+calls = []
+
+
+@redis_cache("test_metrics", arg_keys=["genome_uuid"])
+async def handler(genome_uuid: str, request: Request | None = None):
+    calls.append(genome_uuid)
+    return JSONResponse({"genome_uuid": genome_uuid, "padding": "x" * 2000})
+
+
+def accepting(encoding):
+    return Request(
+        {"type": "http", "headers": [(b"accept-encoding", encoding.encode())]}
+    )
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        if self.redis_client.fail_setex:
+            raise ConnectionError("Redis is down")
+        self.redis_client.executions.append([key for key, _ in self.commands])
+        self.redis_client.cache.update(self.commands)
+
+
+class FakeRedis:
+    def __init__(self, fail_setex=False):
+        self.cache = {}
+        self.fail_setex = fail_setex
+        # Keys written by each pipeline execution
+        self.executions = []
+
+    async def get(self, key):
+        return self.cache.get(key)
+
+    async def mget(self, *keys):
+        return [self.cache.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def pttl(self, key):
+        return 300000 if key in self.cache else -2
+
+    async def psetex(self, key, ttl, value):
+        self.cache[key] = value
+
+
+def fake_redis(monkeypatch, fail_setex=False):
+    fake = FakeRedis(fail_setex)
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(redis_resource, "ENABLE_COMPRESSION", True)
+    for command in ("get", "mget", "pipeline", "pttl", "psetex"):
+        monkeypatch.setattr(
+            redis_resource.redis_client, command, getattr(fake, command)
+        )
+    return fake
+
+
+def test_hits_misses_and_sets_are_counted(monkeypatch):
+    fake_redis(monkeypatch)
+    labels = {"key_prefix": "test_metrics"}
+    hits = sample("redis_cache_hits_total", source="redis", **labels)
+    misses = sample("redis_cache_misses_total", **labels)
+    sets = sample("redis_cache_sets_total", **labels)
+    gets = sample("redis_cache_command_seconds_count", command="get", **labels)
+    payloads = sample("redis_cache_payload_bytes_sum", encoding="identity", **labels)
+
+    first = asyncio.run(handler(genome_uuid="a"))
+    second = asyncio.run(handler(genome_uuid="a"))
+
+    assert first.body == second.body
+    assert sample("redis_cache_hits_total", source="redis", **labels) == hits + 1
+    assert sample("redis_cache_misses_total", **labels) == misses + 1
+    assert sample("redis_cache_sets_total", **labels) == sets + 1
+    assert (
+        sample("redis_cache_command_seconds_count", command="get", **labels) == gets + 2
+    )
+    assert sample(
+        "redis_cache_payload_bytes_sum", encoding="identity", **labels
+    ) == payloads + len(first.body)
+
+
+def test_miss_caches_the_negotiated_variant_in_one_round_trip(monkeypatch):
+    fake = fake_redis(monkeypatch)
+    labels = {"key_prefix": "test_metrics"}
+    identity = sample("redis_cache_payload_bytes_sum", encoding="identity", **labels)
+    gzipped = sample("redis_cache_payload_bytes_sum", encoding="gzip", **labels)
+
+    asyncio.run(handler(genome_uuid="d", request=accepting("gzip")))
+
+    # The body and its gzip variant only, written by one pipeline
+    assert fake.executions == [["test_metrics\x00d", "test_metrics\x00d\x00gzip"]]
+    assert (
+        0
+        < sample("redis_cache_payload_bytes_sum", encoding="gzip", **labels) - gzipped
+        < sample("redis_cache_payload_bytes_sum", encoding="identity", **labels)
+        - identity
+    )
+
+
+def test_other_variants_are_filled_after_their_first_hit(monkeypatch):
+    fake = fake_redis(monkeypatch)
+    calls.clear()
+
+    async def requests():
+        await handler(genome_uuid="e")
+        first_hit = await handler(genome_uuid="e", request=accepting("gzip"))
+        await asyncio.gather(*redis_resource._fill_tasks.values())
+        second_hit = await handler(genome_uuid="e", request=accepting("gzip"))
+        return first_hit, second_hit
+
+    first_hit, second_hit = asyncio.run(requests())
+
+    assert calls == ["e"]
+    assert "content-encoding" not in first_hit.headers
+    assert second_hit.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(second_hit.body) == first_hit.body
+    assert fake.cache["test_metrics\x00e\x00gzip"] == second_hit.body
+
+
+def test_failed_set_serves_the_response_once(monkeypatch):
+    fake_redis(monkeypatch, fail_setex=True)
+    errors = sample(
+        "redis_cache_errors_total", key_prefix="test_metrics", operation="set"
+    )
+    calls.clear()
+
+    response = asyncio.run(handler(genome_uuid="b"))
+
+    assert response.status_code == 200
+    assert calls == ["b"]
+    assert (
+        sample("redis_cache_errors_total", key_prefix="test_metrics", operation="set")
+        == errors + 1
+    )
+
+
+def test_bypasses_are_counted(monkeypatch):
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", False)
+    labels = {"key_prefix": "test_metrics", "reason": "disabled"}
+    bypasses = sample("redis_cache_bypasses_total", **labels)
+
+    asyncio.run(handler(genome_uuid="c"))
+
+    assert sample("redis_cache_bypasses_total", **labels) == bypasses + 1
+
+
+def test_pool_usage_is_exported():
+    assert sample("redis_pool_max_connections") == int(REDIS_MAX_CONNECTION)
+    assert sample("redis_pool_in_use_connections") == 0
+
+
+def test_pool_gauges_survive_a_pool_without_private_counters(monkeypatch):
+    class Pool:
+        max_connections = 1
+
+    monkeypatch.setattr(redis_resource, "redis_pool", Pool())
+
+    assert sample("redis_pool_in_use_connections") == 0
+    assert sample("redis_pool_idle_connections") == 0
@@ -0,0 +1,130 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+import gzip
+import os
+
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+import api.resources.redis as redis_resource
+from api.resources.compression import variant_key
+from api.resources.redis import redis_cache
+from api.resources.response_bundle import (
+    ResponseBundle,
+    close_response_bundle,
+    get_bundled_response,
+    open_response_bundle,
+    write_response_bundle,
+)
+
+GENOME_UUID = "a7335667-93e7-11ec-a39d-005056b38ce3"
+
+
+def test_bundle_round_trip_deduplicates_bodies(tmp_path):
+    path = os.fspath(tmp_path / "responses.bundle")
+    count = write_response_bundle(
+        path,
+        [
+            ("stats\x00a", b'{"genome_stats":{}}'),
+            ("stats\x00b", b'{"genome_stats":{}}'),
+            ("genome_counts\x00None", b'{"counts":[]}'),
+        ],
+        {"version": "test"},
+    )
+
+    bundle = ResponseBundle(path)
+    assert count == len(bundle) == 3
+    assert bundle.metadata == {"version": "test"}
+    assert bundle.get("stats\x00b") == b'{"genome_stats":{}}'
+    assert bundle.get("genome_counts\x00None") == b'{"counts":[]}'
+    assert bundle.get("stats\x00c") is None
+    # Identical bodies are stored once
+    assert os.path.getsize(path) < 2 * len(b'{"genome_stats":{}}') + 200
+    bundle.close()
+
+
+def test_bundle_of_another_data_generation_is_not_served(tmp_path):
+    path = os.fspath(tmp_path / "responses.bundle")
+    key = "stats\x00" + GENOME_UUID
+    write_response_bundle(path, [(key, b"{}")], {"data_generation": "1.0:100:1"})
+
+    open_response_bundle(path, "1.0:100:2")
+    try:
+        assert get_bundled_response(key) is None
+    finally:
+        close_response_bundle()
+    open_response_bundle(path, "1.0:100:1")
+    try:
+        assert get_bundled_response(key) == b"{}"
+    finally:
+        close_response_bundle()
+
+
+def test_redis_cache_serves_bundle_before_redis(tmp_path, monkeypatch):
+    path = os.fspath(tmp_path / "responses.bundle")
+    write_response_bundle(path, [("stats\x00" + GENOME_UUID, b'{"bundled":true}')])
+    calls = []
+
+    @redis_cache("stats", arg_keys=["genome_uuid"])
+    async def handler(genome_uuid: str):
+        calls.append(genome_uuid)
+        return JSONResponse({"bundled": False})
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", False)
+    open_response_bundle(path, None)
+    try:
+        hit = asyncio.run(handler(genome_uuid=GENOME_UUID))
+        miss = asyncio.run(handler(genome_uuid="other"))
+    finally:
+        close_response_bundle()
+
+    assert hit.body == b'{"bundled":true}'
+    assert miss.body == b'{"bundled":false}'
+    assert calls == ["other"]
+
+
+def test_redis_cache_serves_bundled_compressed_variant(tmp_path, monkeypatch):
+    path = os.fspath(tmp_path / "responses.bundle")
+    key = "stats\x00" + GENOME_UUID
+    body = b'{"bundled":true}'
+    write_response_bundle(
+        path, [(key, body), (variant_key(key, "gzip"), gzip.compress(body))]
+    )
+
+    @redis_cache("stats", arg_keys=["genome_uuid"])
+    async def handler(request: Request, genome_uuid: str):
+        return JSONResponse({"bundled": False})
+
+    def request(accept_encoding):
+        headers = [(b"accept-encoding", accept_encoding.encode())]
+        return Request({"type": "http", "headers": headers})
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", False)
+    monkeypatch.setattr(redis_resource, "ENABLE_COMPRESSION", True)
+    open_response_bundle(path, None)
+    try:
+        compressed = asyncio.run(
+            handler(request=request("gzip"), genome_uuid=GENOME_UUID)
+        )
+        plain = asyncio.run(handler(request=request(""), genome_uuid=GENOME_UUID))
+    finally:
+        close_response_bundle()
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(compressed.body) == body
+    assert "content-encoding" not in plain.headers
+    assert plain.body == body
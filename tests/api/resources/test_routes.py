@@ -13,6 +13,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 #
+import json
 import unittest
 from fastapi.testclient import TestClient
 
@@ -399,14 +400,41 @@ def test_get_releases(benchmark):
     benchmark(runnable)
 
 
-def test_get_releases_cache_varies_by_current_only(monkeypatch):
+def fake_redis_cache(monkeypatch):
+    """Enable redis_cache on an in-memory dict standing in for Redis."""
     cache = {}
 
     async def get_cached_value(key):
         return cache.get(key)
 
-    async def set_cached_value(key, ttl, value):
-        cache[key] = value
+    async def get_cached_values(*keys):
+        return [cache.get(key) for key in keys]
+
+    class Pipeline:
+        def __init__(self, transaction=True):
+            self.commands = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        def setex(self, key, ttl, value):
+            self.commands.append((key, value))
+
+        async def execute(self):
+            cache.update(self.commands)
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(redis_resource.redis_client, "get", get_cached_value)
+    monkeypatch.setattr(redis_resource.redis_client, "mget", get_cached_values)
+    monkeypatch.setattr(redis_resource.redis_client, "pipeline", Pipeline)
+    return cache
+
+
+def test_get_releases_cache_varies_by_current_only(monkeypatch):
+    cache = fake_redis_cache(monkeypatch)
 
     def release_iterator(adaptor, site_name, release_label, current_only):
         yield {
@@ -415,9 +443,6 @@ def test_get_releases_cache_varies_by_current_only(monkeypatch):
             "is_current": current_only,
         }
 
-    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
-    monkeypatch.setattr(redis_resource.redis_client, "get", get_cached_value)
-    monkeypatch.setattr(redis_resource.redis_client, "setex", set_cached_value)
     monkeypatch.setattr(routes_resource, "release_iterator", release_iterator)
 
     all_releases = client.get("/api/metadata/releases?current_only=false")
@@ -432,6 +457,133 @@ def test_get_releases_cache_varies_by_current_only(monkeypatch):
     assert len(cache) == 2
 
 
+def test_get_releases_cache_serves_compressed_variant(monkeypatch):
+    cache = fake_redis_cache(monkeypatch)
+    monkeypatch.setattr(redis_resource, "ENABLE_COMPRESSION", True)
+    calls = []
+
+    def release_iterator(adaptor, site_name, release_label, current_only):
+        calls.append(current_only)
+        for version in range(100):
+            yield {
+                "release_label": f"release-{version}",
+                "release_type": "integrated",
+                "is_current": False,
+            }
+
+    monkeypatch.setattr(routes_resource, "release_iterator", release_iterator)
+
+    miss = client.get("/api/metadata/releases", headers={"accept-encoding": "gzip"})
+    hit = client.get("/api/metadata/releases", headers={"accept-encoding": "gzip"})
+
+    assert calls == [False]
+    assert any(key.endswith("\x00gzip") for key in cache)
+    assert hit.headers["content-encoding"] == "gzip"
+    assert hit.json() == miss.json()
+    assert len(hit.json()) == 100
+
+
+def test_get_popular_species_cache_varies_by_host(monkeypatch):
+    cache = fake_redis_cache(monkeypatch)
+
+    def get_organisms_group_count(adaptor, release_label):
+        return {
+            "organisms_group_count": [
+                {
+                    "species_taxonomy_id": 9606,
+                    "common_name": "Human",
+                    "scientific_name": "Homo sapiens",
+                    "order": 1,
+                    "count": 565,
+                }
+            ],
+            "release_label": release_label,
+        }
+
+    monkeypatch.setattr(
+        routes_resource, "get_organisms_group_count", get_organisms_group_count
+    )
+
+    for _ in range(2):
+        beta = client.get(
+            "/api/metadata/popular_species", headers={"host": "beta.ensembl.org"}
+        )
+        dev = client.get(
+            "/api/metadata/popular_species", headers={"host": "dev.ensembl.org"}
+        )
+
+        assert beta.json()["popular_species"][0]["image"] == (
+            "//beta.ensembl.org/static/genome_images/9606.svg"
+        )
+        assert dev.json()["popular_species"][0]["image"] == (
+            "//dev.ensembl.org/static/genome_images/9606.svg"
+        )
+    assert len(cache) == 2
+
+
+def test_get_popular_species_rejects_unexpected_hosts(monkeypatch):
+    cache = fake_redis_cache(monkeypatch)
+    calls = []
+
+    def get_organisms_group_count(adaptor, release_label):
+        calls.append(release_label)
+        return {"organisms_group_count": [], "release_label": release_label}
+
+    monkeypatch.setattr(
+        routes_resource, "get_organisms_group_count", get_organisms_group_count
+    )
+    monkeypatch.setattr(routes_resource, "TRUSTED_HOSTS", ["*.ensembl.org"])
+
+    for host in ["evil.example.com", 'beta.ensembl.org/"><script>', ""]:
+        response = client.get("/api/metadata/popular_species", headers={"host": host})
+        assert response.status_code == 400
+    # Spellings of the same host share one cached payload
+    for host in ["beta.ensembl.org", "BETA.Ensembl.org."]:
+        response = client.get("/api/metadata/popular_species", headers={"host": host})
+        assert response.status_code == 200
+
+    assert calls == [None]
+    assert list(cache) == ["popular_species\x00beta.ensembl.org"]
+
+
+def test_get_releases_ndjson_is_streamed_and_not_cached(monkeypatch):
+    cache = fake_redis_cache(monkeypatch)
+
+    def release_iterator(adaptor, site_name, release_label, current_only):
+        for label in ("2025-01", "2025-02"):
+            yield {
+                "release_label": label,
+                "release_type": "partial",
+                "is_current": label == "2025-02",
+            }
+
+    monkeypatch.setattr(routes_resource, "release_iterator", release_iterator)
+
+    response = client.get(
+        "/api/metadata/releases", headers={"Accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"name": "2025-01", "type": "partial", "is_current": False},
+        {"name": "2025-02", "type": "partial", "is_current": True},
+    ]
+    assert cache == {}
+
+
+def test_get_genomes_in_group_ignores_ndjson():
+    # Only /releases streams NDJSON; the other lists are built before the
+    # response, so they are always sent as JSON
+    url = "/api/metadata/genome_groups/grch38-group/genomes"
+    json_response = client.get(url)
+    ndjson_response = client.get(url, headers={"Accept": "application/x-ndjson"})
+
+    assert ndjson_response.status_code == 200
+    assert ndjson_response.headers["content-type"].startswith("application/json")
+    assert ndjson_response.json() == json_response.json()
+
+
 def test_get_vep_file_paths():
     response = client.get(
         "/api/metadata/genome/2b5fb047-5992-4dfb-b2fa-1fb4e18d1abb/vep/file_paths"
@@ -1240,7 +1392,8 @@ def test_validate_region():
     }
 
 
-def test_get_popular_species():
+def test_get_popular_species(monkeypatch):
+    monkeypatch.setattr(routes_resource, "TRUSTED_HOSTS", ["testserver"])
     response = client.get("/api/metadata/popular_species")
     assert response.status_code == 200
     assert response.json() == {
@@ -0,0 +1,50 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from concurrent.futures import ThreadPoolExecutor
+
+from api.schemas.popular_species import PopularSpecies, popular_species_group
+
+SPECIES = [
+    {
+        "species_taxonomy_id": 9606,
+        "common_name": "Human",
+        "scientific_name": "Homo sapiens",
+        "order": 1,
+        "count": 565,
+    }
+]
+
+
+def image_url(host):
+    return popular_species_group(host, SPECIES).model_dump()["popular_species"][0][
+        "image"
+    ]
+
+
+def test_image_url_uses_the_given_host():
+    assert image_url("beta.ensembl.org") == (
+        "//beta.ensembl.org/static/genome_images/9606.svg"
+    )
+    assert not hasattr(PopularSpecies, "_base_url")
+
+
+def test_concurrent_hosts_do_not_share_state():
+    hosts = [f"host{i}.ensembl.org" for i in range(50)] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        urls = list(executor.map(image_url, hosts))
+
+    assert urls == [f"//{host}/static/genome_images/9606.svg" for host in hosts]
@@ -0,0 +1,215 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import copy
+import json
+
+import pytest
+
+import api.schemas.serializers as serializers
+
+
+def genome_data(**overrides):
+    """A genome dict shaped like api.models.logic.create_genome."""
+    genome = {
+        "genome_uuid": "a7335667-93e7-11ec-a39d-005056b38ce3",
+        "created": "2023-09-22 15:04:45",
+        "url_name": "GCA_000001405.29",
+        "assembly": {
+            "assembly_uuid": "fd7fea38-981a-4d73-a879-6f9daef86f08",
+            "accession": "GCA_000001405.29",
+            "level": "chromosome",
+            "name": "GRCh38.p14",
+            "ucsc_name": "hg38",
+            "ensembl_name": "GRCh38.p14",
+            "is_reference": 1,
+        },
+        "taxon": {
+            "alternative_names": ["human", "man"],
+            "taxonomy_id": 9606,
+            "scientific_name": "Homo sapiens",
+            "strain": None,
+        },
+        "organism": {
+            "common_name": "Human",
+            "strain": "reference",
+            "strain_type": "population",
+            "scientific_name": "Homo sapiens",
+            "ensembl_name": "SAMN12121739",
+            "scientific_parlance_name": "Human",
+            "organism_uuid": "1d336185-affe-4a91-85bb-04ebd73cbb56",
+            "taxonomy_id": 9606,
+            "species_taxonomy_id": 9606,
+        },
+        "attributes_info": {
+            "genebuild_method": "import",
+            "genebuild_method_display": "Import",
+            "genebuild_last_geneset_update": "2014-01",
+            "genebuild_provider_version": "GENCODE 47",
+            "genebuild_provider_name": "GENCODE",
+            "genebuild_provider_url": "",
+            "genebuild_sample_gene": "ENSG00000139618",
+            "genebuild_sample_location": "13:32315086-32400268",
+            "assembly_level": "chromosome",
+            "assembly_date": "2013-12",
+            "assembly_provider_name": "Genome Reference Consortium",
+            "assembly_provider_url": "https://www.ncbi.nlm.nih.gov/grc",
+            "variation_sample_variant": "",
+        },
+        "release": {
+            "release_version": 113.2,
+            "release_date": "2025-02-01",
+            "release_label": "2025-02",
+            "release_type": "integrated",
+            "is_current": 1,
+            "site_name": "Ensembl",
+            "site_label": "Ensembl Genome Browser",
+            "site_uri": "https://beta.ensembl.org",
+        },
+        "related_assemblies_count": 42,
+        "available_datasets": ["assembly", "genebuild"],
+    }
+    genome.update(overrides)
+    return genome
+
+
+def partial_genome_data():
+    genome = genome_data()
+    genome["release"]["release_type"] = "partial"
+    genome["organism"]["strain"] = ""
+    genome["assembly"]["accession"] = "GCF_000001405.40"
+    genome["attributes_info"] = {
+        "assembly_level": "scaffold",
+        "genebuild_version": "2024-03",
+        "genebuild_provider_name": "",
+    }
+    return genome
+
+
+SERIALIZER_CASES = [
+    (
+        serializers.region,
+        {"name": "1", "type": "chromosome", "length": 248956422, "is_circular": False},
+    ),
+    (
+        serializers.region,
+        {
+            "name": "MT",
+            "rank": None,
+            "md5": "c68f52674c9fb33aef52dcf399755519",
+            "length": 16569,
+            "chromosomal": 1,
+            "sequence_type": "chromosome",
+            "is_circular": 1,
+        },
+    ),
+    (serializers.base_genome_details, genome_data()),
+    (serializers.base_genome_details, partial_genome_data()),
+    (serializers.base_genome_details, genome_data(genome_tag=None, type=None)),
+    (serializers.genome_details, genome_data()),
+    (serializers.genome_details, partial_genome_data()),
+    (serializers.explain_genome, genome_data(latest_genome=None)),
+    (
+        serializers.explain_genome,
+        genome_data(genome_tag=None, latest_genome=partial_genome_data()),
+    ),
+    (serializers.release, genome_data()["release"]),
+    (
+        serializers.dataset_attributes,
+        {
+            "release_version": 113,
+            "attributes": [
+                {
+                    "attribute_name": "genebuild.method",
+                    "attribute_value": "import",
+                    "dataset_version": "1.0",
+                    "dataset_uuid": "559d7660-d92d-47e1-924e-e741151c2cef",
+                    "dataset_type": "genebuild",
+                },
+                {
+                    "attribute_name": "genebuild.sample_gene",
+                    "attribute_value": None,
+                    "dataset_version": "1.0",
+                    "dataset_uuid": "559d7660-d92d-47e1-924e-e741151c2cef",
+                    "dataset_type": "genebuild",
+                },
+            ],
+        },
+    ),
+    (
+        serializers.ftp_links,
+        {
+            "links": [
+                {"dataset_type": "assembly", "path": "Homo_sapiens/GCA_000001405.29"},
+                {"dataset_type": "genebuild", "path": "Homo_sapiens/GENCODE47"},
+            ]
+        },
+    ),
+    (
+        serializers.genome_group,
+        {
+            "group_id": "grch38-group",
+            "group_type": "structural_variant",
+            "reference_genome": genome_data(),
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "serializer, data",
+    SERIALIZER_CASES,
+    ids=[serializer.__name__ for serializer, _ in SERIALIZER_CASES],
+)
+def test_serializer_matches_schema(serializer, data):
+    serialized = serializer(copy.deepcopy(data))
+    validated = serializer.validated(copy.deepcopy(data))
+
+    # Same values, and the same key order so the JSON bodies are identical
+    assert json.dumps(serialized) == json.dumps(validated)
+
+
+def test_validate_responses_uses_the_schemas(monkeypatch):
+    monkeypatch.setattr(serializers, "VALIDATE_RESPONSES", True)
+
+    with pytest.raises(ValueError):
+        serializers.region({"name": "1", "length": "not a length"})
+
+
+@pytest.mark.parametrize("validated", [False, True], ids=["serializer", "schema"])
+@pytest.mark.benchmark(group="details")
+def test_genome_details_benchmark(benchmark, monkeypatch, validated):
+    monkeypatch.setattr(serializers, "VALIDATE_RESPONSES", validated)
+    benchmark(serializers.genome_details, genome_data())
+
+
+@pytest.mark.parametrize("validated", [False, True], ids=["serializer", "schema"])
+@pytest.mark.benchmark(group="explain")
+def test_explain_genome_benchmark(benchmark, monkeypatch, validated):
+    monkeypatch.setattr(serializers, "VALIDATE_RESPONSES", validated)
+    benchmark(
+        serializers.explain_genome, genome_data(latest_genome=partial_genome_data())
+    )
+
+
+@pytest.mark.parametrize("validated", [False, True], ids=["serializer", "schema"])
+@pytest.mark.benchmark(group="karyotype")
+def test_karyotype_benchmark(benchmark, monkeypatch, validated):
+    monkeypatch.setattr(serializers, "VALIDATE_RESPONSES", validated)
+    regions = [
+        {"name": str(rank), "type": "chromosome", "length": 10_000_000 + rank}
+        for rank in range(1, 25)
+    ]
+    benchmark(lambda: [serializers.region(region) for region in regions])
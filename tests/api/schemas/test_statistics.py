@@ -0,0 +1,62 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from api.schemas.statistics import (
+    genome_stats_document,
+    genome_stats_document_from_values,
+)
+
+TOP_LEVEL_STATS = [
+    {
+        "name": "assembly.contig_n50",
+        "label": "Contig N50",
+        "statistic_type": "integer",
+        "statistic_value": "NA",
+    },
+    {
+        "name": "assembly.stats.total_genome_length",
+        "label": "Total genome length",
+        "statistic_type": "integer",
+        "statistic_value": "3099750718",
+    },
+    {
+        "name": "genebuild.stats.coding_genes",
+        "label": "Coding genes",
+        "statistic_type": "integer",
+        "statistic_value": "20080",
+    },
+    {
+        "name": "compara.homology_coverage",
+        "label": "Homology coverage",
+        "statistic_type": "float",
+        "statistic_value": "98.5",
+    },
+]
+
+
+def test_genome_stats_document_from_values_matches_raw_statistics():
+    statistic_values = {
+        stat["name"]: stat["statistic_value"] for stat in TOP_LEVEL_STATS
+    }
+
+    document = genome_stats_document_from_values(statistic_values)
+
+    assert document == genome_stats_document(TOP_LEVEL_STATS)
+    assert document["genome_stats"]["assembly_stats"]["contig_n50"] is None
+    assert document["genome_stats"]["coding_stats"]["coding_genes"] == 20080
+
+
+def test_genome_stats_document_without_statistics():
+    assert genome_stats_document_from_values({}) == genome_stats_document(None)
@@ -0,0 +1,82 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import api.dependencies as dependencies
+from api.dependencies import Dependencies
+from api.main import app
+from api.request_phases import PhaseTimedAdaptor
+
+
+def test_dependencies_are_built_lazily():
+    Dependencies.shutdown()
+    assert Dependencies.meta_conn is None
+    assert not Dependencies.ready
+
+    meta_adaptor = Dependencies.get_meta_adaptor()
+
+    assert meta_adaptor is Dependencies.meta_adaptor
+    assert Dependencies.meta_conn is not None
+    assert Dependencies.ready
+    assert Dependencies.warmed
+
+
+def test_lifespan_opens_and_closes_dependencies():
+    Dependencies.shutdown()
+
+    with TestClient(app) as client:
+        response = client.get("/api/metadata/genome_counts")
+        assert response.status_code == 200
+        assert Dependencies.ready
+
+    assert Dependencies.meta_conn is None
+    assert not Dependencies.ready
+
+
+def test_adaptors_are_wrapped_for_tracing_without_phase_metrics(monkeypatch):
+    monkeypatch.setattr(dependencies, "ENABLE_PHASE_METRICS", False)
+    monkeypatch.setattr(dependencies, "ENABLE_TRACING", True)
+    Dependencies.shutdown()
+    try:
+        Dependencies.startup()
+
+        assert isinstance(Dependencies.genome_adaptor, PhaseTimedAdaptor)
+        assert isinstance(Dependencies.meta_adaptor, PhaseTimedAdaptor)
+    finally:
+        Dependencies.shutdown()
+
+
+def test_failed_startup_is_retried_with_backoff(monkeypatch):
+    attempts = []
+    delays = []
+
+    def startup():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise ConnectionError("DB not mounted yet")
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(Dependencies, "startup", startup)
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+
+    asyncio.run(Dependencies.startup_with_retries(delay=1, max_delay=3))
+
+    assert len(attempts) == 4
+    assert delays == [1, 2, 3]
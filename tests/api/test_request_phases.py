@@ -0,0 +1,138 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import sqlalchemy as db
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import api.request_phases as request_phases
+from api.request_phases import (
+    PhaseMetricsMiddleware,
+    PhaseTimedAdaptor,
+    RequestPhases,
+    phase,
+    timed,
+)
+from api.resources.json_responses import APIJSONResponse
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Adaptor:
+    def __init__(self):
+        self.engine = db.create_engine("sqlite://")
+
+    def fetch_genome(self, genome_uuid):
+        with self.engine.connect() as conn:
+            conn.execute(db.text("SELECT 1"))
+            conn.execute(db.text("SELECT 2"))
+        return {"genome_id": genome_uuid}
+
+
+adaptor = PhaseTimedAdaptor(Adaptor())
+
+
+@timed("logic")
+def get_genome(genome_uuid):
+    return adaptor.fetch_genome(genome_uuid)
+
+
+router = APIRouter(prefix="/metadata")
+
+
+@router.get("/genome/{genome_uuid}/details", name="genome_details")
+async def genome_details(genome_uuid: str):
+    return APIJSONResponse(get_genome(genome_uuid))
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_time_is_charged_to_the_innermost_phase(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(request_phases, "perf_counter", clock)
+    phases = RequestPhases()
+    token = request_phases._current_phases.set(phases)
+    try:
+        with phase("logic"):
+            clock.now += 1
+            with phase("adaptor"):
+                clock.now += 2
+            clock.now += 3
+        clock.now += 4
+    finally:
+        request_phases._current_phases.reset(token)
+
+    assert phases.seconds["logic"] == 4
+    assert phases.seconds["adaptor"] == 2
+
+
+def test_timed_generators_are_charged_per_item(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(request_phases, "perf_counter", clock)
+
+    @timed("logic")
+    def items():
+        for item in range(3):
+            clock.now += 1
+            yield item
+
+    phases = RequestPhases()
+    token = request_phases._current_phases.set(phases)
+    try:
+        collected = []
+        for item in items():
+            clock.now += 10
+            collected.append(item)
+    finally:
+        request_phases._current_phases.reset(token)
+
+    assert collected == [0, 1, 2]
+    assert phases.seconds["logic"] == 3
+
+
+def test_timed_functions_run_unchanged_outside_requests():
+    assert get_genome("a7335667") == {"genome_id": "a7335667"}
+
+
+def test_requests_export_phases_and_db_queries():
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(PhaseMetricsMiddleware, routes=router.routes, prefix="/api")
+    client = TestClient(app)
+    labels = {"route": "genome_details"}
+    before = {
+        name: sample("request_phase_seconds_count", phase=name, **labels)
+        for name in request_phases.PHASES
+    }
+    queries_before = sample("request_db_queries_sum", **labels)
+
+    response = client.get("/api/metadata/genome/a7335667/details")
+
+    assert response.json() == {"genome_id": "a7335667"}
+    for name in request_phases.PHASES:
+        count = sample("request_phase_seconds_count", phase=name, **labels)
+        assert count == before[name] + 1
+    for name in ("adaptor", "logic", "json"):
+        assert sample("request_phase_seconds_sum", phase=name, **labels) > 0
+    assert sample("request_db_queries_sum", **labels) == queries_before + 2
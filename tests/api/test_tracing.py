@@ -0,0 +1,141 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import json
+import logging
+
+import pytest
+import sqlalchemy as db
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+
+import api.resources.redis as redis_resource
+from api import tracing
+from api.logconfig import TraceContextFilter
+from api.request_phases import PhaseTimedAdaptor, timed
+from api.resources.redis import redis_cache
+
+trace = pytest.importorskip("opentelemetry.trace")
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+class Adaptor:
+    def __init__(self):
+        self.engine = db.create_engine("sqlite://")
+
+    def fetch_genome(self, genome_uuid):
+        with self.engine.connect() as conn:
+            conn.execute(db.text("SELECT 1"))
+        return {"genome_id": genome_uuid}
+
+
+adaptor = PhaseTimedAdaptor(Adaptor())
+
+
+@timed("logic")
+def get_genome(genome_uuid):
+    return adaptor.fetch_genome(genome_uuid)
+
+
+router = APIRouter(prefix="/metadata")
+
+
+@router.get("/genome/{genome_uuid}/details", name="genome_details")
+@redis_cache("details", arg_keys=["genome_uuid"])
+async def genome_details(request: Request, genome_uuid: str):
+    return get_genome(genome_uuid)
+
+
+@pytest.fixture
+def traced_client(tmp_path):
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "traces.jsonl"
+    assert tracing.setup_tracing(exporter="file", path=str(path))
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(tracing.TracingMiddleware, routes=router.routes, prefix="/api")
+    try:
+        yield TestClient(app)
+    finally:
+        tracing.shutdown_tracing()
+
+
+def read_spans(path):
+    tracing.shutdown_tracing()
+    with open(path) as trace_file:
+        spans = [json.loads(line) for line in trace_file]
+    return {span["name"]: span for span in spans}
+
+
+def parent_of(span, spans):
+    parent_id = span["parent_id"]
+    return next(
+        s["name"] for s in spans.values() if s["context"]["span_id"] == parent_id
+    )
+
+
+def test_requests_are_traced_through_each_layer(traced_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", False)
+
+    response = traced_client.get(
+        "/api/metadata/genome/a7335667/details", headers={"traceparent": TRACEPARENT}
+    )
+
+    assert response.status_code == 200
+    spans = read_spans(tmp_path / "traces.jsonl")
+    server = spans["GET /api/metadata/genome/{genome_uuid}/details"]
+    assert server["context"]["trace_id"] == "0x" + TRACE_ID
+    assert server["attributes"]["http.response.status_code"] == 200
+    assert parent_of(spans["redis_cache details"], spans) == server["name"]
+    assert parent_of(spans["logic get_genome"], spans) == "redis_cache details"
+    adaptor_span = spans["adaptor Adaptor.fetch_genome"]
+    assert parent_of(adaptor_span, spans) == "logic get_genome"
+    assert parent_of(spans["SQL SELECT"], spans) == adaptor_span["name"]
+    assert spans["SQL SELECT"]["attributes"]["db.statement"] == "SELECT 1"
+    cache_attributes = spans["redis_cache details"]["attributes"]
+    assert cache_attributes["cache.key"] == "details:a7335667"
+    assert cache_attributes["cache.hit"] is False
+
+
+def test_cache_hits_are_traced(traced_client, tmp_path, monkeypatch):
+    async def get_cached_value(key):
+        return b'{"genome_id":"a7335667"}'
+
+    monkeypatch.setattr(redis_resource, "ENABLE_REDIS_CACHE", True)
+    monkeypatch.setattr(redis_resource, "ENABLE_COMPRESSION", False)
+    monkeypatch.setattr(redis_resource.redis_client, "get", get_cached_value)
+
+    traced_client.get("/api/metadata/genome/a7335667/details")
+
+    spans = read_spans(tmp_path / "traces.jsonl")
+    cache_attributes = spans["redis_cache details"]["attributes"]
+    assert cache_attributes["cache.hit"] is True
+    assert cache_attributes["cache.source"] == "redis"
+    assert "logic get_genome" not in spans
+
+
+def test_log_records_carry_the_trace_ids():
+    span_context = trace.SpanContext(
+        trace_id=int(TRACE_ID, 16), span_id=0x00F067AA0BA902B7, is_remote=False
+    )
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+
+    with trace.use_span(trace.NonRecordingSpan(span_context)):
+        TraceContextFilter().filter(record)
+
+    assert record.elasticapm_trace_id == TRACE_ID
+    assert record.elasticapm_span_id == "00f067aa0ba902b7"
@@ -0,0 +1,126 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+from sqlalchemy import text
+
+from api.models.meta_adaptor import MetaAdaptor
+from api.tools import build_genome_stats
+from ensembl.utils.database import DBConnection
+
+GENOME_UUIDS = [
+    "a7335667-93e7-11ec-a39d-005056b38ce3",
+    "b00b1e5f-0000-4000-8000-000000000000",
+]
+
+
+def fake_top_level_statistics(adaptor, genome_uuid):
+    return {
+        "uuid": genome_uuid,
+        "assembly": {"contig_n50": 1000, "total_genome_length": 10},
+        "coding_stats": {"coding_genes": len(genome_uuid)},
+    }
+
+
+def make_db(tmp_path):
+    db_conn = DBConnection(f"duckdb:///{tmp_path / 'meta.db'}", reflect=False)
+    with db_conn.begin() as conn:
+        conn.execute(text("CREATE TABLE genome (genome_uuid VARCHAR)"))
+        for genome_uuid in GENOME_UUIDS:
+            conn.execute(
+                text("INSERT INTO genome VALUES (:genome_uuid)"),
+                {"genome_uuid": genome_uuid},
+            )
+    return db_conn
+
+
+def test_build_matches_live_rendering(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        build_genome_stats,
+        "get_top_level_statistics_by_uuid",
+        fake_top_level_statistics,
+    )
+    db_conn = make_db(tmp_path)
+
+    count = build_genome_stats.build(
+        db_conn, None, build_genome_stats.fetch_genome_uuids(db_conn)
+    )
+
+    assert count == len(GENOME_UUIDS)
+    assert build_genome_stats.verify(db_conn, None) == []
+    document = MetaAdaptor(db_conn).fetch_genome_stats_document(GENOME_UUIDS[0])
+    assert document == build_genome_stats.render_genome_stats(None, GENOME_UUIDS[0])
+    assert MetaAdaptor(db_conn).fetch_genome_stats_document("missing") is None
+
+
+def test_verify_reports_stale_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        build_genome_stats,
+        "get_top_level_statistics_by_uuid",
+        fake_top_level_statistics,
+    )
+    db_conn = make_db(tmp_path)
+    build_genome_stats.build(db_conn, None, GENOME_UUIDS)
+    with db_conn.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE genome_stats_document SET document = '{}' WHERE genome_uuid = :u"
+            ),
+            {"u": GENOME_UUIDS[1]},
+        )
+
+    assert build_genome_stats.verify(db_conn, None) == [GENOME_UUIDS[1]]
+
+
+def test_build_of_some_genomes_keeps_the_other_documents(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        build_genome_stats,
+        "get_top_level_statistics_by_uuid",
+        fake_top_level_statistics,
+    )
+    db_conn = make_db(tmp_path)
+    build_genome_stats.build(db_conn, None, GENOME_UUIDS[:1])
+
+    # The second genome has no document yet
+    assert build_genome_stats.verify(db_conn, None) == [GENOME_UUIDS[1]]
+
+    build_genome_stats.build(db_conn, None, GENOME_UUIDS[1:])
+    build_genome_stats.build(db_conn, None, GENOME_UUIDS[1:])
+
+    assert build_genome_stats.verify(db_conn, None) == []
+    with db_conn.connect() as conn:
+        count = conn.execute(text("SELECT count(*) FROM genome_stats_document"))
+        assert count.scalar() == len(GENOME_UUIDS)
+
+
+def test_full_build_prunes_documents_of_removed_genomes(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        build_genome_stats,
+        "get_top_level_statistics_by_uuid",
+        fake_top_level_statistics,
+    )
+    db_conn = make_db(tmp_path)
+    build_genome_stats.build(db_conn, None, GENOME_UUIDS)
+    with db_conn.begin() as conn:
+        conn.execute(
+            text("DELETE FROM genome WHERE genome_uuid = :u"), {"u": GENOME_UUIDS[1]}
+        )
+
+    assert build_genome_stats.verify(db_conn, None) == [GENOME_UUIDS[1]]
+
+    build_genome_stats.build(
+        db_conn, None, build_genome_stats.fetch_genome_uuids(db_conn), prune=True
+    )
+
+    assert build_genome_stats.verify(db_conn, None) == []
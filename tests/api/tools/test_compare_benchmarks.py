@@ -0,0 +1,82 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import json
+
+from api.tools import compare_benchmarks
+
+
+def write_run(path, medians, fixture_id="sha256:abc"):
+    run = {
+        "fixture_db": {"path": "meta.db", "id": fixture_id},
+        "benchmarks": [
+            {"name": name, "stats": {"median": median, "mean": median * 2}}
+            for name, median in medians.items()
+        ],
+    }
+    path.write_text(json.dumps(run))
+    return str(path)
+
+
+def test_compare_flags_slowdowns_beyond_threshold_and_min_delta():
+    baseline = {"details": 0.010, "stats": 0.010, "cached": 0.00002}
+    current = {"details": 0.0105, "stats": 0.013, "cached": 0.00004}
+
+    comparisons = compare_benchmarks.compare(
+        baseline, current, threshold=0.1, min_delta=0.0005
+    )
+
+    assert [(c.name, c.regressed) for c in comparisons] == [
+        ("cached", False),
+        ("details", False),
+        ("stats", True),
+    ]
+    assert round(comparisons[2].change, 2) == 0.3
+
+
+def test_main_fails_on_regressions(tmp_path, capsys):
+    baseline = write_run(tmp_path / "baseline.json", {"a": 0.010, "b": 0.010})
+    current = write_run(tmp_path / "current.json", {"a": 0.009, "b": 0.020})
+
+    assert compare_benchmarks.main([baseline, current]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert compare_benchmarks.main([baseline, current, "--threshold", "1.5"]) == 0
+
+
+def test_main_compares_the_chosen_statistic(tmp_path):
+    baseline = write_run(tmp_path / "baseline.json", {"a": 0.010})
+    current = write_run(tmp_path / "current.json", {"a": 0.010})
+
+    assert compare_benchmarks.main([baseline, current, "--stat", "mean"]) == 0
+
+
+def test_main_reports_missing_and_new_benchmarks(tmp_path, capsys):
+    baseline = write_run(tmp_path / "baseline.json", {"a": 0.010, "gone": 0.010})
+    current = write_run(tmp_path / "current.json", {"a": 0.010, "new": 0.010})
+
+    assert compare_benchmarks.main([baseline, current]) == 0
+    out = capsys.readouterr().out
+    assert "Missing from current run: gone" in out
+    assert "Not in baseline: new" in out
+
+
+def test_main_refuses_runs_on_different_fixtures(tmp_path):
+    baseline = write_run(tmp_path / "baseline.json", {"a": 0.010}, "sha256:abc")
+    current = write_run(
+        tmp_path / "current.json", {"a": 0.010}, "synthetic-v1:genomes=200"
+    )
+
+    assert compare_benchmarks.main([baseline, current]) == 2
+    assert compare_benchmarks.main([baseline, current, "--ignore-fixture"]) == 0
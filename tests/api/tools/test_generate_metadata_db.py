@@ -0,0 +1,104 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import pytest
+from sqlalchemy import text
+
+from api.tools import generate_metadata_db
+from api.tools.generate_metadata_db import Scale, parse_scale
+
+TINY = Scale(
+    genomes=12,
+    datasets_per_genome=3,
+    attributes_per_dataset=5,
+    sequences_per_assembly=4,
+    max_sequences_per_assembly=40,
+    releases=3,
+    groups=2,
+    genomes_per_group=5,
+)
+
+
+def rows(db_conn, query):
+    with db_conn.connect() as conn:
+        return conn.execute(text(query)).fetchall()
+
+
+@pytest.fixture(scope="module")
+def tiny_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("synthetic") / "tiny.db")
+    db_conn = generate_metadata_db.generate(path, TINY, seed=7)
+    yield db_conn
+    db_conn.dispose()
+
+
+def test_generate_writes_the_requested_scale(tiny_db):
+    assert rows(tiny_db, "SELECT count(*) FROM genome") == [(12,)]
+    assert rows(tiny_db, "SELECT count(*) FROM genome_dataset") == [(36,)]
+    assert rows(tiny_db, "SELECT count(*) FROM ensembl_release") == [(3,)]
+    assert rows(tiny_db, "SELECT count(*) FROM genome_group_member") == [(10,)]
+    # Genome 1 has the maximum, the 11 others the usual number
+    assert rows(tiny_db, "SELECT count(*) FROM assembly_sequence") == [(40 + 11 * 4,)]
+    # At least attributes_per_dataset per dataset, all the known ones included
+    attributes = rows(
+        tiny_db, "SELECT count(*) FROM dataset_attribute WHERE dataset_id = 1"
+    )
+    assert attributes[0][0] >= TINY.attributes_per_dataset
+
+
+def test_sample_ids_are_those_of_genome_1(tiny_db):
+    sample_ids = generate_metadata_db.sample_ids(seed=7)
+    genome = rows(
+        tiny_db,
+        "SELECT g.genome_uuid, a.accession FROM genome g JOIN assembly a "
+        "USING (assembly_id) WHERE g.genome_id = 1",
+    )
+    assert genome == [(sample_ids["genome_uuid"], sample_ids["assembly_accession"])]
+
+
+def test_generate_is_deterministic(tiny_db, tmp_path):
+    query = "SELECT genome_uuid FROM genome ORDER BY genome_id"
+    db_conn = generate_metadata_db.generate(str(tmp_path / "again.db"), TINY, seed=7)
+    other_seed = generate_metadata_db.generate(str(tmp_path / "other.db"), TINY, seed=8)
+    try:
+        assert rows(db_conn, query) == rows(tiny_db, query)
+        assert rows(other_seed, query) != rows(tiny_db, query)
+    finally:
+        db_conn.dispose()
+        other_seed.dispose()
+
+
+def test_generate_refuses_to_overwrite(tmp_path):
+    path = tmp_path / "existing.db"
+    path.write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        generate_metadata_db.generate(str(path), TINY)
+
+
+def test_parse_scale_overrides_a_preset():
+    scale = parse_scale("small", {"genomes": 10, "releases": None})
+    assert scale.genomes == 10
+    assert scale.releases == generate_metadata_db.SCALES["small"].releases
+    with pytest.raises(ValueError):
+        parse_scale("huge")
+    with pytest.raises(ValueError):
+        parse_scale("small", {"datasets_per_genome": 1})
+
+
+def test_fixture_id_identifies_the_scale_and_seed():
+    fixture_id = generate_metadata_db.fixture_id
+    assert fixture_id(TINY, 7) == fixture_id(TINY, 7)
+    assert fixture_id(TINY, 7) != fixture_id(TINY, 8)
+    assert fixture_id(TINY, 7) != fixture_id(TINY._replace(genomes=13), 7)
@@ -0,0 +1,171 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+import pytest
+
+from api.tools import load_test
+from api.tools.load_test import Sample, Traffic
+
+GENOMES = [f"genome-{i:03d}" for i in range(100)]
+
+METRICS = """\
+# HELP redis_cache_hits_total Responses served from cache
+# TYPE redis_cache_hits_total counter
+redis_cache_hits_total{key_prefix="genome_details",source="redis"} 30.0
+redis_cache_hits_total{key_prefix="genome_details",source="bundle"} 10.0
+redis_cache_hits_total{key_prefix="karyotype",source="redis"} 5.0
+# HELP redis_cache_misses_total Cache lookups missed
+# TYPE redis_cache_misses_total counter
+redis_cache_misses_total{key_prefix="genome_details"} 10.0
+redis_cache_misses_total{key_prefix="karyotype"} 5.0
+"""
+
+
+def test_parse_mix():
+    assert load_test.parse_mix("genome_details=3, crawler") == {
+        "genome_details": 3.0,
+        "crawler": 1.0,
+    }
+    with pytest.raises(argparse.ArgumentTypeError):
+        load_test.parse_mix("genome_details=3,unknown=1")
+    with pytest.raises(argparse.ArgumentTypeError):
+        load_test.parse_mix("crawler=0")
+
+
+def test_genome_popularity_follows_zipf():
+    traffic = Traffic(GENOMES, {"genome_details": 1}, zipf_exponent=1.1)
+    rng = random.Random(0)
+    counts = Counter(traffic.genome(rng) for _ in range(20000))
+
+    ranked = [count for _, count in counts.most_common()]
+    # 1 / rank^1.1 over 100 genomes: the top one gets ~23% of the requests,
+    # the 10th ~1.8%
+    assert ranked[0] / 20000 == pytest.approx(0.23, abs=0.02)
+    assert ranked[0] > 8 * ranked[9]
+    # Deterministic for a seed, whatever the order of the genomes
+    assert Traffic(GENOMES[::-1], {"crawler": 1}).genomes == traffic.genomes
+
+
+def test_validate_location_burst_shifts_a_location_of_one_genome():
+    traffic = Traffic(GENOMES, {"validate_location_burst": 1}, burst_size=5)
+    urls = list(load_test.validate_location_burst(traffic, random.Random(0)))
+
+    assert len(urls) == 5
+    assert all(url.startswith("/validate_location?genome_id=genome-") for url in urls)
+    assert len({url.split("&")[0] for url in urls}) == 1
+    assert len(set(urls)) == 5
+
+
+def test_crawler_requests_unique_unknown_genomes():
+    traffic = Traffic(GENOMES, {"crawler": 1})
+    rng = random.Random(0)
+    urls = [url for _ in range(50) for url in load_test.crawler(traffic, rng)]
+
+    assert len(set(urls)) == 50
+    assert not any(genome in url for url in urls for genome in GENOMES)
+
+
+def test_virtual_user_records_statuses_and_failures():
+    def handler(request):
+        if "karyotype" in request.url.path:
+            raise httpx.ConnectError("refused", request=request)
+        known = "/genome/genome-" in request.url.path
+        return httpx.Response(200 if known else 404)
+
+    traffic = Traffic(GENOMES, {"genome_details": 1, "karyotype": 1, "crawler": 1})
+    samples = []
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="http://test"
+        ) as client:
+            deadline = time.perf_counter() + 0.2
+            await load_test.virtual_user(
+                client, traffic, random.Random(0), deadline, samples
+            )
+
+    asyncio.run(run())
+
+    statuses = {(s.scenario, s.status) for s in samples}
+    assert ("genome_details", 200) in statuses
+    assert ("karyotype", 0) in statuses
+    assert all(
+        status in (0, 404) for scenario, status in statuses if scenario == "crawler"
+    )
+
+
+def test_summarize_reports_throughput_and_percentiles():
+    samples = [Sample("genome_details", 200, i / 1000) for i in range(1, 101)]
+    samples.append(Sample("crawler", 404, 0.5))
+
+    summary = load_test.summarize(samples, elapsed=10)
+
+    details = summary["scenarios"]["genome_details"]
+    assert details["requests"] == 100
+    assert details["throughput"] == 10
+    assert (details["p50"], details["p95"], details["p99"]) == pytest.approx(
+        (50, 95, 99)
+    )
+    assert summary["statuses"] == {200: 100, 404: 1}
+    assert summary["p99"] == pytest.approx(100)
+    assert "genome_details" in load_test.format_report(summary, None)
+
+
+def test_cache_hit_rates_between_two_scrapes():
+    before = load_test.cache_counts(METRICS)
+    after = load_test.cache_counts(
+        METRICS.replace("30.0", "70.0").replace(
+            'misses_total{key_prefix="karyotype"} 5.0',
+            'misses_total{key_prefix="karyotype"} 15.0',
+        )
+    )
+
+    assert before["genome_details"] == {"hits": 40.0, "misses": 10.0}
+    cache = load_test.cache_hit_rates(before, after)
+    assert cache["prefixes"] == {
+        "genome_details": {"hits": 40.0, "misses": 0.0, "hit_rate": 1.0},
+        "karyotype": {"hits": 0.0, "misses": 10.0, "hit_rate": 0.0},
+    }
+    assert cache["hit_rate"] == 0.8
+
+
+def test_create_app_replaces_redis_with_fakeredis(monkeypatch):
+    import fakeredis
+    from api.resources.redis import redis_client, redis_pool
+
+    monkeypatch.setattr(redis_pool, "connection_class", redis_pool.connection_class)
+    monkeypatch.setattr(
+        redis_pool, "connection_kwargs", dict(redis_pool.connection_kwargs)
+    )
+
+    load_test.create_app()
+
+    async def roundtrip():
+        await redis_client.setex("load_test", 10, b"cached")
+        return await redis_client.get("load_test")
+
+    try:
+        assert redis_pool.connection_class is fakeredis.aioredis.FakeConnection
+        assert asyncio.run(roundtrip()) == b"cached"
+    finally:
+        # Not to leave fake connections to the next tests
+        redis_pool.reset()
@@ -0,0 +1,109 @@
+#
+#    See the NOTICE file distributed with this work for additional information
+#    regarding copyright ownership.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+import pickle
+
+import duckdb
+import pytest
+import sqlalchemy
+
+from ensembl.utils.database import DBConnection, dbconnection
+
+
+@pytest.fixture
+def duckdb_file(tmp_path):
+    db_path = tmp_path / "meta.db"
+    with duckdb.connect(str(db_path)) as conn:
+        conn.execute("CREATE TABLE genome (genome_id INTEGER, genome_uuid VARCHAR)")
+        conn.execute("INSERT INTO genome VALUES (1, 'uuid-1'), (2, 'uuid-2')")
+    return db_path
+
+
+def test_lazy_reflection_on_first_table_access(duckdb_file):
+    dbc = DBConnection(f"duckdb:///{duckdb_file}", reflect=False, lazy_reflect=True)
+
+    assert dbc._metadata is None
+    assert list(dbc.tables) == ["genome"]
+
+
+def test_schema_cache_skips_reflection(duckdb_file, tmp_path, monkeypatch):
+    cache_path = tmp_path / "schema.pickle"
+    url = f"duckdb:///{duckdb_file}"
+
+    DBConnection(url, schema_cache=cache_path).dispose()
+    assert cache_path.exists()
+
+    def fail_reflect(*args, **kwargs):
+        raise AssertionError("schema should be loaded from the cache")
+
+    monkeypatch.setattr(sqlalchemy.MetaData, "reflect", fail_reflect)
+    dbc = DBConnection(url, schema_cache=cache_path)
+
+    assert dbc.get_columns("genome") == ["genome_id", "genome_uuid"]
+
+
+def test_schema_cache_is_invalidated_when_database_changes(duckdb_file, tmp_path):
+    cache_path = tmp_path / "schema.pickle"
+    url = f"duckdb:///{duckdb_file}"
+    DBConnection(url, schema_cache=cache_path).dispose()
+
+    with duckdb.connect(str(duckdb_file)) as conn:
+        conn.execute("CREATE TABLE assembly (assembly_id INTEGER)")
+
+    dbc = DBConnection(url, schema_cache=cache_path)
+
+    assert sorted(dbc.tables) == ["assembly", "genome"]
+
+
+@pytest.mark.parametrize("cached", [["not", "a", "dict"], {"fingerprint": None}])
+def test_invalid_schema_cache_is_replaced(duckdb_file, tmp_path, cached):
+    cache_path = tmp_path / "schema.pickle"
+    cache_path.write_bytes(pickle.dumps(cached))
+
+    dbc = DBConnection(f"duckdb:///{duckdb_file}", schema_cache=cache_path)
+
+    assert list(dbc.tables) == ["genome"]
+    assert isinstance(pickle.loads(cache_path.read_bytes()), dict)
+
+
+@pytest.mark.parametrize("with_pyarrow", [True, False])
+def test_fetch_records(duckdb_file, monkeypatch, with_pyarrow):
+    if with_pyarrow:
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setattr(dbconnection, "pyarrow", None)
+    dbc = DBConnection(f"duckdb:///{duckdb_file}", reflect=False)
+    query = sqlalchemy.text(
+        "SELECT genome_id, genome_uuid FROM genome WHERE genome_id > :min_id ORDER BY genome_id"
+    )
+
+    assert dbc.fetch_records(query, {"min_id": 0}) == [
+        {"genome_id": 1, "genome_uuid": "uuid-1"},
+        {"genome_id": 2, "genome_uuid": "uuid-2"},
+    ]
+    assert dbc.fetch_records("SELECT genome_id FROM genome WHERE genome_id > 5") == []
+
+
+def test_fetch_arrow(duckdb_file):
+    pyarrow = pytest.importorskip("pyarrow")
+    dbc = DBConnection(f"duckdb:///{duckdb_file}", reflect=False)
+
+    table = dbc.fetch_arrow(
+        "SELECT genome_id, genome_uuid FROM genome ORDER BY genome_id"
+    )
+
+    assert isinstance(table, pyarrow.Table)
+    assert table.column_names == ["genome_id", "genome_uuid"]
+    assert table.column("genome_uuid").to_pylist() == ["uuid-1", "uuid-2"]
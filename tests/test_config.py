@@ -8,6 +8,7 @@ import api.config as config
 class ConfigTestCase(unittest.TestCase):
     def test_environment_variables(self):
         assert type(config.ALLOWED_HOSTS) == CommaSeparatedStrings
+        assert type(config.TRUSTED_HOSTS) == CommaSeparatedStrings
 
 
 if __name__ == "__main__":